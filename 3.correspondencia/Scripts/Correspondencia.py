@@ -2,6 +2,10 @@
 # Correspondencia masiva: Excel (TAGS) → Word (plantilla)
 # ============================================================
 
+import io
+import sys
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, date
 import pandas as pd
@@ -9,6 +13,13 @@ from docx import Document
 from tqdm.auto import tqdm
 import re
 from docx.shared import Inches
+from docx.text.paragraph import Paragraph
+
+from analizador_plantillas import (PATRON_MARCADOR, TIPO_TAGS, TIPO_FOTOS, parrafos_de_tablas,
+                                   cargar_indice_marcadores, ubicar_parrafos, ubicar_elementos)
+from renderizador_docx import (MOTOR_DOCX, MOTOR_LXML, resolver_motor,
+                               parrafos_con_marcadores, parrafos_de_fotos)
+from cache_fotos import foto_para_informe
 
 # ----------- DICCIONARIO DE FOTOS POR CIUDAD (PÉGALO AQUÍ) -----------
 # Diccionario de fotos por ciudad - SEPTIEMBRE 2025
@@ -77,46 +88,71 @@ fotos_por_ciudad_septiembre = {
 
 # ----------- 1. Ruta raíz que contiene las carpetas por aeropuerto -----------
 ROOT_DIR = Path(r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\3.correspondencia\Datos")
+# Fotos reducidas y recomprimidas para los informes (carpeta oculta, no es un aeropuerto)
+CACHE_FOTOS_DIR = ROOT_DIR / ".cache_fotos"
 
 # ----------- 2. Función para reemplazar tags en un documento ------------------
-def reemplazar_tags(documento: Document, tags: dict):
+# Marcadores de fotos: los resuelve insertar_fotos_en_docx, no son tags desconocidos
+PATRON_TAG_FOTO = re.compile(r"^foto\d+$")
+
+def reemplazar_tags(documento: Document, tags: dict, indice=None, motor=MOTOR_DOCX):
     """
     Reemplaza {tag}, {{tag}} o <<tag>> en párrafos y celdas,
     conservando formato incluso si la etiqueta está partida en varios runs.
     También reemplaza en encabezados y pies de página.
+    Los tags del documento sin valor en el diccionario se dejan intactos y se informan.
+    Con el índice de marcadores de la plantilla (analizador_plantillas.py) solo se
+    visitan los párrafos registrados en él, con cualquiera de los dos motores.
+    Con motor='lxml' (renderizador_docx.py) se trabaja directamente sobre los <w:p>
+    de documento, encabezados y pies (incluidas tablas anidadas).
     """
-    variantes = []
-    for t in tags:
-        t_re = re.escape(t)
-        variantes += [
-            r"\{\{\s*" + t_re + r"\s*\}\}",   # {{tag}}
-            r"\{\s*"  + t_re + r"\s*\}",      # {tag}
-            r"<<\s*" + t_re + r"\s*>>"        # <<tag>>
-        ]
-    patron = re.compile("|".join(variantes), re.IGNORECASE)
+    desconocidos = set()
 
-    def _reemplazar_en_parrafo(parrafo):
-        texto = "".join(run.text for run in parrafo.runs)
-        if not patron.search(texto):
+    def _valor(m):
+        nombre = (m.group(1) or m.group(2) or m.group(3)).strip().lower()
+        if nombre in tags:
+            return tags[nombre]
+        if not PATRON_TAG_FOTO.match(nombre):
+            desconocidos.add(nombre)
+        return m.group(0)
+
+    def _reemplazar_en_runs(runs):
+        # runs: paragraph.runs (Run) o CT_P.r_lst (<w:r>); ambos exponen .text
+        texto = "".join(run.text for run in runs)
+        # Filtro barato: sin '{' ni '<<' no puede haber marcadores
+        if "{" not in texto and "<<" not in texto:
+            return
+        nuevo_texto = PATRON_MARCADOR.sub(_valor, texto)
+        if nuevo_texto == texto:
             return
-        nuevo_texto = patron.sub(
-            lambda m: tags[re.sub(r"[{}<> ]", "", m.group(0)).lower()], texto
-        )
         # Vaciar runs y escribir el texto reemplazado en el primero
-        for run in parrafo.runs:
+        for run in runs:
             run.text = ""
-        parrafo.runs[0].text = nuevo_texto
+        runs[0].text = nuevo_texto
+
+    def _reemplazar_en_parrafo(parrafo):
+        _reemplazar_en_runs(parrafo.runs)
+
+    if motor == MOTOR_LXML:
+        parrafos = (ubicar_elementos(documento, indice, TIPO_TAGS) if indice is not None
+                    else parrafos_con_marcadores(documento))
+        for p in parrafos:
+            _reemplazar_en_runs(p.r_lst)
+    elif indice is not None:
+        for p in ubicar_parrafos(documento, indice, TIPO_TAGS):
+            _reemplazar_en_parrafo(p)
+    if motor == MOTOR_LXML or indice is not None:
+        if desconocidos:
+            print(f"⚠️  Tags sin valor en la hoja TAGS: {', '.join(sorted(desconocidos))}")
+        return documento
 
     # Párrafos fuera de tablas
     for p in documento.paragraphs:
         _reemplazar_en_parrafo(p)
 
     # Párrafos dentro de tablas
-    for tabla in documento.tables:
-        for fila in tabla.rows:
-            for celda in fila.cells:
-                for p in celda.paragraphs:
-                    _reemplazar_en_parrafo(p)
+    for p in parrafos_de_tablas(documento.tables):
+        _reemplazar_en_parrafo(p)
 
     # ----------- NUEVO: Reemplazo en encabezados y pies de página -----------
     for section in documento.sections:
@@ -124,28 +160,31 @@ def reemplazar_tags(documento: Document, tags: dict):
         header = section.header
         for p in header.paragraphs:
             _reemplazar_en_parrafo(p)
-        for tabla in header.tables:
-            for fila in tabla.rows:
-                for celda in fila.cells:
-                    for p in celda.paragraphs:
-                        _reemplazar_en_parrafo(p)
+        for p in parrafos_de_tablas(header.tables):
+            _reemplazar_en_parrafo(p)
         # Pie de página (opcional, descomenta si lo necesitas)
         # footer = section.footer
         # for p in footer.paragraphs:
         #     _reemplazar_en_parrafo(p)
-        # for tabla in footer.tables:
-        #     for fila in tabla.rows:
-        #         for celda in fila.cells:
-        #             for p in celda.paragraphs:
-        #                 _reemplazar_en_parrafo(p)
+        # for p in parrafos_de_tablas(footer.tables):
+        #     _reemplazar_en_parrafo(p)
+
+    if desconocidos:
+        print(f"⚠️  Tags sin valor en la hoja TAGS: {', '.join(sorted(desconocidos))}")
 
     return documento
 
 # ----------- FUNCIÓN PARA INSERTAR FOTOS EN EL WORD ------------------
-def insertar_fotos_en_docx(documento, ciudad, fotos_por_ciudad):
+def insertar_fotos_en_docx(documento, ciudad, fotos_por_ciudad, indice=None, motor=MOTOR_DOCX,
+                           carpeta_cache=None):
     """
     Inserta imágenes en el documento Word en los lugares donde hay tags de foto,
     usando el diccionario fotos_por_ciudad[ciudad].
+    Con el índice de marcadores solo se visitan los párrafos de fotos registrados.
+    Con motor='lxml' los párrafos se ubican con XPath en las tablas del cuerpo
+    (o con las rutas del índice, si se entrega).
+    Con carpeta_cache se inserta la versión reducida de cada foto (cache_fotos.py)
+    en lugar del original a resolución completa.
     """
     if ciudad not in fotos_por_ciudad:
         print(f"⚠️  No hay fotos configuradas para la ciudad: {ciudad}")
@@ -167,48 +206,55 @@ def insertar_fotos_en_docx(documento, ciudad, fotos_por_ciudad):
             print(f"   ❌ {foto_tag}: Imagen NO encontrada - {ruta_foto}")
     
     # Buscar SOLO tags específicos de foto en las tablas del documento
-    for tabla in documento.tables:
-        for fila in tabla.rows:
-            for celda in fila.cells:
-                for p in celda.paragraphs:
-                    texto_original = p.text.strip()
-                    
-                    # Solo procesar si encuentra un tag ESPECÍFICO de foto
-                    for i in range(1, 5):
-                        foto_key = f"FOTO{i}"
-                        # Diferentes formatos de tags posibles - SOLO TAGS ESPECÍFICOS
-                        tag_patterns = [
-                            "{FOTO" + str(i) + "}",
-                            "{{FOTO" + str(i) + "}}",
-                            "<<FOTO" + str(i) + ">>",
-                            "{foto" + str(i) + "}",
-                            "{{foto" + str(i) + "}}"
-                        ]
-                        
-                        for tag_pattern in tag_patterns:
-                            # SOLO si el texto ES EXACTAMENTE el tag (o solo contiene el tag)
-                            if (tag_pattern == texto_original.lower() or 
-                                tag_pattern in texto_original.lower()) and fotos_ciudad.get(foto_key):
-                                
-                                tags_procesados += 1
-                                print(f"   🎯 Encontrado tag exacto: '{texto_original}' → procesando como {foto_key}")
-                                
-                                # Limpiar TODO el contenido del párrafo
-                                p.clear()
-                                
-                                # Insertar la imagen si existe
-                                img_path = Path(fotos_ciudad[foto_key])
-                                if img_path.exists():
-                                    # Tamaño prudente para caber en la celda de la tabla
-                                    run = p.add_run()
-                                    run.add_picture(str(img_path), width=Inches(2.0), height=Inches(1.5))
-                                    fotos_encontradas += 1
-                                    print(f"   📷 Imagen {foto_key} insertada correctamente (2.0x1.5 inches)")
-                                else:
-                                    p.add_run("Imagen no encontrada")
-                                    fotos_no_encontradas += 1
-                                    print(f"   ⚠️  Archivo no existe: {img_path}")
-                                break  # Salir del loop de patterns una vez encontrado
+    if motor == MOTOR_LXML and indice is not None:
+        parrafos = [Paragraph(e, documento._body) for e in ubicar_elementos(documento, indice, TIPO_FOTOS)]
+    elif motor == MOTOR_LXML:
+        parrafos = parrafos_de_fotos(documento)
+    elif indice is not None:
+        parrafos = ubicar_parrafos(documento, indice, TIPO_FOTOS)
+    else:
+        parrafos = parrafos_de_tablas(documento.tables)
+    for p in parrafos:
+        texto_original = p.text.strip()
+
+        # Solo procesar si encuentra un tag ESPECÍFICO de foto
+        for i in range(1, 5):
+            foto_key = f"FOTO{i}"
+            # Diferentes formatos de tags posibles - SOLO TAGS ESPECÍFICOS
+            tag_patterns = [
+                "{FOTO" + str(i) + "}",
+                "{{FOTO" + str(i) + "}}",
+                "<<FOTO" + str(i) + ">>",
+                "{foto" + str(i) + "}",
+                "{{foto" + str(i) + "}}"
+            ]
+
+            for tag_pattern in tag_patterns:
+                # SOLO si el texto ES EXACTAMENTE el tag (o solo contiene el tag)
+                if (tag_pattern == texto_original.lower() or 
+                    tag_pattern in texto_original.lower()) and fotos_ciudad.get(foto_key):
+
+                    tags_procesados += 1
+                    print(f"   🎯 Encontrado tag exacto: '{texto_original}' → procesando como {foto_key}")
+
+                    # Limpiar TODO el contenido del párrafo
+                    p.clear()
+
+                    # Insertar la imagen si existe
+                    img_path = Path(fotos_ciudad[foto_key])
+                    if img_path.exists():
+                        # Tamaño prudente para caber en la celda de la tabla
+                        if carpeta_cache is not None:
+                            img_path = foto_para_informe(img_path, carpeta_cache, 2.0, 1.5)
+                        run = p.add_run()
+                        run.add_picture(str(img_path), width=Inches(2.0), height=Inches(1.5))
+                        fotos_encontradas += 1
+                        print(f"   📷 Imagen {foto_key} insertada correctamente (2.0x1.5 inches)")
+                    else:
+                        p.add_run("Imagen no encontrada")
+                        fotos_no_encontradas += 1
+                        print(f"   ⚠️  Archivo no existe: {img_path}")
+                    break  # Salir del loop de patterns una vez encontrado
     
     # SOLO si NO se encontraron tags específicos, informar
     if tags_procesados == 0:
@@ -233,15 +279,12 @@ def fmt(val):
         return val.strftime("%Y-%m-%d")            # cámbialo a "%d/%m/%Y" si prefieres
     return str(val)
 
-# ----------- 4. Recorrer carpetas y procesar informes -------------------------
-procesados, omitidos = 0, 0
-
-print("\n🔎 Iniciando procesamiento de carpetas de aeropuertos...\n")
-
-for carpeta in tqdm(list(ROOT_DIR.iterdir()), desc="Recorriendo aeropuertos"):
-    if not carpeta.is_dir():
-        continue
-
+# ----------- 4. Procesar una carpeta de aeropuerto ---------------------------
+def procesar_carpeta(carpeta, motor, fotos_por_ciudad, carpeta_cache=None):
+    """
+    Genera reporte_<ciudad>.docx a partir de base_<ciudad>.xlsx (hoja TAGS) y la plantilla
+    Word de la carpeta. Retorna True si el informe se generó y False si la carpeta se omitió.
+    """
     ciudad = carpeta.name
     excel_path = carpeta / f"base_{ciudad}.xlsx"
     print(f"\n--- Procesando carpeta: {ciudad} ---")
@@ -250,15 +293,15 @@ for carpeta in tqdm(list(ROOT_DIR.iterdir()), desc="Recorriendo aeropuertos"):
 
     if not excel_path.exists():
         print(f"⚠️  No se encontró '{excel_path.name}'. Carpeta omitida.")
-        omitidos += 1
-        continue
+        return False
 
-    plantillas = list(carpeta.glob("*.docx"))
+    # La plantilla es el .docx de la carpeta que no es un informe ya generado ni un temporal de Word
+    plantillas = sorted(p for p in carpeta.glob("*.docx")
+                        if not p.name.startswith(("reporte_", "~$")))
     print(f"📑 Buscando plantilla Word en carpeta...")
     if not plantillas:
         print(f"⚠️  Sin plantilla Word (.docx) en carpeta. Carpeta omitida.")
-        omitidos += 1
-        continue
+        return False
     plantilla_path = plantillas[0]
     print(f"✅  Plantilla encontrada: {plantilla_path.name}")
 
@@ -268,14 +311,12 @@ for carpeta in tqdm(list(ROOT_DIR.iterdir()), desc="Recorriendo aeropuertos"):
         print(f"✅  Hoja 'TAGS' leída correctamente.")
     except Exception as e:
         print(f"❌  Error leyendo hoja 'TAGS': {e}")
-        omitidos += 1
-        continue
+        return False
 
     df_tags.columns = df_tags.columns.str.strip().str.upper()
     if {"ETIQUETA", "VALOR"} - set(df_tags.columns):
         print(f"❌  La hoja 'TAGS' no tiene columnas 'ETIQUETA' y 'VALOR'. Carpeta omitida.")
-        omitidos += 1
-        continue
+        return False
 
     tags_dict = {
         k.strip().lower(): fmt(v)
@@ -284,22 +325,77 @@ for carpeta in tqdm(list(ROOT_DIR.iterdir()), desc="Recorriendo aeropuertos"):
 
     print(f"📝 Reemplazando tags en plantilla Word...")
     try:
+        # Un mismo índice de marcadores sirve a los dos renderizadores
+        indice = cargar_indice_marcadores(plantilla_path)
         doc = Document(plantilla_path)
-        doc = reemplazar_tags(doc, tags_dict)
+        doc = reemplazar_tags(doc, tags_dict, indice, motor)
         print(f"✅  Tags reemplazados correctamente.")
 
         print(f"🖼️ Insertando fotos en el documento Word...")
-        doc = insertar_fotos_en_docx(doc, ciudad, fotos_por_ciudad_septiembre)
+        doc = insertar_fotos_en_docx(doc, ciudad, fotos_por_ciudad, indice, motor, carpeta_cache)
         salida_path = carpeta / f"reporte_{carpeta.name}.docx"
         doc.save(salida_path)
         print(f"✅  Documento generado: {salida_path.name}")
-        procesados += 1
+        return True
     except Exception as e:
         print(f"❌  Error al generar reporte: {e}")
-        omitidos += 1
+        return False
+
+def _procesar_carpeta_con_log(args):
+    """Ejecuta procesar_carpeta capturando su salida (usado por los procesos del pool)"""
+    buffer_log = io.StringIO()
+    with contextlib.redirect_stdout(buffer_log):
+        try:
+            generado = procesar_carpeta(*args)
+        except Exception as e:
+            print(f"❌  Error inesperado en la carpeta '{args[0].name}': {e}")
+            generado = False
+    return generado, buffer_log.getvalue()
+
+# ----------- 5. Recorrer carpetas y resumen -----------------------------------
+def generar_informes(root_dir=ROOT_DIR, workers=1, motor=None, fotos_por_ciudad=None,
+                     carpeta_cache=CACHE_FOTOS_DIR):
+    """
+    Genera los informes de todas las carpetas de aeropuerto de root_dir.
+    Con workers > 1 las carpetas se renderizan en procesos en paralelo; la salida de
+    cada carpeta se imprime completa y en el orden de las carpetas.
+    Retorna (informes generados, carpetas omitidas).
+    """
+    motor = resolver_motor(motor)
+    if fotos_por_ciudad is None:
+        fotos_por_ciudad = fotos_por_ciudad_septiembre
+
+    print("\n🔎 Iniciando procesamiento de carpetas de aeropuertos...\n")
+    print(f"🧩 Renderizador de plantillas: {motor}")
+
+    carpetas = [carpeta for carpeta in Path(root_dir).iterdir()
+                if carpeta.is_dir() and not carpeta.name.startswith(".")]
+    pendientes = [(carpeta, motor, fotos_por_ciudad, carpeta_cache) for carpeta in carpetas]
+
+    procesados, omitidos = 0, 0
+    if workers > 1 and len(pendientes) > 1:
+        print(f"⚙️ Procesando {len(pendientes)} carpetas con {workers} procesos en paralelo")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pendientes))) as pool:
+            resultados = pool.map(_procesar_carpeta_con_log, pendientes)
+            for generado, log in tqdm(resultados, total=len(pendientes), desc="Recorriendo aeropuertos"):
+                print(log, end="")
+                procesados += generado
+                omitidos += not generado
+    else:
+        for args in tqdm(pendientes, desc="Recorriendo aeropuertos"):
+            generado = procesar_carpeta(*args)
+            procesados += generado
+            omitidos += not generado
+
+    print("\n==================== RESUMEN FINAL ====================")
+    print(f"🏁 Informes generados: {procesados}")
+    print(f"🚫 Carpetas omitidas: {omitidos}")
+    print("=======================================================\n")
+    return procesados, omitidos
+
+if __name__ == "__main__":
+    # Número de procesos y renderizador opcionales: python Correspondencia.py 4 lxml
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    motor = sys.argv[2] if len(sys.argv) > 2 else None
 
-# ----------- 5. Resumen -------------------------------------------------------
-print("\n==================== RESUMEN FINAL ====================")
-print(f"🏁 Informes generados: {procesados}")
-print(f"🚫 Carpetas omitidas: {omitidos}")
-print("=======================================================\n")
\ No newline at end of file
+    generar_informes(ROOT_DIR, workers=workers, motor=motor)
@@ -0,0 +1,163 @@
+# ============================================================
+# Índice de marcadores de las plantillas Word (Paso 3)
+# ============================================================
+#
+# Cada plantilla se recorre completa UNA vez: se registran las rutas XML
+# (XPath posicional de lxml, p.ej. /w:document/w:body/w:tbl[2]/w:tr[3]/w:tc[1]/w:p[2])
+# de los párrafos que contienen marcadores de tags ({tag}, {{tag}}, <<tag>>) y
+# de fotos ({FOTO1}...), por parte del paquete, para cada renderizador:
+#   'partes'      recorrido de python-docx (documento y encabezados)
+#   'partes_xml'  candidatos XPath del renderizador lxml (documento, encabezados
+#                 y pies, incluidas tablas anidadas; ver renderizador_docx.py)
+# El índice se guarda junto a la plantilla (.<plantilla>.marcadores.json) con
+# la huella SHA-256 del archivo; si la plantilla cambia, se vuelve a analizar.
+#
+# Al generar el informe solo se visitan esos párrafos, sin recorrer el cuerpo,
+# todas las celdas de todas las tablas ni los encabezados.
+
+import os
+import re
+
+from docx import Document
+from docx.text.paragraph import Paragraph
+
+from huellas import huella_archivo, cargar_registro, guardar_registro
+from renderizador_docx import partes_rellenables, parrafos_de_parte, parrafos_de_fotos
+
+VERSION_ANALIZADOR = 2
+
+# Marcador genérico {{tag}}, {tag} o <<tag>>: captura el nombre del tag
+PATRON_MARCADOR = re.compile(r"\{\{\s*([^{}<>]+?)\s*\}\}|\{\s*([^{}<>]+?)\s*\}|<<\s*([^{}<>]+?)\s*>>")
+# Marcadores de fotos ({foto1}, {{FOTO2}}...), sin distinguir mayúsculas
+PATRON_FOTO = re.compile(r"\{foto\d+\}", re.IGNORECASE)
+
+TIPO_TAGS = "tags"
+TIPO_FOTOS = "fotos"
+
+def ruta_indice(ruta_plantilla):
+    """Índice oculto junto a la plantilla: .<nombre>.marcadores.json"""
+    carpeta, nombre = os.path.split(os.path.abspath(ruta_plantilla))
+    return os.path.join(carpeta, f".{nombre}.marcadores.json")
+
+def parrafos_de_tablas(tablas):
+    """Párrafos de las celdas de las tablas; las celdas combinadas se recorren una sola vez"""
+    vistas = set()  # guarda los elementos <w:tc> (no su id: los proxies de lxml se reciclan)
+    for tabla in tablas:
+        for fila in tabla.rows:
+            for celda in fila.cells:
+                if celda._tc in vistas:
+                    continue
+                vistas.add(celda._tc)
+                yield from celda.paragraphs
+
+def _contenedores(documento):
+    """
+    (contenedor, párrafos con tags, párrafos con fotos) de cada parte que se rellena:
+    cuerpo del documento y encabezado de cada sección (mismo recorrido que el Paso 3)
+    """
+    cuerpo = documento._body
+    yield (cuerpo,
+           lambda: list(documento.paragraphs) + list(parrafos_de_tablas(documento.tables)),
+           lambda: list(parrafos_de_tablas(documento.tables)))
+    for section in documento.sections:
+        header = section.header
+        yield (header,
+               lambda h=header: list(h.paragraphs) + list(parrafos_de_tablas(h.tables)),
+               lambda: [])
+
+def _texto(parrafo):
+    return "".join(run.text for run in parrafo.runs)
+
+def analizar_documento(documento):
+    """
+    Rutas XML de los párrafos con marcadores, por parte:
+    {partname: {'tags': [ruta, ...], 'fotos': [ruta, ...]}}
+    """
+    partes = {}
+    for contenedor, parrafos_tags, parrafos_fotos in _contenedores(documento):
+        nombre_parte = str(contenedor.part.partname)
+        arbol = contenedor.part.element.getroottree()
+        rutas = partes.setdefault(nombre_parte, {TIPO_TAGS: [], TIPO_FOTOS: []})
+        for tipo, parrafos, patron in ((TIPO_TAGS, parrafos_tags, PATRON_MARCADOR),
+                                       (TIPO_FOTOS, parrafos_fotos, PATRON_FOTO)):
+            for parrafo in parrafos():
+                texto = _texto(parrafo)
+                if ("{" in texto or "<<" in texto) and patron.search(texto):
+                    ruta = arbol.getpath(parrafo._p)
+                    if ruta not in rutas[tipo]:
+                        rutas[tipo].append(ruta)
+    return partes
+
+def analizar_partes_xml(documento):
+    """
+    Rutas XML de los párrafos con marcadores tal como los ubica el renderizador lxml:
+    {partname: {'tags': [ruta, ...], 'fotos': [ruta, ...]}}
+    """
+    partes = {}
+    for parte in partes_rellenables(documento):
+        arbol = parte.element.getroottree()
+        partes[str(parte.partname)] = {
+            TIPO_TAGS: [arbol.getpath(p) for p in parrafos_de_parte(parte)
+                        if PATRON_MARCADOR.search("".join(r.text for r in p.r_lst))],
+            TIPO_FOTOS: [],
+        }
+    arbol = documento.element.getroottree()
+    partes[str(documento.part.partname)][TIPO_FOTOS] = [
+        arbol.getpath(p._p) for p in parrafos_de_fotos(documento) if PATRON_FOTO.search(p.text)]
+    return partes
+
+def cargar_indice_marcadores(ruta_plantilla):
+    """
+    Índice de marcadores de la plantilla: desde .<plantilla>.marcadores.json si la
+    huella coincide (mtime/tamaño o SHA-256), si no analizando la plantilla y guardándolo.
+    Retorna {'version', 'huella', 'partes', 'partes_xml'}.
+    """
+    ruta_json = ruta_indice(ruta_plantilla)
+    previo = cargar_registro(ruta_json, 'partes')
+    huella = huella_archivo(ruta_plantilla, previo.get('huella'))
+    vigente = (previo.get('version') == VERSION_ANALIZADOR and previo.get('partes')
+               and previo.get('huella', {}).get('sha256') == huella['sha256'])
+    if vigente and previo['huella'] == huella:
+        return previo
+
+    if vigente:
+        # Mismo contenido con otro mtime (copia de la plantilla): solo se actualiza la huella
+        indice = dict(previo, huella=huella)
+    else:
+        documento = Document(ruta_plantilla)
+        indice = {'version': VERSION_ANALIZADOR, 'huella': huella,
+                  'partes': analizar_documento(documento),
+                  'partes_xml': analizar_partes_xml(documento)}
+    try:
+        guardar_registro(ruta_json, indice)
+    except OSError as e:
+        print(f"⚠️ ADVERTENCIA: No se pudo guardar el índice de marcadores: {e}")
+    return indice
+
+def ubicar_parrafos(documento, indice, tipo):
+    """
+    Párrafos del documento (abierto desde la misma plantilla) registrados en el índice
+    para el tipo dado (TIPO_TAGS o TIPO_FOTOS), en el orden del análisis
+    """
+    parrafos = []
+    vistas = set()  # un encabezado compartido por varias secciones se atiende una vez
+    for contenedor, _, _ in _contenedores(documento):
+        nombre_parte = str(contenedor.part.partname)
+        if nombre_parte in vistas:
+            continue
+        vistas.add(nombre_parte)
+        for ruta in indice['partes'].get(nombre_parte, {}).get(tipo, []):
+            for elemento in contenedor.part.element.xpath(ruta):
+                parrafos.append(Paragraph(elemento, contenedor))
+    return parrafos
+
+def ubicar_elementos(documento, indice, tipo):
+    """
+    Elementos <w:p> (CT_P) del documento registrados en el índice para el renderizador
+    lxml y el tipo dado, en el orden de partes_rellenables
+    """
+    elementos = []
+    for parte in partes_rellenables(documento):
+        for ruta in indice['partes_xml'].get(str(parte.partname), {}).get(tipo, []):
+            elementos.extend(parte.element.xpath(ruta))
+    return elementos
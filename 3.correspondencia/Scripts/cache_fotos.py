@@ -0,0 +1,79 @@
+# ============================================================
+# Caché de fotos reducidas para los informes (Paso 3)
+# ============================================================
+#
+# Las fotos de muestreo llegan a resolución completa de celular (varios MB) y
+# en el informe se muestran en una celda de 2.0 x 1.5 pulgadas. Antes de
+# insertarlas se preparan con Pillow:
+#   - orientación EXIF aplicada a los píxeles (ImageOps.exif_transpose)
+#   - reducción a la resolución de impresión del recuadro (DPI_FOTOS), sin
+#     deformar: el lado más ajustado queda justo en el tamaño del recuadro
+#   - recompresión JPEG (CALIDAD_JPEG)
+# La versión reducida se guarda en la carpeta de caché con un nombre derivado
+# de la ruta de origen, su mtime y tamaño, y el tamaño destino: una foto que
+# no cambió se reutiliza en las siguientes ejecuciones sin volver a procesarla.
+
+import os
+import hashlib
+
+from PIL import Image, ImageOps
+
+VERSION_CACHE = 1
+
+DPI_FOTOS = 220
+CALIDAD_JPEG = 85
+ANCHO_FOTO_PULGADAS = 2.0
+ALTO_FOTO_PULGADAS = 1.5
+
+def tamano_destino(ancho_pulgadas=ANCHO_FOTO_PULGADAS, alto_pulgadas=ALTO_FOTO_PULGADAS, dpi=DPI_FOTOS):
+    """Tamaño en píxeles del recuadro de la foto a la resolución de impresión"""
+    return round(ancho_pulgadas * dpi), round(alto_pulgadas * dpi)
+
+def clave_foto(ruta, destino, calidad=CALIDAD_JPEG):
+    """Nombre en caché: SHA-256 de ruta absoluta, mtime, tamaño del archivo y tamaño destino"""
+    st = os.stat(ruta)
+    datos = f"{VERSION_CACHE}|{os.path.abspath(ruta)}|{st.st_mtime_ns}|{st.st_size}|{destino[0]}x{destino[1]}|{calidad}"
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest() + ".jpg"
+
+def reducir_foto(ruta, destino):
+    """Abre la foto, aplica la orientación EXIF y la reduce para cubrir el tamaño destino (píxeles)"""
+    ancho, alto = destino
+    with Image.open(ruta) as imagen:
+        # JPEG: decodificar directamente a 1/2, 1/4 u 1/8 si alcanza (el recuadro puede rotar)
+        lado = max(ancho, alto)
+        imagen.draft('RGB', (lado, lado))
+        imagen = ImageOps.exif_transpose(imagen)
+        escala = max(ancho / imagen.width, alto / imagen.height)
+        if escala < 1:
+            nuevo = (max(1, round(imagen.width * escala)), max(1, round(imagen.height * escala)))
+            imagen = imagen.resize(nuevo, Image.LANCZOS)
+        if imagen.mode in ('RGBA', 'LA', 'P'):
+            # Transparencias sobre fondo blanco (JPEG no tiene canal alfa)
+            imagen = imagen.convert('RGBA')
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            imagen = fondo
+        elif imagen.mode != 'RGB':
+            imagen = imagen.convert('RGB')
+        return imagen
+
+def foto_para_informe(ruta, carpeta_cache, ancho_pulgadas=ANCHO_FOTO_PULGADAS,
+                      alto_pulgadas=ALTO_FOTO_PULGADAS, dpi=DPI_FOTOS, calidad=CALIDAD_JPEG):
+    """
+    Ruta de la versión reducida de la foto en carpeta_cache (se crea si no existe).
+    Si la foto no se puede procesar se retorna la ruta original.
+    """
+    destino = tamano_destino(ancho_pulgadas, alto_pulgadas, dpi)
+    try:
+        ruta_cache = os.path.join(carpeta_cache, clave_foto(ruta, destino, calidad))
+        if os.path.exists(ruta_cache):
+            return ruta_cache
+        imagen = reducir_foto(ruta, destino)
+        os.makedirs(carpeta_cache, exist_ok=True)
+        ruta_tmp = f"{ruta_cache}.{os.getpid()}.tmp"
+        imagen.save(ruta_tmp, format='JPEG', quality=calidad, optimize=True, dpi=(dpi, dpi))
+        os.replace(ruta_tmp, ruta_cache)
+        return ruta_cache
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"   ⚠️  No se pudo reducir {os.path.basename(str(ruta))}, se inserta la original: {e}")
+        return str(ruta)
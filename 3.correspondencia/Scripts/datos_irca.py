@@ -0,0 +1,266 @@
+# ============================================================
+# Datos IRCA(%).csv tipados y en caché
+# ============================================================
+#
+# El CSV (Fecha dd/mm/YYYY; IRCA "15,00%") se interpreta UNA vez por versión
+# del archivo y queda en memoria del proceso, indexado por (mtime_ns, tamaño).
+# Opcionalmente se guarda una instantánea Feather junto al CSV para que un
+# proceso nuevo no vuelva a parsear fechas ni porcentajes.
+#
+# Lectura con el lector CSV de pyarrow: solo las columnas conocidas, tipos
+# explícitos y conversión de fechas en Arrow. IRCA (%) se interpreta siempre
+# con parseo_numerico (el mismo parser para CSV, caché y lectura por bloques).
+# Para históricos de varios años, leer_csv_irca(mes=..., año=...) lee por
+# bloques y descarta en cada bloque las filas de otros periodos, sin
+# materializar el archivo entero; la escala 0-1/0-100 se decide igual con la
+# evidencia de todos los bloques.
+#
+# Columnas del DataFrame resultante:
+#   Fecha              datetime64 (día/mes/año; NaT si no se puede interpretar)
+#   Año                Int64 (año de Fecha)
+#   Mes                category
+#   Mes_num            Int64 (1-12, ordinal de la columna Mes)
+#   Codigo             str
+#   Ciudad             category
+#   Punto de Muestreo  str
+#   IRCA (%)           float en escala 0-100 (NaN si no se puede interpretar); la
+#                      escala se decide para toda la columna (ver parseo_numerico.py)
+#   IRCA calificador   int8, parseo_numerico.CALIFICADOR_* del valor original
+#                      (valor, sin dato, inválido...)
+
+import os
+import json
+
+import pandas as pd
+
+from parseo_numerico import interpretar_porcentajes, evidencia_escala, escala_de_evidencia
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:  # sin pyarrow: lectura con pandas y solo caché en memoria
+    pa = None
+
+VERSION_DATOS = 4
+
+COLUMNAS_IRCA = ['Fecha', 'Mes', 'Codigo', 'Ciudad', 'Punto de Muestreo', 'IRCA (%)']
+COLUMNAS_CATEGORICAS = ['Mes', 'Ciudad']
+COLUMNAS_TEXTO = ['Fecha', 'Codigo', 'Punto de Muestreo', 'IRCA (%)']
+COLUMNA_CALIFICADOR_IRCA = 'IRCA calificador'
+
+# Tamaño de bloque del lector por bloques (bytes de CSV por lote)
+TAMAÑO_BLOQUE = 1 << 20
+
+CLAVE_METADATOS = b"datos_irca"
+
+MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+MES_A_NUMERO = {mes: i for i, mes in enumerate(MESES, 1)}
+
+# Datos ya cargados en este proceso: ruta CSV → (firma, DataFrame)
+_datos_en_memoria = {}
+
+def ruta_instantanea(ruta_csv):
+    """Instantánea Feather junto al CSV (oculta): Datos/.IRCA(%).feather"""
+    carpeta, nombre = os.path.split(os.path.abspath(ruta_csv))
+    return os.path.join(carpeta, "." + os.path.splitext(nombre)[0] + ".feather")
+
+def firma_archivo(ruta):
+    estado = os.stat(ruta)
+    return {'version': VERSION_DATOS, 'mtime_ns': estado.st_mtime_ns, 'tamaño': estado.st_size}
+
+def convertir_porcentajes(valores, escala=None):
+    """
+    '15,00%' / '0,15' / '15' → DataFrame con valor (float 0-100, NaN si no es numérico)
+    y calificador (CALIFICADOR_*). Una columna ya numérica se considera convertida y no
+    se vuelve a escalar. escala: factor decidido con todo el archivo (lectura por bloques).
+    """
+    if pd.api.types.is_numeric_dtype(valores):
+        escala = 1.0
+    return interpretar_porcentajes(valores, escala)
+
+def con_porcentajes(df):
+    """
+    Copia de df con IRCA (%) interpretado (texto o fracciones 0-1 de celdas de Excel con
+    formato porcentaje, escala decidida con la columna) y su COLUMNA_CALIFICADOR_IRCA
+    """
+    porcentajes = interpretar_porcentajes(df['IRCA (%)'])
+    return df.assign(**{'IRCA (%)': porcentajes['valor'], COLUMNA_CALIFICADOR_IRCA: porcentajes['calificador']})
+
+def tipar_irca(df, escala=None):
+    """
+    Agrega/convierte las columnas tipadas (Fecha, Año, Mes_num, IRCA (%), IRCA calificador)
+    del DataFrame crudo. escala: ver convertir_porcentajes.
+    """
+    df = df.copy()
+    if 'Fecha' in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df['Fecha']):
+            df['Fecha'] = pd.to_datetime(df['Fecha'], format='%d/%m/%Y', errors='coerce')
+        df['Año'] = df['Fecha'].dt.year.astype('Int64')
+    if 'Mes' in df.columns:
+        df['Mes_num'] = df['Mes'].astype(object).map(MES_A_NUMERO).astype('Int64')
+    if 'IRCA (%)' in df.columns:
+        porcentajes = convertir_porcentajes(df['IRCA (%)'], escala)
+        df['IRCA (%)'] = porcentajes['valor']
+        df[COLUMNA_CALIFICADOR_IRCA] = porcentajes['calificador']
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            # Categorías en orden alfabético (Arrow las entrega en orden de aparición)
+            categorias = df[columna].astype('category')
+            df[columna] = categorias.cat.reorder_categories(sorted(categorias.cat.categories))
+    return df
+
+def _convertir_fechas(lote):
+    """Fecha dd/mm/YYYY → timestamp dentro de Arrow (fechas inválidas → nulo)"""
+    fechas = pc.strptime(lote['Fecha'], format='%d/%m/%Y', unit='s', error_is_null=True)
+    return lote.set_column(lote.schema.get_field_index('Fecha'), 'Fecha', fechas)
+
+def _opciones_arrow(tamaño_bloque=None):
+    tipos = {c: pa.string() for c in COLUMNAS_TEXTO}
+    tipos.update({c: pa.dictionary(pa.int32(), pa.string()) for c in COLUMNAS_CATEGORICAS})
+    return dict(
+        read_options=pa_csv.ReadOptions(block_size=tamaño_bloque) if tamaño_bloque else None,
+        parse_options=pa_csv.ParseOptions(delimiter=';'),
+        convert_options=pa_csv.ConvertOptions(include_columns=COLUMNAS_IRCA, column_types=tipos),
+    )
+
+def _mascara_periodo(lote, mes, año):
+    mascara = None
+    if mes:
+        mascara = pc.equal(lote['Mes'], mes)
+    if año:
+        del_año = pc.equal(pc.year(lote['Fecha']), int(año))
+        mascara = del_año if mascara is None else pc.and_(mascara, del_año)
+    return pc.fill_null(mascara, False)
+
+def _leer_arrow(ruta_csv, mes, año, tamaño_bloque):
+    """
+    Lectura con Arrow; IRCA (%) queda en texto. Retorna (DataFrame, escala de IRCA):
+    la escala es None sin filtro (se decide con la columna completa al tipar)
+    """
+    if not (mes or año):
+        return _convertir_fechas(pa_csv.read_csv(ruta_csv, **_opciones_arrow())).to_pandas(), None
+    lotes = []
+    evidencia = (False, False)
+    with pa_csv.open_csv(ruta_csv, **_opciones_arrow(tamaño_bloque)) as lector:
+        for lote in lector:
+            lote = _convertir_fechas(pa.Table.from_batches([lote]))
+            # La escala de IRCA se decide con todos los bloques, no solo con los del periodo
+            evidencia = evidencia_escala(lote.column('IRCA (%)').to_pandas(), evidencia)
+            lotes.append(lote.filter(_mascara_periodo(lote, mes, año)))
+    if not lotes:
+        return pd.DataFrame(columns=COLUMNAS_IRCA), None
+    return pa.concat_tables(lotes).to_pandas(), escala_de_evidencia(evidencia)
+
+def _leer_pandas(ruta_csv, mes, año, tamaño_bloque):
+    """Misma lectura sin pyarrow (usecols + dtype; por bloques de filas si hay filtro)"""
+    opciones = dict(sep=';', encoding='utf-8-sig', usecols=COLUMNAS_IRCA,
+                    dtype={c: str for c in COLUMNAS_TEXTO})
+    if not (mes or año):
+        return pd.read_csv(ruta_csv, **opciones), None
+    bloques = []
+    evidencia = (False, False)
+    for bloque in pd.read_csv(ruta_csv, chunksize=max(1, (tamaño_bloque or TAMAÑO_BLOQUE) // 100), **opciones):
+        # Se filtra por Fecha/Mes; IRCA queda en texto y su escala se decide con todos los bloques
+        evidencia = evidencia_escala(bloque['IRCA (%)'], evidencia)
+        periodo = filtrar_periodo(tipar_irca(bloque[['Fecha', 'Mes']]), mes, año)
+        bloques.append(bloque.loc[periodo.index])
+    if not bloques:
+        return pd.DataFrame(columns=COLUMNAS_IRCA), None
+    return pd.concat(bloques, ignore_index=True), escala_de_evidencia(evidencia)
+
+def leer_csv_irca(ruta_csv, mes=None, año=None, tamaño_bloque=TAMAÑO_BLOQUE):
+    """
+    Lee y tipa el CSV (separador ';', con o sin BOM).
+    Con mes (nombre, p.ej. 'Julio') y/o año se lee por bloques y solo se
+    conservan las filas de ese periodo.
+    """
+    if pa is not None:
+        df, escala = _leer_arrow(ruta_csv, mes, año, tamaño_bloque)
+    else:
+        df, escala = _leer_pandas(ruta_csv, mes, año, tamaño_bloque)
+    df = tipar_irca(df, escala).reset_index(drop=True)
+    # Sin filtro adicional: solo quita categorías (ciudades/meses) de otros periodos
+    return filtrar_periodo(df) if (mes or año) else df
+
+def _leer_instantanea(ruta, firma):
+    if pa is None or not os.path.exists(ruta):
+        return None
+    try:
+        tabla = feather.read_table(ruta)
+        metadatos = (tabla.schema.metadata or {}).get(CLAVE_METADATOS)
+        if metadatos is None or json.loads(metadatos) != firma:
+            return None
+        return tabla.to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+def _guardar_instantanea(ruta, firma, df):
+    if pa is None:
+        return
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[CLAVE_METADATOS] = json.dumps(firma).encode('utf-8')
+        ruta_tmp = ruta + ".tmp"
+        feather.write_feather(tabla.replace_schema_metadata(metadatos), ruta_tmp)
+        os.replace(ruta_tmp, ruta)
+    except (OSError, ValueError, pa.ArrowException) as e:
+        print(f"⚠️ ADVERTENCIA: No se pudo guardar la instantánea IRCA: {e}")
+
+def cargar_datos_irca(ruta_csv, instantanea=True):
+    """
+    Retorna el DataFrame tipado del CSV IRCA, en este orden:
+    memoria del proceso → instantánea Feather → lectura del CSV.
+    Ambos cachés se descartan si cambió el mtime o el tamaño del CSV.
+    El DataFrame es compartido: quien lo modifique debe trabajar sobre una copia.
+    """
+    ruta_csv = os.path.abspath(ruta_csv)
+    firma = firma_archivo(ruta_csv)
+
+    en_memoria = _datos_en_memoria.get(ruta_csv)
+    if en_memoria is not None and en_memoria[0] == firma:
+        return en_memoria[1]
+
+    ruta_feather = ruta_instantanea(ruta_csv) if instantanea else None
+    df = _leer_instantanea(ruta_feather, firma) if ruta_feather else None
+    if df is None:
+        df = leer_csv_irca(ruta_csv)
+        if ruta_feather:
+            _guardar_instantanea(ruta_feather, firma, df)
+
+    _datos_en_memoria[ruta_csv] = (firma, df)
+    return df
+
+def cargar_periodo(ruta_csv, mes=None, año=None):
+    """
+    Filas del periodo: desde la caché si el CSV completo ya está cargado y vigente,
+    si no con lectura por bloques (sin cargar ni guardar en caché el histórico completo)
+    """
+    ruta_csv = os.path.abspath(ruta_csv)
+    en_memoria = _datos_en_memoria.get(ruta_csv)
+    if en_memoria is not None and en_memoria[0] == firma_archivo(ruta_csv):
+        return filtrar_periodo(en_memoria[1], mes, año)
+    return leer_csv_irca(ruta_csv, mes=mes, año=año)
+
+def filtrar_periodo(df, mes=None, año=None):
+    """Filas del mes (nombre, p.ej. 'Julio') y/o año indicados, sin categorías vacías"""
+    mascara = pd.Series(True, index=df.index)
+    if mes:
+        mascara &= (df['Mes'] == mes).fillna(False).astype(bool)
+    if año:
+        mascara &= (df['Año'] == int(año)).fillna(False).astype(bool)
+    filtrado = df[mascara]
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in filtrado.columns and isinstance(filtrado[columna].dtype, pd.CategoricalDtype):
+            filtrado = filtrado.assign(**{columna: filtrado[columna].cat.remove_unused_categories()})
+    return filtrado
+
+def meses_disponibles(df):
+    """Pares (mes, año) presentes, del más reciente al más antiguo"""
+    pares = df[['Mes', 'Año', 'Mes_num']].dropna(subset=['Mes', 'Año']).drop_duplicates(subset=['Mes', 'Año'])
+    pares = pares.assign(orden=pares['Mes_num'].fillna(99)).sort_values(['Año', 'orden'], ascending=False)
+    return [{'mes': mes, 'año': int(año), 'display': f"{mes} {int(año)}"}
+            for mes, año in zip(pares['Mes'], pares['Año'])]
@@ -0,0 +1,300 @@
+# ============================================================
+# Escritura de libros Excel generados (base_<ciudad>.xlsx)
+# ============================================================
+#
+# Motor seleccionable:
+#   - "xlsxwriter": modo constant_memory, fila por fila; memoria acotada y
+#     formatos declarados una sola vez por libro
+#   - "openpyxl":   libro en modo write_only, fila por fila
+# Ambos producen hojas con el mismo encabezado y los mismos valores, por lo
+# que los pasos siguientes las leen igual con pd.read_excel.
+#
+# El estilo se declara una vez por libro (registro ESTILOS_HOJAS) y se asigna
+# a cada celda al escribirla: formatos de xlsxwriter, o NamedStyle registrado
+# en el libro de openpyxl. Nunca se recorren las celdas después.
+
+import os
+import re
+import zipfile
+import datetime
+import shutil
+import posixpath
+import tempfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle
+
+try:
+    import xlsxwriter
+except ImportError:  # el motor openpyxl sigue disponible
+    xlsxwriter = None
+
+MOTOR_OPENPYXL = "openpyxl"
+MOTOR_XLSXWRITER = "xlsxwriter"
+MOTORES = (MOTOR_OPENPYXL, MOTOR_XLSXWRITER)
+MOTOR_POR_DEFECTO = MOTOR_XLSXWRITER if xlsxwriter is not None else MOTOR_OPENPYXL
+
+# Estilos con nombre (fuente) disponibles para las hojas generadas
+ESTILO_VERDANA_6 = {'nombre': 'Verdana 6', 'font_name': 'Verdana', 'font_size': 6}
+
+# Registro de hojas que llevan estilo; las hojas que no aparecen se escriben sin estilo
+ESTILOS_HOJAS = {
+    'TAGS': ESTILO_VERDANA_6,
+    'TABLA_4': ESTILO_VERDANA_6,
+}
+
+FORMATO_FECHA = 'yyyy-mm-dd hh:mm:ss'
+
+def resolver_motor(motor=None):
+    """Valida el motor pedido; si xlsxwriter no está instalado se usa openpyxl"""
+    motor = motor or MOTOR_POR_DEFECTO
+    if motor not in MOTORES:
+        raise ValueError(f"Motor Excel no soportado: {motor} (opciones: {', '.join(MOTORES)})")
+    if motor == MOTOR_XLSXWRITER and xlsxwriter is None:
+        print("⚠️ ADVERTENCIA: xlsxwriter no está instalado, se usará openpyxl")
+        return MOTOR_OPENPYXL
+    return motor
+
+def _valor_xlsx(valor):
+    """Convierte un valor de pandas/NumPy al tipo nativo que acepta xlsxwriter (None = celda vacía)"""
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, float):
+        return None if np.isnan(valor) else valor
+    if isinstance(valor, (np.integer, np.floating)):
+        valor = valor.item()
+        return None if isinstance(valor, float) and np.isnan(valor) else valor
+    if isinstance(valor, np.bool_):
+        return bool(valor)
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if valor is pd.NA:
+        return None
+    return valor
+
+def _escribir_xlsxwriter(ruta_excel, hojas, estilos):
+    libro = xlsxwriter.Workbook(str(ruta_excel), {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'strings_to_numbers': False,
+    })
+    formatos_por_estilo = {}
+
+    def formatos_de(estilo):
+        # Cada estilo se declara una sola vez por libro, aunque lo usen varias hojas
+        clave = estilo['nombre'] if estilo else None
+        if clave not in formatos_por_estilo:
+            fuente = {'font_name': estilo['font_name'], 'font_size': estilo['font_size']} if estilo else {}
+            formatos_por_estilo[clave] = {
+                # Encabezado plano como el de pd.ExcelWriter, con la fuente de la hoja
+                'celda': libro.add_format(fuente) if fuente else None,
+                'fecha': libro.add_format(dict(fuente, num_format=FORMATO_FECHA)),
+            }
+        return formatos_por_estilo[clave]
+
+    try:
+        for nombre, df in hojas.items():
+            formatos = formatos_de(estilos.get(nombre))
+
+            hoja = libro.add_worksheet(nombre)
+            hoja.write_row(0, 0, [str(c) for c in df.columns], formatos['celda'])
+
+            # constant_memory exige escribir fila por fila, en orden
+            for i, fila in enumerate(df.itertuples(index=False, name=None), start=1):
+                for j, valor in enumerate(fila):
+                    valor = _valor_xlsx(valor)
+                    if valor is None:
+                        if formatos['celda'] is not None:
+                            hoja.write_blank(i, j, None, formatos['celda'])
+                    elif isinstance(valor, (datetime.datetime, datetime.date)):
+                        hoja.write_datetime(i, j, valor, formatos['fecha'])
+                    else:
+                        hoja.write(i, j, valor, formatos['celda'])
+    finally:
+        libro.close()
+
+def _escribir_openpyxl(ruta_excel, hojas, estilos):
+    libro = Workbook(write_only=True)
+    estilos_por_nombre = {}
+
+    def estilos_de(estilo):
+        # Cada NamedStyle se registra una sola vez por libro, aunque lo usen varias hojas
+        if not estilo:
+            return None, None
+        clave = estilo['nombre']
+        if clave not in estilos_por_nombre:
+            fuente = Font(name=estilo['font_name'], size=estilo['font_size'])
+            celda = NamedStyle(name=clave, font=fuente)
+            fecha = NamedStyle(name=f"{clave} fecha", font=fuente, number_format=FORMATO_FECHA)
+            libro.add_named_style(celda)
+            libro.add_named_style(fecha)
+            estilos_por_nombre[clave] = (celda.name, fecha.name)
+        return estilos_por_nombre[clave]
+
+    def celda(hoja, valor, estilo):
+        c = WriteOnlyCell(hoja, value=valor)
+        c.style = estilo
+        return c
+
+    for nombre, df in hojas.items():
+        estilo_celda, estilo_fecha = estilos_de(estilos.get(nombre))
+        hoja = libro.create_sheet(nombre)
+        encabezado = [str(c) for c in df.columns]
+
+        if estilo_celda is None:
+            hoja.append(encabezado)
+            for fila in df.itertuples(index=False, name=None):
+                hoja.append([_valor_xlsx(v) for v in fila])
+            continue
+
+        hoja.append([celda(hoja, v, estilo_celda) for v in encabezado])
+        for fila in df.itertuples(index=False, name=None):
+            celdas = []
+            for valor in fila:
+                valor = _valor_xlsx(valor)
+                fecha = isinstance(valor, (datetime.datetime, datetime.date))
+                celdas.append(celda(hoja, valor, estilo_fecha if fecha else estilo_celda))
+            hoja.append(celdas)
+
+    libro.save(ruta_excel)
+
+def estilos_de_hojas(nombres_hojas, registro=None):
+    """Estilos que corresponden a las hojas dadas según el registro (solo las que lo necesitan)"""
+    registro = ESTILOS_HOJAS if registro is None else registro
+    return {nombre: registro[nombre] for nombre in nombres_hojas if nombre in registro}
+
+def escribir_libro(ruta_excel, hojas, motor=None, estilos=None):
+    """
+    Escribe un libro nuevo con las hojas dadas (dict nombre → DataFrame, en orden).
+    estilos: dict hoja → estilo ({'nombre', 'font_name', 'font_size'}); por defecto se
+             toman de ESTILOS_HOJAS y las hojas sin entrada van sin estilo.
+    Retorna el motor efectivamente usado.
+    """
+    motor = resolver_motor(motor)
+    estilos = estilos_de_hojas(hojas, estilos)
+    if motor == MOTOR_XLSXWRITER:
+        _escribir_xlsxwriter(ruta_excel, hojas, estilos)
+    else:
+        _escribir_openpyxl(ruta_excel, hojas, estilos)
+    return motor
+
+# === REEMPLAZO QUIRÚRGICO DE UNA HOJA DENTRO DEL .xlsx ===
+# Solo se reescribe la parte XML de la hoja (cadenas en línea, sin tocar
+# sharedStrings); el resto de partes del zip se copia tal cual.
+
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_CARACTERES_INVALIDOS_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _letra_columna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+def _ruta_parte_hoja(zin, nombre_hoja):
+    """Ruta dentro del zip de la hoja con ese nombre (vía workbook.xml y sus relaciones), o None"""
+    libro = zin.read("xl/workbook.xml").decode("utf-8")
+    for etiqueta in re.findall(r"<(?:\w+:)?sheet\b[^>]*>", libro):
+        nombre = re.search(r'\bname="([^"]*)"', etiqueta)
+        rid = re.search(r'\br:id="([^"]*)"', etiqueta) or re.search(r'\bid="([^"]*)"', etiqueta)
+        if nombre and rid and nombre.group(1) == escape(nombre_hoja, {'"': "&quot;"}):
+            break
+    else:
+        return None
+
+    relaciones = zin.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    for etiqueta in re.findall(r"<(?:\w+:)?Relationship\b[^>]*>", relaciones):
+        if re.search(rf'\bId="{re.escape(rid.group(1))}"', etiqueta):
+            destino = re.search(r'\bTarget="([^"]*)"', etiqueta).group(1)
+            if destino.startswith("/"):
+                return destino.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", destino))
+    return None
+
+def _estilo_celda(xml_hoja, referencia):
+    m = re.search(rf'<c\b[^>]*\br="{referencia}"[^>]*>', xml_hoja)
+    if m:
+        s = re.search(r'\bs="(\d+)"', m.group(0))
+        return s.group(1) if s else None
+    return None
+
+def _celda_xml(referencia, valor, estilo):
+    atributo_estilo = f' s="{estilo}"' if estilo else ""
+    valor = _valor_xlsx(valor)
+    if valor is None:
+        return f'<c r="{referencia}"{atributo_estilo}/>' if estilo else ""
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}"{atributo_estilo} t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)) and np.isfinite(valor):
+        return f'<c r="{referencia}"{atributo_estilo}><v>{repr(valor)}</v></c>'
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        valor = valor.isoformat(sep=" ") if isinstance(valor, datetime.datetime) else valor.isoformat()
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub("", str(valor)))
+    return (f'<c r="{referencia}"{atributo_estilo} t="inlineStr">'
+            f'<is><t xml:space="preserve">{texto}</t></is></c>')
+
+def _xml_hoja(xml_anterior, df):
+    """Nuevo XML de la hoja: conserva todo lo que rodea a <sheetData> y el estilo de sus celdas"""
+    estilo_encabezado = _estilo_celda(xml_anterior, "A1")
+    estilo_datos = _estilo_celda(xml_anterior, "A2") or estilo_encabezado
+
+    filas = []
+    columnas = [_letra_columna(j) for j in range(len(df.columns))]
+    celdas = "".join(_celda_xml(f"{c}1", str(n), estilo_encabezado) for c, n in zip(columnas, df.columns))
+    filas.append(f'<row r="1">{celdas}</row>')
+    for i, fila in enumerate(df.itertuples(index=False, name=None), start=2):
+        celdas = "".join(_celda_xml(f"{c}{i}", v, estilo_datos) for c, v in zip(columnas, fila))
+        filas.append(f'<row r="{i}">{celdas}</row>')
+    sheet_data = "<sheetData>" + "".join(filas) + "</sheetData>"
+
+    m = re.search(r"<sheetData\s*/>|<sheetData\b[^>]*>.*?</sheetData>", xml_anterior, re.DOTALL)
+    if not m:
+        return None
+    xml = xml_anterior[:m.start()] + sheet_data + xml_anterior[m.end():]
+    ultima = f"{columnas[-1] if columnas else 'A'}{len(df) + 1}"
+    return re.sub(r'<dimension\b[^>]*/>', f'<dimension ref="A1:{ultima}"/>', xml, count=1)
+
+def reemplazar_hoja(ruta_excel, nombre_hoja, df):
+    """
+    Reemplaza solo la hoja nombre_hoja de un .xlsx existente con el contenido de df,
+    copiando byte a byte el contenido del resto de partes del libro (otras hojas,
+    estilos, sharedStrings). Retorna False si el libro no permite el reemplazo
+    (hoja inexistente, cadena de cálculo, XML inesperado); el llamador debe
+    entonces reescribir el libro completo.
+    """
+    with zipfile.ZipFile(ruta_excel) as zin:
+        nombres = set(zin.namelist())
+        if "xl/calcChain.xml" in nombres:
+            return False  # las fórmulas de la hoja quedarían referenciadas
+        ruta_hoja = _ruta_parte_hoja(zin, nombre_hoja)
+        if ruta_hoja is None or ruta_hoja not in nombres:
+            return False
+        xml_nuevo = _xml_hoja(zin.read(ruta_hoja).decode("utf-8"), df)
+        if xml_nuevo is None:
+            return False
+
+        directorio = os.path.dirname(os.path.abspath(ruta_excel))
+        descriptor, ruta_temporal = tempfile.mkstemp(prefix=".~", suffix=".xlsx", dir=directorio)
+        os.close(descriptor)
+        try:
+            with zipfile.ZipFile(ruta_temporal, "w") as zout:
+                for info in zin.infolist():
+                    if info.filename == ruta_hoja:
+                        zout.writestr(info, xml_nuevo.encode("utf-8"), compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        zout.writestr(info, zin.read(info.filename), compress_type=info.compress_type)
+        except BaseException:
+            os.remove(ruta_temporal)
+            raise
+
+    # El original se reemplaza ya cerrado (en Windows no se puede reemplazar un archivo abierto)
+    shutil.copymode(ruta_excel, ruta_temporal)
+    os.replace(ruta_temporal, ruta_excel)
+    return True
@@ -2,13 +2,22 @@
 # Procesador directo de archivos Excel por aeropuerto
 # ============================================================
 
+import io
 import os
+import re
+import sys
 import shutil
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-import openpyxl
-import unicodedata
 from docx import Document
 
+from indice_plantillas import normaliza, cargar_indice_plantillas, NOMBRE_INDICE
+from lector_excel import leer_hoja_origen, HOJA_ORIGEN, HOJA_TAGS
+from escritor_excel import escribir_libro
+from huellas import huella_archivo, cargar_registro, guardar_registro
+
 # Diccionario robusto de asignación ciudad ↔ aeropuerto
 aeropuerto_ciudad = {
     "ERNESTO CORTISSOZ":        "Barranquilla",
@@ -46,38 +55,14 @@ abrev_ciudad = {
 # Crear diccionario inverso para búsqueda por ciudad
 ciudad_abrev = {v.upper(): k for k, v in abrev_ciudad.items()}
 
-def normaliza(texto):
-    texto = texto.upper().strip()
-    texto = unicodedata.normalize('NFKD', texto)
-    texto = ''.join([c for c in texto if not unicodedata.combining(c)])
-    return texto
-
-def encuentra_plantilla(ciudad, ruta_plantillas):
-    """Encuentra la plantilla Word correcta para una ciudad"""
-    if not os.path.exists(ruta_plantillas):
-        raise FileNotFoundError(f"No existe la carpeta de plantillas: {ruta_plantillas}")
-    
-    ciudad = normaliza(ciudad)
-    # Buscar por abreviatura
-    abrev = ciudad_abrev.get(ciudad)
-    if abrev:
-        nombre_plantilla = f"Plantilla_AP_{abrev}_2025.docx"
-        ruta_completa = os.path.join(ruta_plantillas, nombre_plantilla)
-        if os.path.exists(ruta_completa):
-            return ruta_completa
-    
-    # Buscar de forma flexible
-    for archivo in os.listdir(ruta_plantillas):
-        if archivo.startswith("~$"):  # Ignorar temporales
-            continue
-        if archivo.endswith(".docx"):
-            # Buscar coincidencias en nombre
-            nombre_norm = normaliza(archivo)
-            if ciudad in nombre_norm or any(palabra in nombre_norm 
-                                         for palabra in ciudad.split()):
-                return os.path.join(ruta_plantillas, archivo)
-    
-    return None
+def encuentra_plantilla(ciudad, ruta_plantillas, indice=None):
+    """
+    Encuentra la plantilla Word correcta para una ciudad usando el índice de plantillas
+    (la carpeta se lista una sola vez por proceso, no una vez por ciudad)
+    """
+    if indice is None:
+        indice = cargar_indice_plantillas(ruta_plantillas)
+    return indice.buscar(ciudad, ciudad_abrev.get(normaliza(ciudad)))
 
 def encuentra_excel(carpeta):
     """Encuentra el archivo Excel principal en una carpeta"""
@@ -90,273 +75,505 @@ def encuentra_excel(carpeta):
     bases = [f for f in archivos if f.lower().startswith('base')]
     return os.path.join(carpeta, (bases[0] if bases else archivos[0]))
 
-# === RUTAS BASE ===
-ruta_origen = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\2.Limpieza\Resultados_por_Aeropuerto"
-ruta_destino_raiz = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\3.correspondencia\Datos"
-ruta_plantillas = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\3.correspondencia\Plantillas"
-
-print("🔍 Verificando ruta de origen...")
-if not os.path.exists(ruta_origen):
-    print(f"❌ ERROR: La carpeta de origen NO existe: {ruta_origen}")
-    exit()
-else:
-    print(f"✅ Carpeta de origen encontrada: {ruta_origen}")
-
-print("🔍 Verificando ruta de plantillas Word...")
-if not os.path.exists(ruta_plantillas):
-    print(f"❌ ERROR: La carpeta de plantillas NO existe: {ruta_plantillas}")
-    exit()
-else:
-    print(f"✅ Carpeta de plantillas encontrada: {ruta_plantillas}")
-
-archivos = os.listdir(ruta_origen)
-print(f"📦 Archivos encontrados en '{ruta_origen}':")
-if not archivos:
-    print("⚠️ ADVERTENCIA: La carpeta está vacía.")
-else:
-    for archivo in archivos:
-        print(f"   • {archivo}")
-
-# === CREAR CARPETA DE DESTINO SI NO EXISTE ===
-os.makedirs(ruta_destino_raiz, exist_ok=True)
-print(f"✅ Carpeta destino preparada: {ruta_destino_raiz}")
-
-# === PROCESAR ARCHIVOS ===
-archivos_procesados = 0
-for archivo in archivos:
-    if archivo.lower().endswith(".xlsx"):
-        # Extraer nombre del aeropuerto eliminando prefijos y extensión
-        aeropuerto = (archivo
-                     .replace("Base_Aeropuerto ", "")
-                     .replace("base_aeropuerto ", "")
-                     .replace(".xlsx", "")
-                     .strip())
-        
-        # Buscar correspondencia en el diccionario
-        aeropuerto_normalizado = normaliza(aeropuerto)
-        ciudad = None
-        
-        # Intentar encontrar coincidencia en el diccionario
-        for key, value in aeropuerto_ciudad.items():
-            if normaliza(key) in aeropuerto_normalizado or aeropuerto_normalizado in normaliza(key):
-                ciudad = value
+# Etiquetas de la hoja TAGS (en el orden en que se escriben)
+ETIQUETAS_TAGS = [
+    'nro', 'periodo', 'mes', 'año', 'pto_1', 'pto_2', 'pto_3', 'pto_4',
+    'fecha_mu', 'dia_mu', 'cod_1', 'cod_2', 'cod_3', 'cod_4',
+    'irca_pto_1', 'irca_pto_2', 'irca_pto_3', 'irca_pto_4',"clasificacion_riesgo_1", 
+    "clasificacion_riesgo_2","clasificacion_riesgo_3", "clasificacion_riesgo_4","param_1", 'param_2', 'param_3', 
+    'param_4',"param_5", 'param_6'
+]
+
+HOJA_TABLA_4 = "TABLA_4"
+
+# Columnas de Sheet1 que usa el Paso 1 (nombres ya normalizados)
+COLUMNAS_REQUERIDAS = ['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE', 'PUNTO', 'RESULTADO_CRUDO']
+
+def construir_tags(df_tags_existente=None):
+    """Construye la hoja TAGS con todas las etiquetas, conservando valores manuales existentes"""
+    if df_tags_existente is None or not {'ETIQUETA', 'VALOR'} <= set(df_tags_existente.columns):
+        df_tags_existente = pd.DataFrame(columns=['ETIQUETA', 'VALOR'])
+
+    # Crear DataFrame base con todas las etiquetas necesarias
+    df_tags_nuevo = pd.DataFrame({'ETIQUETA': ETIQUETAS_TAGS})
+
+    # Unir con los valores existentes (sin duplicar etiquetas)
+    df_tags = pd.merge(
+        df_tags_nuevo,
+        df_tags_existente[['ETIQUETA', 'VALOR']].drop_duplicates(subset=['ETIQUETA']),
+        on='ETIQUETA',
+        how='left'
+    )
+    return df_tags[['ETIQUETA', 'VALOR']]
+
+def escribir_libro_base(ruta_excel, df_tags, tabla, motor=None):
+    """
+    Escribe TAGS (primera hoja) y TABLA_4 con fuente Verdana 6pt
+    serializando el libro una única vez. Retorna el motor usado.
+    """
+    return escribir_libro(ruta_excel, {HOJA_TAGS: df_tags, HOJA_TABLA_4: tabla}, motor=motor)
+
+COLUMNAS_FILA_TABLA_4 = ['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE']
+
+def construir_tabla_4(df):
+    """
+    Construye TABLA_4 (una fila por PARÁMETRO/TÉCNICA/UNIDAD/LÍMITE, una columna por PUNTO)
+    con el primer RESULTADO_CRUDO no nulo de cada celda.
+
+    Reemplaza al pivot_table(aggfunc='first') + orden categórico + reindex anteriores con
+    un solo ngroup() sobre las claves de fila y una asignación NumPy sobre una matriz
+    preasignada. Orden resultante:
+      - filas agrupadas por PARÁMETRO, en orden de primera aparición del parámetro
+      - dentro de un mismo parámetro, sus combinaciones TÉCNICA/UNIDAD/LÍMITE en orden de
+        primera aparición (el sort_values anterior no garantizaba este orden)
+      - columnas en el orden de primera aparición del PUNTO
+      - filas sin ningún resultado se descartan; puntos sin resultados quedan en "n/a"
+    """
+    claves = COLUMNAS_FILA_TABLA_4
+
+    # Código de fila y código de punto, ambos en orden de primera aparición; las filas
+    # con clave o punto nulos no entran a la tabla (igual que pivot_table)
+    grupo = df.groupby(claves, sort=False).ngroup().to_numpy()
+    codigo_punto, puntos = pd.factorize(df['PUNTO'], sort=False)
+    validas = ~np.isnan(grupo) & (codigo_punto >= 0)
+    posiciones = np.flatnonzero(validas)
+    codigo_fila = grupo[validas].astype(np.int64)
+    codigo_punto = codigo_punto[validas]
+    n_filas = int(codigo_fila.max()) + 1 if len(codigo_fila) else 0
+
+    # Primera fila de origen de cada grupo: como los códigos siguen el orden de aparición,
+    # una fila abre grupo cuando su código supera a todos los anteriores
+    nuevo = np.ones(len(codigo_fila), dtype=bool)
+    nuevo[1:] = codigo_fila[1:] > np.maximum.accumulate(codigo_fila)[:-1]
+    primera_fila = posiciones[nuevo]
+
+    # Dispersión: primer valor no nulo de cada (fila, punto)
+    valores = df['RESULTADO_CRUDO'].to_numpy()[posiciones]
+    no_nulos = pd.notna(valores)
+    celda = codigo_fila[no_nulos] * len(puntos) + codigo_punto[no_nulos]
+    primeros = ~pd.Series(celda).duplicated(keep='first').to_numpy()
+
+    tipo = valores.dtype if valores.dtype.kind in 'fO' else object
+    matriz = np.full(n_filas * len(puntos), np.nan, dtype=tipo)
+    matriz[celda[primeros]] = valores[no_nulos][primeros]
+    matriz = matriz.reshape(n_filas, len(puntos))
+
+    # Filas sin ningún resultado y puntos sin resultados (→ "n/a")
+    fila_con_datos = np.zeros(n_filas, dtype=bool)
+    fila_con_datos[celda // max(len(puntos), 1)] = True
+    punto_con_datos = np.zeros(len(puntos), dtype=bool)
+    punto_con_datos[celda % max(len(puntos), 1)] = True
+
+    # Agrupar por parámetro (orden de aparición) conservando el orden de los grupos
+    orden_parametro, _ = pd.factorize(df[claves[0]].to_numpy()[primera_fila], sort=False)
+    filas = np.flatnonzero(fila_con_datos)
+    filas = filas[np.argsort(orden_parametro[filas], kind='stable')]
+
+    columnas_puntos = pd.DataFrame(matriz[filas], columns=puntos)
+    for posicion in np.flatnonzero(~punto_con_datos):
+        columnas_puntos.isetitem(posicion, "n/a")
+    tabla = pd.concat([df[claves].iloc[primera_fila[filas]].reset_index(drop=True), columnas_puntos], axis=1)
+    tabla.columns.name = 'PUNTO'
+    return tabla
+
+def nombre_aeropuerto(archivo):
+    """Extrae el nombre del aeropuerto eliminando prefijos y extensión"""
+    return (archivo
+            .replace("Base_Aeropuerto ", "")
+            .replace("base_aeropuerto ", "")
+            .replace(".xlsx", "")
+            .strip())
+
+# Palabras que no distinguen un aeropuerto de otro ("EL EDÉN", "GOLFO DE MORROSQUILLO")
+PALABRAS_VACIAS = {"DE", "DEL", "LA", "LAS", "EL", "LOS", "Y"}
+LONGITUD_MIN_PREFIJO = 3
+
+def tokens_nombre(texto):
+    """Palabras significativas del nombre normalizado (sin artículos ni preposiciones)"""
+    tokens = re.findall(r"[A-Z0-9]+", normaliza(texto))
+    significativos = [t for t in tokens if t not in PALABRAS_VACIAS]
+    return significativos or tokens
+
+class ResolutorAeropuertos:
+    """
+    Resuelve aeropuerto → ciudad con índices precalculados sobre aeropuerto_ciudad.
+    Las claves se normalizan una sola vez; los nombres truncados de los archivos
+    ("Golfo De Morrosquill", "Guillermo León Valen") se resuelven por prefijo de palabra.
+    """
+
+    def __init__(self, mapa):
+        self.exactos = {}      # nombre normalizado completo → ciudad
+        self.prefijos = {}     # prefijo de palabra (≥3 letras) o palabra corta → ids de clave
+        self.palabras = {}     # palabra completa → ids de clave
+        self.claves = []       # id → (tokens de la clave, ciudad)
+        self._cache = {}
+
+        for clave, ciudad in mapa.items():
+            self.exactos[" ".join(tokens_nombre(clave))] = ciudad
+            id_clave = len(self.claves)
+            tokens = tokens_nombre(clave)
+            self.claves.append((tokens, ciudad))
+            for token in set(tokens):
+                self.palabras.setdefault(token, set()).add(id_clave)
+                self.prefijos.setdefault(token, set()).add(id_clave)
+                for n in range(LONGITUD_MIN_PREFIJO, len(token)):
+                    self.prefijos.setdefault(token[:n], set()).add(id_clave)
+
+    def _candidatos(self, tokens):
+        # 1. Cada palabra del nombre es prefijo de alguna palabra de la clave (nombres truncados)
+        ids = None
+        for token in tokens:
+            encontrados = self.prefijos.get(token, set())
+            ids = encontrados if ids is None else ids & encontrados
+            if not ids:
                 break
-        
-        if ciudad is None:
-            print(f"⚠️ ADVERTENCIA: No se encontró correspondencia para el aeropuerto '{aeropuerto}'")
-            ciudad = aeropuerto
-        
-        print(f"\n📄 Procesando: {archivo}")
-        print(f"   🔄 Aeropuerto: {aeropuerto} → Ciudad: {ciudad}")
-
-        # Crear estructura de carpetas y copiar archivo
-        carpeta_ciudad = os.path.join(ruta_destino_raiz, ciudad)
-        os.makedirs(carpeta_ciudad, exist_ok=True)
-        print(f"   📁 Carpeta creada: {carpeta_ciudad}")
-
-        # Renombrar archivo destino usando el nombre de la ciudad
-        nombre_excel_ciudad = f"base_{ciudad}.xlsx"
-        ruta_excel_origen = os.path.join(ruta_origen, archivo)
-        ruta_excel_destino = os.path.join(carpeta_ciudad, nombre_excel_ciudad)
-
+        if ids:
+            return ids
+
+        # 2. Todas las palabras de la clave aparecen en el nombre (nombres con texto adicional)
+        conteo = {}
+        for token in set(tokens):
+            for id_clave in self.palabras.get(token, ()):
+                conteo[id_clave] = conteo.get(id_clave, 0) + 1
+        return {i for i, n in conteo.items() if n == len(set(self.claves[i][0]))}
+
+    def resolver(self, aeropuerto):
+        """
+        Retorna {'ciudad', 'candidatos', 'ambiguo'}.
+        'ciudad' es None si no hay coincidencia o si el nombre apunta a varias ciudades.
+        """
+        tokens = tokens_nombre(aeropuerto)
+        llave = " ".join(tokens)
+        if llave in self._cache:
+            return self._cache[llave]
+
+        if llave in self.exactos:
+            candidatos = [self.exactos[llave]]
+        else:
+            candidatos = sorted({self.claves[i][1] for i in self._candidatos(tokens)})
+
+        resultado = {
+            'ciudad': candidatos[0] if len(candidatos) == 1 else None,
+            'candidatos': candidatos,
+            'ambiguo': len(candidatos) > 1,
+        }
+        self._cache[llave] = resultado
+        return resultado
+
+resolutor_aeropuertos = ResolutorAeropuertos(aeropuerto_ciudad)
+
+def resolver_ciudad(aeropuerto):
+    """Retorna la ciudad asociada al aeropuerto según aeropuerto_ciudad, o None (sin coincidencia o ambigua)"""
+    return resolutor_aeropuertos.resolver(aeropuerto)['ciudad']
+
+# === MANIFIESTO DE ENTRADAS DEL PASO 1 ===
+# Cambiar la versión invalida el manifiesto y obliga a regenerar todos los aeropuertos
+VERSION_GENERADOR = "3.0"
+NOMBRE_MANIFIESTO = ".paso1_manifest.json"
+
+def cargar_manifiesto(ruta_manifiesto):
+    """Lee el manifiesto del Paso 1; si no existe o está dañado retorna uno vacío"""
+    return cargar_registro(ruta_manifiesto, 'aeropuertos')
+
+def guardar_manifiesto(ruta_manifiesto, manifiesto):
+    """Escribe el manifiesto de forma atómica (archivo temporal + reemplazo)"""
+    guardar_registro(ruta_manifiesto, manifiesto)
+
+def entradas_sin_cambios(entrada, huella_origen, huella_plantilla):
+    """Indica si las entradas y salidas de un aeropuerto siguen iguales al último proceso exitoso"""
+    if not entrada or entrada.get('version') != VERSION_GENERADOR:
+        return False
+    if (entrada.get('origen') or {}).get('sha256') != huella_origen['sha256']:
+        return False
+    if (entrada.get('plantilla') or {}).get('sha256') != (huella_plantilla or {}).get('sha256'):
+        return False
+    salidas = [entrada.get('excel'), entrada.get('plantilla_destino')]
+    return all(os.path.exists(s) for s in salidas if s)
+
+def procesar_archivo(archivo, ruta_origen, ruta_destino_raiz, ruta_plantillas, actualizar_plantilla=False,
+                     indice_plantillas=None, motor_excel=None):
+    """
+    Procesa un archivo Base_Aeropuerto: genera base_<ciudad>.xlsx (TAGS + TABLA_4)
+    en la carpeta de la ciudad y copia la plantilla Word (si no existe, o siempre
+    cuando actualizar_plantilla=True porque la plantilla de origen cambió).
+
+    Retorna:
+        dict: resultado del aeropuerto con claves 'archivo', 'aeropuerto', 'ciudad',
+              'exito', 'excel', 'plantilla' y 'error'.
+    """
+    aeropuerto = nombre_aeropuerto(archivo)
+
+    resultado = {
+        'archivo': archivo,
+        'aeropuerto': aeropuerto,
+        'ciudad': None,
+        'exito': False,
+        'excel': None,
+        'plantilla': None,
+        'error': ''
+    }
+
+    # Buscar correspondencia en el diccionario
+    resolucion = resolutor_aeropuertos.resolver(aeropuerto)
+    ciudad = resolucion['ciudad']
+    
+    if resolucion['ambiguo']:
+        print(f"⚠️ ADVERTENCIA: El aeropuerto '{aeropuerto}' coincide con varias ciudades: "
+              f"{', '.join(resolucion['candidatos'])}. Se usará el nombre del aeropuerto.")
+        ciudad = aeropuerto
+    elif ciudad is None:
+        print(f"⚠️ ADVERTENCIA: No se encontró correspondencia para el aeropuerto '{aeropuerto}'")
+        ciudad = aeropuerto
+    resultado['ciudad'] = ciudad
+    
+    print(f"\n📄 Procesando: {archivo}")
+    print(f"   🔄 Aeropuerto: {aeropuerto} → Ciudad: {ciudad}")
+
+    # Crear estructura de carpetas
+    carpeta_ciudad = os.path.join(ruta_destino_raiz, ciudad)
+    os.makedirs(carpeta_ciudad, exist_ok=True)
+    print(f"   📁 Carpeta creada: {carpeta_ciudad}")
+
+    # Renombrar archivo destino usando el nombre de la ciudad
+    nombre_excel_ciudad = f"base_{ciudad}.xlsx"
+    ruta_excel_origen = os.path.join(ruta_origen, archivo)
+    ruta_excel_destino = os.path.join(carpeta_ciudad, nombre_excel_ciudad)
+
+    # === LECTURA DE DATOS (Sheet1 y TAGS en streaming, una sola apertura del origen) ===
+    hoja_origen = HOJA_ORIGEN
+    print("🚀 Iniciando generación de TABLA_4 para el archivo:", ruta_excel_destino)
+
+    try:
+        print(f"📥 Leyendo hoja '{hoja_origen}' del archivo...")
+        # Se conservan los valores manuales de TAGS si el origen ya la tiene
+        df, columnas_encontradas, df_tags_existente = leer_hoja_origen(
+            ruta_excel_origen, hoja_origen, COLUMNAS_REQUERIDAS)
+        print("✅ Hoja leída con éxito.")
+    except Exception as e:
+        print(f"❌ ERROR al leer la hoja '{hoja_origen}'. Detalle: {e}")
+        resultado['error'] = f"Error al leer la hoja '{hoja_origen}': {e}"
+        return resultado
+
+    print(f"📊 Columnas encontradas: {columnas_encontradas}")
+
+    requeridas = COLUMNAS_REQUERIDAS
+    faltan = [c for c in requeridas if c not in df.columns]
+    if faltan:
+        print(f"❌ ERROR: faltan columnas: {faltan}")
+        resultado['error'] = f"Faltan columnas: {faltan}"
+        return resultado
+
+    df = df[requeridas]
+    print("🔍 Vista previa datos originales:\n", df.head())
+
+    # === TABLA_4: PARÁMETROS × PUNTOS (orden de aparición preservado) ===
+    try:
+        tabla = construir_tabla_4(df)
+        print("✅ Pivot exitoso.")
+    except Exception as e:
+        print(f"❌ ERROR en pivot: {e}")
+        resultado['error'] = f"Error en pivot: {e}"
+        return resultado
+
+    print("📄 Vista previa de TABLA_4 ordenada:\n", tabla.head())
+
+    # === CREAR HOJA TAGS ===========================================
+    print("🧩 Generando hoja 'TAGS'...")
+    df_tags = construir_tags(df_tags_existente)
+
+    # === ESCRIBIR TAGS + TABLA_4 CON ESTILO EN UNA SOLA PASADA ===
+    try:
+        motor = escribir_libro_base(ruta_excel_destino, df_tags, tabla, motor_excel)
+        print(f"✅ Hojas 'TAGS' y '{HOJA_TABLA_4}' escritas en Verdana 6pt ({motor}) → {nombre_excel_ciudad}")
+    except Exception as e:
+        print(f"❌ ERROR al escribir hojas TAGS/TABLA_4: {e}")
+        resultado['error'] = f"Error al escribir hojas TAGS/TABLA_4: {e}"
+        return resultado
+
+    resultado['excel'] = ruta_excel_destino
+
+    # Después de crear la carpeta de ciudad
+    # Buscar y copiar plantilla Word si no existe
+    plantilla = encuentra_plantilla(ciudad, ruta_plantillas, indice_plantillas)
+    if plantilla:
+        nombre_plantilla = os.path.basename(plantilla)
+        ruta_plantilla_destino = os.path.join(carpeta_ciudad, nombre_plantilla)
+        resultado['plantilla'] = ruta_plantilla_destino
+        if actualizar_plantilla or not os.path.exists(ruta_plantilla_destino):
+            try:
+                shutil.copy2(plantilla, ruta_plantilla_destino)
+                print(f"   ✅ Plantilla Word copiada: {nombre_plantilla}")
+            except Exception as e:
+                print(f"❌ ERROR al copiar plantilla Word: {e}")
+                resultado['plantilla'] = None
+    else:
+        print(f"⚠️ ADVERTENCIA: No se encontró plantilla Word para {ciudad}")
+
+    resultado['exito'] = True
+    return resultado
+
+def _procesar_archivo_con_log(args):
+    """Ejecuta procesar_archivo capturando su salida (usado por los procesos del pool)"""
+    buffer_log = io.StringIO()
+    with contextlib.redirect_stdout(buffer_log):
         try:
-            shutil.copyfile(ruta_excel_origen, ruta_excel_destino)
-            print(f"   ✅ Copiado: {archivo} → {nombre_excel_ciudad}")
+            resultado = procesar_archivo(*args)
         except Exception as e:
-            print(f"❌ ERROR al copiar archivo Excel: {e}")
-            continue
-
-        # === PROCESAR DIRECTAMENTE EL EXCEL ===
-        ruta_excel = ruta_excel_destino
-        hoja_origen = "Sheet1"
-        hoja_salida = "TABLA_4"
-
-        print("🚀 Iniciando generación de TABLA_4 para el archivo:", ruta_excel)
-
-        if not os.path.exists(ruta_excel):
-            print(f"❌ ERROR: No se encontró el archivo '{ruta_excel}'.")
+            print(f"❌ ERROR inesperado procesando '{args[0]}': {e}")
+            resultado = {'archivo': args[0], 'aeropuerto': None, 'ciudad': None, 'exito': False,
+                         'excel': None, 'plantilla': None, 'error': str(e)}
+    return resultado, buffer_log.getvalue()
+
+def generar_base(ruta_origen, ruta_destino_raiz, ruta_plantillas, aeropuertos=None, workers=1,
+                 forzar=False, ruta_manifiesto=None, motor_excel=None):
+    """
+    Ejecuta el Paso 1 completo: procesa cada Base_Aeropuerto de la carpeta de origen.
+
+    Parámetros:
+        ruta_origen: carpeta con los archivos 'Base_Aeropuerto *.xlsx'
+        ruta_destino_raiz: carpeta Datos donde se crean las carpetas por ciudad
+        ruta_plantillas: carpeta con las plantillas Word
+        aeropuertos: lista opcional de aeropuertos o ciudades a procesar (None = todos)
+        workers: número de procesos para trabajar aeropuertos en paralelo (1 = secuencial).
+                 El log de cada aeropuerto se emite completo y en el orden de los archivos.
+        forzar: regenerar todos los aeropuertos aunque sus entradas no hayan cambiado
+        ruta_manifiesto: manifiesto de huellas (por defecto <ruta_destino_raiz>/.paso1_manifest.json)
+        motor_excel: 'xlsxwriter' (constant_memory) u 'openpyxl' (None = escritor_excel.MOTOR_POR_DEFECTO)
+
+    Retorna:
+        dict: {'exito': bool, 'ciudades_procesadas': int, 'resultados': [dict por aeropuerto],
+               'omitidos': [dict por aeropuerto sin cambios], 'error': str}
+    """
+    resumen = {'exito': False, 'ciudades_procesadas': 0, 'resultados': [], 'omitidos': [], 'error': ''}
+
+    print("🔍 Verificando ruta de origen...")
+    if not os.path.exists(ruta_origen):
+        print(f"❌ ERROR: La carpeta de origen NO existe: {ruta_origen}")
+        resumen['error'] = f"La carpeta de origen no existe: {ruta_origen}"
+        return resumen
+    else:
+        print(f"✅ Carpeta de origen encontrada: {ruta_origen}")
+
+    print("🔍 Verificando ruta de plantillas Word...")
+    if not os.path.exists(ruta_plantillas):
+        print(f"❌ ERROR: La carpeta de plantillas NO existe: {ruta_plantillas}")
+        resumen['error'] = f"La carpeta de plantillas no existe: {ruta_plantillas}"
+        return resumen
+    else:
+        print(f"✅ Carpeta de plantillas encontrada: {ruta_plantillas}")
+
+    archivos = os.listdir(ruta_origen)
+    print(f"📦 Archivos encontrados en '{ruta_origen}':")
+    if not archivos:
+        print("⚠️ ADVERTENCIA: La carpeta está vacía.")
+    else:
+        for archivo in archivos:
+            print(f"   • {archivo}")
+
+    # === CREAR CARPETA DE DESTINO SI NO EXISTE ===
+    os.makedirs(ruta_destino_raiz, exist_ok=True)
+    print(f"✅ Carpeta destino preparada: {ruta_destino_raiz}")
+
+    # Filtro opcional por aeropuerto o ciudad (la ciudad se resuelve con el ResolutorAeropuertos)
+    filtro = {normaliza(a) for a in aeropuertos} if aeropuertos else None
+
+    # === ÍNDICE DE PLANTILLAS (una sola lectura de la carpeta por ejecución) ===
+    indice_plantillas = cargar_indice_plantillas(ruta_plantillas, os.path.join(ruta_destino_raiz, NOMBRE_INDICE))
+    print(f"📑 Índice de plantillas: {len(indice_plantillas.archivos)} plantillas disponibles")
+
+    # === MANIFIESTO: DETECTAR AEROPUERTOS SIN CAMBIOS ===
+    ruta_manifiesto = ruta_manifiesto or os.path.join(ruta_destino_raiz, NOMBRE_MANIFIESTO)
+    manifiesto = cargar_manifiesto(ruta_manifiesto)
+    entradas = manifiesto['aeropuertos']
+    huellas = {}
+
+    # === PROCESAR ARCHIVOS ===
+    pendientes = []
+    for archivo in archivos:
+        if not archivo.lower().endswith(".xlsx"):
             continue
-
-        # === LECTURA DE DATOS ===
+        aeropuerto = nombre_aeropuerto(archivo)
+        ciudad = resolver_ciudad(aeropuerto) or aeropuerto
+        if filtro is not None:
+            nombre = normaliza(aeropuerto)
+            if normaliza(ciudad) not in filtro and not any(f in nombre or nombre in f for f in filtro):
+                continue
+
+        entrada = entradas.get(archivo) or {}
+        plantilla = encuentra_plantilla(ciudad, ruta_plantillas, indice_plantillas)
         try:
-            print(f"📥 Leyendo hoja '{hoja_origen}' del archivo...")
-            df = pd.read_excel(ruta_excel, sheet_name=hoja_origen)
-            print("✅ Hoja leída con éxito.")
-        except Exception as e:
-            print(f"❌ ERROR al leer la hoja '{hoja_origen}'. Detalle: {e}")
+            huella_origen = huella_archivo(os.path.join(ruta_origen, archivo), entrada.get('origen'))
+            huella_plantilla = huella_archivo(plantilla, entrada.get('plantilla')) if plantilla else None
+        except OSError as e:
+            print(f"⚠️ ADVERTENCIA: No se pudo calcular la huella de '{archivo}': {e}")
+            huella_origen, huella_plantilla = None, None
+        huellas[archivo] = (huella_origen, huella_plantilla)
+
+        if not forzar and huella_origen and entradas_sin_cambios(entrada, huella_origen, huella_plantilla):
+            resumen['omitidos'].append({'archivo': archivo, 'ciudad': entrada.get('ciudad', ciudad),
+                                        'excel': entrada.get('excel')})
             continue
 
-        # === NORMALIZACIÓN DE COLUMNAS ===
-        df.columns = df.columns.str.strip().str.upper()
-        df.rename(columns={"PUNTO DE MUESTREO": "PUNTO", "MÉTODO": "METODO"}, inplace=True)
-
-        print(f"📊 Columnas encontradas: {df.columns.tolist()}")
-
-        requeridas = ['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE', 'PUNTO', 'RESULTADO_CRUDO']
-        faltan = [c for c in requeridas if c not in df.columns]
-        if faltan:
-            print(f"❌ ERROR: faltan columnas: {faltan}")
-            continue
-
-        df = df[requeridas]
-        print("🔍 Vista previa datos originales:\n", df.head())
-
-        # ==========================================================
-        #        *** PRESERVAR EL ORDEN DE LOS PARÁMETROS ***
-        # ==========================================================
-        # 1️⃣ Guardar el orden original de aparición de 'PARÁMETRO'
-        orden_param = (
-            df.drop_duplicates(subset=['PARÁMETRO'])['PARÁMETRO']
-              .tolist()
-        )
-
-        # 2️⃣ Orden de los puntos tal como aparecen (sin sorted)
-        puntos_unicos = df['PUNTO'].dropna().unique().tolist()
-
-        # 3️⃣ Pivot sin ordenar
-        try:
-            tabla = df.pivot_table(
-                index=['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE'],
-                columns='PUNTO',
-                values='RESULTADO_CRUDO',
-                aggfunc='first',
-                sort=False
-            ).reset_index()
-            print("✅ Pivot exitoso.")
-        except Exception as e:
-            print(f"❌ ERROR en pivot: {e}"); continue
-
-        # 4️⃣ Reordenar según 'orden_param'
-        tabla['__orden__'] = pd.Categorical(tabla['PARÁMETRO'], categories=orden_param, ordered=True)
-        tabla = (tabla.sort_values('__orden__')
-                       .drop(columns='__orden__')
-                       .reset_index(drop=True))
-
-        # 5️⃣ Ajustar columnas finales y valores nulos
-        columnas_finales = ['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE'] + list(puntos_unicos)
-        tabla = tabla.reindex(columns=columnas_finales, fill_value="n/a")
-
-        print("📄 Vista previa de TABLA_4 ordenada:\n", tabla.head())
-
-        # === CREAR HOJA TAGS VACÍA ====================================
-        print("🧩 Generando hoja 'TAGS'...")
-
-        etiquetas = [
-            'nro', 'periodo', 'mes', 'año', 'pto_1', 'pto_2', 'pto_3', 'pto_4',
-            'fecha_mu', 'dia_mu', 'cod_1', 'cod_2', 'cod_3', 'cod_4',
-            'irca_pto_1', 'irca_pto_2', 'irca_pto_3', 'irca_pto_4',"clasificacion_riesgo_1", 
-            "clasificacion_riesgo_2","clasificacion_riesgo_3", "clasificacion_riesgo_4","param_1", 'param_2', 'param_3', 
-            'param_4',"param_5", 'param_6'
-        ]
-
-        # Leer hoja TAGS si existe, para no perder datos manuales
-        try:
-            df_tags_existente = pd.read_excel(ruta_excel, sheet_name='TAGS')
-        except Exception:
-            df_tags_existente = pd.DataFrame(columns=['ETIQUETA', 'VALOR'])
-
-        # Crear DataFrame base con todas las etiquetas necesarias
-        df_tags_nuevo = pd.DataFrame({'ETIQUETA': etiquetas})
-
-        # Unir con los valores existentes (sin duplicar etiquetas)
-        df_tags = pd.merge(
-            df_tags_nuevo,
-            df_tags_existente,
-            on='ETIQUETA',
-            how='left'
-        )
-        df_tags['VALOR'] = df_tags['VALOR'].combine_first(df_tags['VALOR'])
-        df_tags = df_tags[['ETIQUETA', 'VALOR']]
-
-        # === ESCRIBIR PRIMERO LA HOJA TAGS EN EL EXCEL ===
-        try:
-            with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='w') as writer:
-                df_tags.to_excel(writer, sheet_name='TAGS', index=False)
-            print(f"✅ Hoja 'TAGS' creada como primera hoja.")
-        except Exception as e:
-            print(f"❌ ERROR al crear hoja TAGS: {e}")
-
-        # === ESCRIBIR TABLA_4 EN EL EXCEL ===
-        try:
-            with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                tabla.to_excel(writer, sheet_name=hoja_salida, index=False)
-            print(f"✅ Hoja '{hoja_salida}' escrita.")
-        except Exception as e:
-            print(f"❌ ERROR al escribir hoja TABLA_4: {e}"); continue
-
-        # === CAMBIAR FUENTE DE TABLA_4 Y TAGS A VERDANA 6pt ===
-        try:
-            wb = openpyxl.load_workbook(ruta_excel)
-            from openpyxl.styles import Font
-            font = Font(name='Verdana', size=6)
-            for hoja in [hoja_salida, 'TAGS']:
-                if hoja in wb.sheetnames:
-                    ws = wb[hoja]
-                    for row in ws.iter_rows():
-                        for cell in row:
-                            cell.font = font
-                    print(f"✅ Fuente de hoja '{hoja}' cambiada a Verdana 6pt.")
-                else:
-                    print(f"❌ ERROR: Hoja '{hoja}' no encontrada para cambiar fuente.")
-            wb.save(ruta_excel)
-        except Exception as e:
-            print(f"❌ ERROR al cambiar fuente en hojas TABLA_4/TAGS: {e}")
-
-        # === CREAR HOJA TAGS VACÍA ====================================
-        print("🧩 Generando hoja 'TAGS'...")
-
-        etiquetas = [
-            'nro', 'periodo', 'mes', 'año', 'pto_1', 'pto_2', 'pto_3', 'pto_4',
-            'fecha_mu', 'dia_mu', 'cod_1', 'cod_2', 'cod_3', 'cod_4',
-            'irca_pto_1', 'irca_pto_2', 'irca_pto_3', 'irca_pto_4',"clasificacion_riesgo_1", 
-            "clasificacion_riesgo_2","clasificacion_riesgo_3", "clasificacion_riesgo_4","param_1", 'param_2', 'param_3', 
-            'param_4',"param_5", 'param_6'
-        ]
-
-        # Leer hoja TAGS si existe, para no perder datos manuales
-        try:
-            df_tags_existente = pd.read_excel(ruta_excel, sheet_name='TAGS')
-        except Exception:
-            df_tags_existente = pd.DataFrame(columns=['ETIQUETA', 'VALOR'])
-
-        # Crear DataFrame base con todas las etiquetas necesarias
-        df_tags_nuevo = pd.DataFrame({'ETIQUETA': etiquetas})
-
-        # Unir con los valores existentes (sin duplicar etiquetas)
-        df_tags = pd.merge(
-            df_tags_nuevo,
-            df_tags_existente,
-            on='ETIQUETA',
-            how='left'
-        )
-        df_tags['VALOR'] = df_tags['VALOR'].combine_first(df_tags['VALOR'])
-        df_tags = df_tags[['ETIQUETA', 'VALOR']]
-
-        try:
-            with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                df_tags.to_excel(writer, sheet_name='TAGS', index=False)
-            print("✅ Hoja 'TAGS' creada o actualizada sin duplicar ni borrar datos existentes.")
-        except Exception as e:
-            print(f"❌ ERROR al crear hoja TAGS: {e}")
-
-        # Después de crear la carpeta de ciudad
-        # Buscar y copiar plantilla Word si no existe
-        plantilla = encuentra_plantilla(ciudad, ruta_plantillas)
-        if plantilla:
-            nombre_plantilla = os.path.basename(plantilla)
-            ruta_plantilla_destino = os.path.join(carpeta_ciudad, nombre_plantilla)
-            if not os.path.exists(ruta_plantilla_destino):
-                try:
-                    shutil.copy2(plantilla, ruta_plantilla_destino)
-                    print(f"   ✅ Plantilla Word copiada: {nombre_plantilla}")
-                except Exception as e:
-                    print(f"❌ ERROR al copiar plantilla Word: {e}")
+        plantilla_cambio = bool(entrada) and (entrada.get('plantilla') or {}).get('sha256') != (huella_plantilla or {}).get('sha256')
+        pendientes.append((archivo, ruta_origen, ruta_destino_raiz, ruta_plantillas, plantilla_cambio,
+                           indice_plantillas, motor_excel))
+
+    if resumen['omitidos']:
+        print(f"\n⏭️ Aeropuertos sin cambios desde la última ejecución: {len(resumen['omitidos'])}")
+        for omitido in resumen['omitidos']:
+            print(f"   • {omitido['archivo']} → {omitido['ciudad']}")
+
+    if workers > 1 and len(pendientes) > 1:
+        print(f"⚙️ Procesando {len(pendientes)} aeropuertos con {workers} procesos en paralelo")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pendientes))) as pool:
+            for resultado, log in pool.map(_procesar_archivo_con_log, pendientes):
+                print(log, end="")
+                resumen['resultados'].append(resultado)
+    else:
+        for args in pendientes:
+            resumen['resultados'].append(procesar_archivo(*args))
+
+    archivos_procesados = sum(1 for r in resumen['resultados'] if r['exito'])
+
+    # === ACTUALIZAR MANIFIESTO ===
+    for r in resumen['resultados']:
+        huella_origen, huella_plantilla = huellas.get(r['archivo'], (None, None))
+        if r['exito'] and huella_origen:
+            entradas[r['archivo']] = {
+                'version': VERSION_GENERADOR,
+                'ciudad': r['ciudad'],
+                'origen': huella_origen,
+                'plantilla': huella_plantilla,
+                'excel': r['excel'],
+                'plantilla_destino': r['plantilla']
+            }
         else:
-            print(f"⚠️ ADVERTENCIA: No se encontró plantilla Word para {ciudad}")
-
-        archivos_procesados += 1
-
-# === RESUMEN FINAL ===
-print(f"\n🏁 Proceso terminado. Ciudades procesadas: {archivos_procesados}")
-if archivos_procesados == 0:
-    print("⚠️ ADVERTENCIA: No se procesaron archivos Excel válidos.")
\ No newline at end of file
+            entradas.pop(r['archivo'], None)
+    manifiesto['version'] = VERSION_GENERADOR
+    try:
+        guardar_manifiesto(ruta_manifiesto, manifiesto)
+    except OSError as e:
+        print(f"⚠️ ADVERTENCIA: No se pudo guardar el manifiesto '{ruta_manifiesto}': {e}")
+
+    # === RESUMEN FINAL ===
+    print(f"\n🏁 Proceso terminado. Ciudades procesadas: {archivos_procesados}")
+    if resumen['omitidos']:
+        print(f"⏭️ Ciudades sin cambios (omitidas): {len(resumen['omitidos'])}")
+    if archivos_procesados == 0 and not resumen['omitidos']:
+        print("⚠️ ADVERTENCIA: No se procesaron archivos Excel válidos.")
+
+    resumen['ciudades_procesadas'] = archivos_procesados
+    resumen['exito'] = archivos_procesados > 0 or bool(resumen['omitidos'])
+    return resumen
+
+if __name__ == "__main__":
+    # === RUTAS BASE ===
+    ruta_origen = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\2.Limpieza\Resultados_por_Aeropuerto"
+    ruta_destino_raiz = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\3.correspondencia\Datos"
+    ruta_plantillas = r"C:\Users\PAEROCIVIL\Desktop\Automatizacion\AUTOMATIZACION\3.correspondencia\Plantillas"
+
+    # Número de procesos y motor Excel opcionales: python generador_base_script.py 4 openpyxl
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    motor_excel = sys.argv[2] if len(sys.argv) > 2 else None
+
+    generar_base(ruta_origen, ruta_destino_raiz, ruta_plantillas, workers=workers, motor_excel=motor_excel)
@@ -0,0 +1,48 @@
+# ============================================================
+# Huellas de archivos y datos para ejecuciones incrementales
+# ============================================================
+#
+# Los pasos guardan, por unidad de trabajo (aeropuerto, ciudad), la huella de
+# sus entradas y salidas en un registro JSON dentro de Datos/. Si en la
+# siguiente ejecución las huellas coinciden, la unidad se omite.
+
+import os
+import json
+import hashlib
+
+def huella_archivo(ruta, previa=None):
+    """
+    Huella de un archivo: mtime, tamaño y SHA-256 del contenido.
+    Si mtime y tamaño coinciden con la huella previa se reutiliza su hash sin leer el archivo.
+    """
+    st = os.stat(ruta)
+    if previa and previa.get('mtime_ns') == st.st_mtime_ns and previa.get('tamano') == st.st_size:
+        return previa
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloque)
+    return {'mtime_ns': st.st_mtime_ns, 'tamano': st.st_size, 'sha256': sha.hexdigest()}
+
+def huella_datos(datos):
+    """SHA-256 de una estructura JSON (dicts, listas, números, textos) en forma canónica"""
+    texto = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def cargar_registro(ruta, clave):
+    """Lee un registro de huellas; si no existe o está dañado retorna uno vacío con {clave: {}}"""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            registro = json.load(f)
+        if not isinstance(registro.get(clave), dict):
+            registro[clave] = {}
+        return registro
+    except (OSError, ValueError, AttributeError):
+        return {clave: {}}
+
+def guardar_registro(ruta, registro):
+    """Escribe el registro de forma atómica (archivo temporal + reemplazo)"""
+    ruta_tmp = ruta + ".tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_tmp, ruta)
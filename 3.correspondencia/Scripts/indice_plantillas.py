@@ -0,0 +1,126 @@
+# ============================================================
+# Índice de plantillas Word (Plantillas/)
+# ============================================================
+#
+# Lista la carpeta de plantillas UNA vez y resuelve ciudad → plantilla con
+# búsquedas en diccionario. El índice se guarda en disco y se invalida cuando
+# cambia el mtime de la carpeta (altas, bajas o renombres de archivos).
+
+import os
+import re
+import json
+import unicodedata
+
+VERSION_INDICE = 1
+NOMBRE_INDICE = ".indice_plantillas.json"
+
+# Plantilla_AP_<ABREV>_<AÑO>.docx (ya normalizado a mayúsculas)
+PATRON_PLANTILLA = re.compile(r"^PLANTILLA_AP_(.+?)_(\d{4})\.DOCX$")
+
+# Índices ya cargados en este proceso: ruta carpeta → IndicePlantillas
+_indices_en_memoria = {}
+
+def normaliza(texto):
+    texto = texto.upper().strip()
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join([c for c in texto if not unicodedata.combining(c)])
+    return texto
+
+class IndicePlantillas:
+    """
+    Índice de plantillas por abreviatura y por token del nombre normalizado
+    """
+
+    def __init__(self, directorio, mtime_ns, archivos):
+        self.directorio = directorio
+        self.mtime_ns = mtime_ns
+        self.archivos = sorted(a for a in archivos
+                               if a.lower().endswith(".docx") and not a.startswith("~$"))
+        self.nombres_norm = {a: normaliza(a) for a in self.archivos}
+        self.por_abreviatura = {}
+        self.por_token = {}
+
+        años = {}
+        for archivo, nombre_norm in self.nombres_norm.items():
+            m = PATRON_PLANTILLA.match(nombre_norm)
+            if m:
+                abrev, año = m.group(1), int(m.group(2))
+                # Si hay varias versiones de la misma plantilla, gana el año más reciente
+                if año >= años.get(abrev, 0):
+                    años[abrev] = año
+                    self.por_abreviatura[abrev] = archivo
+            for token in re.split(r"[^A-Z0-9]+", nombre_norm):
+                if token:
+                    self.por_token.setdefault(token, archivo)
+
+    @classmethod
+    def construir(cls, directorio):
+        """Lista la carpeta de plantillas y construye el índice"""
+        mtime_ns = os.stat(directorio).st_mtime_ns
+        return cls(directorio, mtime_ns, os.listdir(directorio))
+
+    def a_dict(self):
+        return {'version': VERSION_INDICE, 'directorio': self.directorio,
+                'mtime_ns': self.mtime_ns, 'archivos': self.archivos}
+
+    def ruta(self, archivo):
+        return os.path.join(self.directorio, archivo) if archivo else None
+
+    def buscar(self, ciudad, abreviatura=None):
+        """
+        Retorna la ruta de la plantilla para la ciudad:
+        1. por abreviatura (Plantilla_AP_<ABREV>_<AÑO>.docx)
+        2. por token exacto del nombre de la ciudad o de alguna de sus palabras
+        3. por coincidencia parcial sobre los nombres ya normalizados (sin tocar disco)
+        """
+        if abreviatura and abreviatura.upper() in self.por_abreviatura:
+            return self.ruta(self.por_abreviatura[abreviatura.upper()])
+
+        ciudad = normaliza(ciudad)
+        for palabra in [ciudad] + ciudad.split():
+            if palabra in self.por_token:
+                return self.ruta(self.por_token[palabra])
+
+        for archivo, nombre_norm in self.nombres_norm.items():
+            if ciudad in nombre_norm or any(palabra in nombre_norm for palabra in ciudad.split()):
+                return self.ruta(archivo)
+        return None
+
+def cargar_indice_plantillas(ruta_plantillas, ruta_cache=None):
+    """
+    Obtiene el índice de la carpeta de plantillas, en este orden:
+    memoria del proceso → archivo ruta_cache → listado de la carpeta.
+    Cualquiera de los dos cachés se descarta si el mtime de la carpeta cambió.
+    """
+    if not os.path.exists(ruta_plantillas):
+        raise FileNotFoundError(f"No existe la carpeta de plantillas: {ruta_plantillas}")
+
+    directorio = os.path.abspath(ruta_plantillas)
+    mtime_ns = os.stat(directorio).st_mtime_ns
+
+    indice = _indices_en_memoria.get(directorio)
+    if indice is not None and indice.mtime_ns == mtime_ns:
+        return indice
+
+    indice = None
+    if ruta_cache and os.path.exists(ruta_cache):
+        try:
+            with open(ruta_cache, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if (datos.get('version') == VERSION_INDICE and datos.get('directorio') == directorio
+                    and datos.get('mtime_ns') == mtime_ns):
+                indice = IndicePlantillas(directorio, mtime_ns, datos['archivos'])
+        except (OSError, ValueError, KeyError):
+            indice = None
+
+    if indice is None:
+        indice = IndicePlantillas.construir(directorio)
+        if ruta_cache:
+            try:
+                with open(ruta_cache, 'w', encoding='utf-8') as f:
+                    json.dump(indice.a_dict(), f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                print(f"⚠️ ADVERTENCIA: No se pudo guardar el índice de plantillas: {e}")
+
+    _indices_en_memoria[directorio] = indice
+    return indice
@@ -0,0 +1,88 @@
+# ============================================================
+# Lectura en streaming de los libros de resultados de laboratorio
+# ============================================================
+#
+# Sheet1 de Datos/Resultados_por_Aeropuerto se recorre en modo read_only y solo
+# se materializan las columnas pedidas. La usan el Paso 1 (TABLA_4 y TAGS) y
+# el cálculo del IRCA (motor_irca.py).
+
+import pandas as pd
+from openpyxl import load_workbook
+
+HOJA_ORIGEN = "Sheet1"
+HOJA_TAGS = "TAGS"
+
+RENOMBRES_COLUMNAS = {"PUNTO DE MUESTREO": "PUNTO", "MÉTODO": "METODO"}
+FILAS_BUSQUEDA_ENCABEZADO = 20
+
+def normaliza_columna(nombre):
+    """Nombre de columna normalizado: strip/upper y renombres fijos"""
+    nombre = str(nombre).strip().upper()
+    return RENOMBRES_COLUMNAS.get(nombre, nombre)
+
+def _valor_celda(valor):
+    # Igual que pd.read_excel: los flotantes enteros se leen como int
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+def _leer_filas(hoja, columnas=None, filas_busqueda=FILAS_BUSQUEDA_ENCABEZADO):
+    """
+    Recorre una hoja read_only en streaming. Busca el encabezado en las primeras filas
+    (la primera que contenga todas las columnas pedidas; si ninguna, la primera fila)
+    y materializa solo las columnas pedidas (o todas si columnas es None).
+    Retorna (DataFrame, encabezados normalizados).
+    """
+    hoja.reset_dimensions()  # no confiar en la dimensión declarada por el archivo
+    filas = hoja.iter_rows(values_only=True)
+
+    descartadas = []
+    encabezados = None
+    for fila in filas:
+        nombres = [normaliza_columna(v) if v is not None else None for v in fila]
+        if columnas is None or set(columnas) <= set(nombres):
+            encabezados = nombres
+            break
+        descartadas.append(nombres)
+        if len(descartadas) >= filas_busqueda:
+            break
+    if encabezados is None:
+        if not descartadas:
+            return pd.DataFrame(columns=columnas or []), []
+        # Sin encabezado completo: se usa la primera fila y se vuelve a recorrer la hoja
+        encabezados = descartadas[0]
+        filas = hoja.iter_rows(min_row=2, values_only=True)
+
+    posiciones = {}
+    for i, nombre in enumerate(encabezados):
+        if nombre is not None and nombre not in posiciones:
+            posiciones[nombre] = i
+    seleccion = [(c, posiciones[c]) for c in (columnas if columnas is not None else posiciones) if c in posiciones]
+
+    valores = {c: [] for c, _ in seleccion}
+    for fila in filas:
+        celdas = [fila[i] if i < len(fila) else None for _, i in seleccion]
+        if all(v is None for v in celdas):
+            continue
+        for (c, _), v in zip(seleccion, celdas):
+            valores[c].append(_valor_celda(v))
+
+    return pd.DataFrame(valores), [n for n in encabezados if n is not None]
+
+def leer_hoja_origen(ruta_excel, hoja=HOJA_ORIGEN, columnas=None):
+    """
+    Lee la hoja de resultados de un libro de laboratorio en modo read_only (memoria plana),
+    conservando solo las columnas pedidas (todas si columnas es None), y la hoja TAGS si existe.
+    Retorna (df, columnas_encontradas, df_tags_existente).
+    """
+    libro = load_workbook(ruta_excel, read_only=True, data_only=True)
+    try:
+        if hoja not in libro.sheetnames:
+            raise ValueError(f"Worksheet named '{hoja}' not found")
+        df, columnas_encontradas = _leer_filas(libro[hoja], columnas)
+        df_tags_existente = None
+        if HOJA_TAGS in libro.sheetnames:
+            df_tags_existente, _ = _leer_filas(libro[HOJA_TAGS], ['ETIQUETA', 'VALOR'])
+    finally:
+        libro.close()
+    return df, columnas_encontradas, df_tags_existente
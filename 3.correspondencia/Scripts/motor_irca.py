@@ -0,0 +1,256 @@
+# ============================================================
+# Cálculo del IRCA desde los resultados de laboratorio
+# ============================================================
+#
+# Calcula el IRCA (%) de cada muestra directamente desde la hoja Sheet1 de
+# los libros de Datos/Resultados_por_Aeropuerto, sin depender del IRCA(%).csv
+# producido aparte. Resolución 2115 de 2007:
+#
+#   IRCA (%) = Σ puntaje de riesgo de las características no aceptables
+#              / Σ puntaje de riesgo de las características analizadas × 100
+#
+# Columnas usadas de Sheet1:
+#   RESULTADO_CRUDO   '1,53 +/- 0,0465', '<9,90', '>150', 'Ausente'...
+#   2115 DE 2007      valor máximo aceptable ('250', '6,5 - 9,0', '≤ 2', 'Ausente', 'n/a')
+#   ASIGNACION IRCA   puntaje de riesgo de la característica
+#   FECHA, MES, CIUDAD, PUNTO, CODIGO
+# (LÍMITE es el límite de detección del método y solo se muestra en TABLA_4.)
+#
+# Todo el cálculo es por columnas: límites y puntajes se interpretan una vez
+# por característica distinta y llegan a las filas con un merge, el
+# incumplimiento sale de comparaciones NumPy y la suma ponderada por muestra
+# (ciudad, punto, código) de TODOS los aeropuertos de un único groupby().sum().
+# El resultado tiene las columnas del CSV (ver datos_irca.tipar_irca) más el
+# puntaje analizado de cada muestra; IRCAAutomationSystem.cargar_datos_irca
+# lo acepta tal cual como DataFrame.
+#
+# Los libros de laboratorio no traen las características medidas en campo
+# (pH y cloro residual libre), así que su puntaje analizado queda por debajo
+# del total de la norma y el IRCA no coincide con el reportado en el CSV.
+# cargar_irca_laboratorio() rechaza esos cálculos en lugar de entregarlos, y
+# la aplicación sigue leyendo el IRCA del CSV hasta que los libros las traigan.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from datos_irca import COLUMNAS_IRCA, tipar_irca
+from parseo_numerico import (interpretar_valores, a_numero, texto_normalizado, PATRON_NUMERO,
+                             CALIFICADOR_BAJO_LIMITE, CALIFICADOR_SOBRE_LIMITE, CALIFICADOR_PRESENTE)
+from lector_excel import leer_hoja_origen
+
+VERSION_MOTOR = 2
+
+COLUMNA_NORMA = '2115 DE 2007'
+COLUMNA_PUNTAJE = 'ASIGNACION IRCA'
+COLUMNAS_LABORATORIO = ['FECHA', 'MES', 'CIUDAD', 'PUNTO', 'CODIGO', 'PARÁMETRO',
+                        'RESULTADO_CRUDO', COLUMNA_NORMA, COLUMNA_PUNTAJE]
+COLUMNAS_MUESTRA = ['CIUDAD', 'PUNTO', 'CODIGO']
+COLUMNA_PUNTAJE_ANALIZADO = 'Puntaje analizado'
+
+# Suma de los puntajes de riesgo de todas las características de la Resolución 2115
+# (Art. 13); con menos puntaje analizado el IRCA no es comparable con el reportado
+PUNTAJE_TOTAL_IRCA = 100.0
+
+# Rango de valores aceptables: '6,5 - 9,0', '6,5 a 9,0'
+PATRON_RANGO = rf'^\s*({PATRON_NUMERO})\s*(?:-|–|a|y)\s*({PATRON_NUMERO})\s*$'
+
+# Cálculos ya hechos en este proceso: carpeta → (firma de los libros, DataFrame)
+_calculos_en_memoria = {}
+
+def interpretar_limites(valores):
+    """
+    Límites normativos → DataFrame con columnas:
+      minimo, maximo             float (NaN = sin cota)
+      minimo_estricto, maximo_estricto  bool ('>x' / '<x' excluyen el propio x)
+    Un número solo es el valor máximo aceptable; 'a - b' es un rango cerrado;
+    'Ausente' equivale a máximo 0; 'n/a' o vacío no tiene límite.
+    """
+    texto = texto_normalizado(valores)
+    n = len(texto)
+    minimo = np.full(n, np.nan)
+    maximo = np.full(n, np.nan)
+    minimo_estricto = np.zeros(n, dtype=bool)
+    maximo_estricto = np.zeros(n, dtype=bool)
+
+    rango = texto.str.extract(PATRON_RANGO)
+    es_rango = rango[0].notna().to_numpy()
+    minimo[es_rango] = a_numero(rango.loc[es_rango, 0]).to_numpy()
+    maximo[es_rango] = a_numero(rango.loc[es_rango, 1]).to_numpy()
+
+    simples = interpretar_valores(valores)
+    cota = simples['valor'].to_numpy(copy=True)
+    calificador = simples['calificador'].to_numpy()
+    simple = ~es_rango & ~np.isnan(cota)
+    es_minimo = simple & (calificador == CALIFICADOR_SOBRE_LIMITE)
+    es_maximo = simple & ~es_minimo
+    minimo[es_minimo] = cota[es_minimo]
+    maximo[es_maximo] = cota[es_maximo]
+    # '>x' y '<x' excluyen x; '>=', '≥', '<=', '≤' lo incluyen
+    minimo_estricto[es_minimo] = texto[es_minimo].str.match(r'^\s*>(?!=)').to_numpy()
+    maximo_estricto[es_maximo] = texto[es_maximo].str.match(r'^\s*<(?!=)').to_numpy()
+
+    return pd.DataFrame({'minimo': minimo, 'maximo': maximo,
+                         'minimo_estricto': minimo_estricto, 'maximo_estricto': maximo_estricto},
+                        index=valores.index)
+
+def interpretar_resultados(valores):
+    """
+    Resultados crudos → DataFrame con columnas:
+      valor    float (primer número: '1,53 +/- 0,0465' → 1.53; NaN si no es interpretable)
+      censura  int8: -1 '<x' (bajo el límite de detección), +1 '>x', 0 valor medido
+    'Ausente' vale 0 y 'Presente' (detectado sin cuantificar) +inf.
+    """
+    interpretados = interpretar_valores(valores)
+    calificador = interpretados['calificador'].to_numpy()
+    valor = interpretados['valor'].to_numpy(copy=True)
+    valor[calificador == CALIFICADOR_PRESENTE] = np.inf
+    censura = np.select([calificador == CALIFICADOR_BAJO_LIMITE, calificador == CALIFICADOR_SOBRE_LIMITE],
+                        [-1, 1], 0).astype(np.int8)
+    return pd.DataFrame({'valor': valor, 'censura': censura}, index=valores.index)
+
+def marcar_incumplimientos(resultados, limites):
+    """
+    Arreglo bool: True donde el resultado está fuera del límite con certeza.
+    - Valor medido: fuera de [mínimo, máximo] (respetando cotas estrictas).
+    - '<x': el valor real es menor que x; solo puede incumplir un mínimo (x ≤ mínimo).
+    - '>x': el valor real es mayor que x; solo puede incumplir un máximo (x ≥ máximo).
+    Comparaciones con NaN (sin límite o sin resultado) dan False.
+    """
+    valor = resultados['valor'].to_numpy(dtype=float)
+    censura = resultados['censura'].to_numpy()
+    minimo = limites['minimo'].to_numpy(dtype=float)
+    maximo = limites['maximo'].to_numpy(dtype=float)
+    min_estricto = limites['minimo_estricto'].to_numpy(dtype=bool)
+    max_estricto = limites['maximo_estricto'].to_numpy(dtype=bool)
+
+    with np.errstate(invalid='ignore'):
+        sobre_maximo = np.where(max_estricto, valor >= maximo, valor > maximo)
+        bajo_minimo = np.where(min_estricto, valor <= minimo, valor < minimo)
+    return ((censura == 0) & (sobre_maximo | bajo_minimo)
+            | (censura < 0) & (valor <= minimo)
+            | (censura > 0) & (valor >= maximo))
+
+def caracteristicas_normativas(df):
+    """
+    Límites y puntaje de riesgo interpretados una sola vez por característica distinta
+    (texto del límite '2115 DE 2007' + texto de 'ASIGNACION IRCA'). Retorna la tabla
+    de características (clave + columnas de interpretar_limites + 'puntaje').
+    """
+    clave = pd.DataFrame({COLUMNA_NORMA: texto_normalizado(df[COLUMNA_NORMA]),
+                          COLUMNA_PUNTAJE: texto_normalizado(df[COLUMNA_PUNTAJE])})
+    tabla = clave.drop_duplicates(ignore_index=True)
+    limites = interpretar_limites(tabla[COLUMNA_NORMA])
+    return pd.concat([tabla, limites, a_numero(tabla[COLUMNA_PUNTAJE]).rename('puntaje')], axis=1)
+
+def calcular_irca(df):
+    """
+    IRCA (%) por muestra (CIUDAD, PUNTO, CODIGO) de los resultados de laboratorio
+    de uno o varios aeropuertos. Retorna un DataFrame con las columnas de
+    IRCA(%).csv, tipado como datos_irca.leer_csv_irca, en el orden de aparición,
+    más COLUMNA_PUNTAJE_ANALIZADO (denominador de cada muestra).
+    Entran al cálculo las filas con resultado, puntaje y algún límite interpretables.
+    """
+    faltan = [c for c in COLUMNAS_LABORATORIO if c not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas para calcular el IRCA: {faltan}")
+
+    claves = pd.DataFrame({c: df[c].astype('string').str.strip() for c in COLUMNAS_MUESTRA})
+    validas = claves.notna().all(axis=1).to_numpy()
+    df, claves = df[validas], claves[validas]
+    if df.empty:
+        return tipar_irca(pd.DataFrame(columns=COLUMNAS_IRCA + [COLUMNA_PUNTAJE_ANALIZADO]))
+
+    # Límite y puntaje de cada fila: merge con la tabla de características distintas
+    caracteristicas = caracteristicas_normativas(df)
+    normativa = pd.DataFrame({COLUMNA_NORMA: texto_normalizado(df[COLUMNA_NORMA]).to_numpy(),
+                              COLUMNA_PUNTAJE: texto_normalizado(df[COLUMNA_PUNTAJE]).to_numpy()})
+    normativa = normativa.merge(caracteristicas, on=[COLUMNA_NORMA, COLUMNA_PUNTAJE], how='left')
+
+    resultados = interpretar_resultados(df['RESULTADO_CRUDO'].reset_index(drop=True))
+    incumple = marcar_incumplimientos(resultados, normativa)
+    puntaje = normativa['puntaje'].to_numpy()
+    analizada = (~np.isnan(resultados['valor'].to_numpy()) & ~np.isnan(puntaje)
+                 & normativa[['minimo', 'maximo']].notna().any(axis=1).to_numpy())
+    peso = np.where(analizada, puntaje, 0.0)
+
+    # Una muestra = combinación (ciudad, punto, código); sumas de todas las muestras a la vez,
+    # en orden de aparición (igual que las primeras filas de cada muestra)
+    sumas = (pd.DataFrame({'total': peso, 'no_aceptable': np.where(incumple, peso, 0.0)})
+               .groupby([claves[c].to_numpy() for c in COLUMNAS_MUESTRA], sort=False).sum())
+    total = sumas['total'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        irca = np.where(total > 0, sumas['no_aceptable'].to_numpy() / total * 100, np.nan)
+
+    # Fecha, mes y claves de la primera fila de cada muestra
+    primera = ~claves.duplicated().to_numpy()
+    filas, claves = df[primera], claves[primera]
+    resultado = pd.DataFrame({
+        'Fecha': pd.to_datetime(filas['FECHA'].astype(object), errors='coerce').to_numpy(),
+        'Mes': filas['MES'].astype(object).to_numpy(),
+        'Codigo': claves['CODIGO'].astype(object).to_numpy(),
+        'Ciudad': claves['CIUDAD'].astype(object).to_numpy(),
+        'Punto de Muestreo': claves['PUNTO'].astype(object).to_numpy(),
+        'IRCA (%)': np.round(irca, 2),
+        COLUMNA_PUNTAJE_ANALIZADO: total,
+    })
+    return tipar_irca(resultado)
+
+def verificar_puntaje_completo(df, puntaje_total=PUNTAJE_TOTAL_IRCA):
+    """
+    Lanza ValueError si alguna muestra se calculó con menos puntaje que el total de la
+    norma (faltan características, p. ej. las medidas en campo)
+    """
+    puntaje = df[COLUMNA_PUNTAJE_ANALIZADO].to_numpy(dtype=float)
+    incompletas = ~(puntaje >= puntaje_total - 1e-9)
+    if incompletas.any():
+        raise ValueError(
+            f"IRCA de laboratorio incompleto: {int(incompletas.sum())} de {len(df)} muestras "
+            f"con puntaje analizado menor a {puntaje_total:g} (mínimo {puntaje[incompletas].min():g}). "
+            f"Faltan características en los libros de resultados; use la fuente IRCA 'csv'")
+
+def _libros_laboratorio(carpeta):
+    return sorted(os.path.join(carpeta, a) for a in os.listdir(carpeta)
+                  if a.lower().endswith(('.xlsx', '.xlsm')) and not a.startswith('~$'))
+
+def leer_resultados_laboratorio(carpeta):
+    """Concatena Sheet1 (columnas del cálculo) de todos los libros de la carpeta"""
+    hojas = []
+    for ruta in _libros_laboratorio(carpeta):
+        try:
+            df, _, _ = leer_hoja_origen(ruta, columnas=COLUMNAS_LABORATORIO)
+        except Exception as e:
+            print(f"⚠️ ADVERTENCIA: No se pudo leer {os.path.basename(ruta)}: {e}")
+            continue
+        hojas.append(df)
+    if not hojas:
+        return pd.DataFrame(columns=COLUMNAS_LABORATORIO)
+    return pd.concat(hojas, ignore_index=True)
+
+def firma_carpeta(carpeta):
+    firma = [VERSION_MOTOR]
+    for ruta in _libros_laboratorio(carpeta):
+        estado = os.stat(ruta)
+        firma.append((os.path.basename(ruta), estado.st_mtime_ns, estado.st_size))
+    return firma
+
+def cargar_irca_laboratorio(carpeta, exigir_completo=True):
+    """
+    IRCA calculado para todos los libros de la carpeta de resultados.
+    Se recalcula solo si cambió algún libro (nombre, mtime o tamaño).
+    Con exigir_completo (por defecto) lanza ValueError si alguna muestra no tiene
+    todas las características de la norma (ver verificar_puntaje_completo).
+    El DataFrame es compartido: quien lo modifique debe trabajar sobre una copia.
+    """
+    carpeta = os.path.abspath(carpeta)
+    firma = firma_carpeta(carpeta)
+    en_memoria = _calculos_en_memoria.get(carpeta)
+    if en_memoria is not None and en_memoria[0] == firma:
+        df = en_memoria[1]
+    else:
+        df = calcular_irca(leer_resultados_laboratorio(carpeta))
+        _calculos_en_memoria[carpeta] = (firma, df)
+    if exigir_completo:
+        verificar_puntaje_completo(df)
+    return df
@@ -0,0 +1,143 @@
+# ============================================================
+# Interpretación numérica de columnas de texto (formato colombiano)
+# ============================================================
+#
+# Un único parser vectorizado para los valores que llegan como texto:
+#   '15,00%'            → 15.0   (porcentaje)
+#   '1,53 +/- 0,0465'   → 1.53   (se toma el primer número)
+#   '<0,5' / '≤0,5'     → 0.5    con calificador BAJO_LIMITE
+#   '>150'              → 150.0  con calificador SOBRE_LIMITE
+#   'Ausente'           → 0.0    con calificador AUSENTE
+#   'Presente'          → NaN    con calificador PRESENTE
+#   'n/a', '-', vacío   → NaN    con calificador SIN_DATO
+#   cualquier otro texto → NaN   con calificador INVALIDO
+# La coma y el punto se aceptan como separador decimal.
+#
+# La escala de los porcentajes (0-1 o 0-100) se decide por COLUMNA, no por
+# valor: si algún valor trae '%' la columna ya está en 0-100; si no trae
+# ninguno y todos los valores están entre 0 y 1, es una fracción (celdas de
+# Excel con formato porcentaje) y se multiplica por 100. Una columna leída por
+# bloques acumula esa evidencia con evidencia_escala() para decidir igual que
+# si se hubiera leído completa.
+
+import numpy as np
+import pandas as pd
+
+CALIFICADOR_VALOR = 0
+CALIFICADOR_BAJO_LIMITE = 1
+CALIFICADOR_SOBRE_LIMITE = 2
+CALIFICADOR_AUSENTE = 3
+CALIFICADOR_PRESENTE = 4
+CALIFICADOR_SIN_DATO = 5
+CALIFICADOR_INVALIDO = 6
+
+NOMBRES_CALIFICADORES = {
+    CALIFICADOR_VALOR: 'valor',
+    CALIFICADOR_BAJO_LIMITE: 'bajo límite',
+    CALIFICADOR_SOBRE_LIMITE: 'sobre límite',
+    CALIFICADOR_AUSENTE: 'ausente',
+    CALIFICADOR_PRESENTE: 'presente',
+    CALIFICADOR_SIN_DATO: 'sin dato',
+    CALIFICADOR_INVALIDO: 'inválido',
+}
+
+# Número con coma o punto decimal
+PATRON_NUMERO = r'[-+]?(?:\d+(?:[.,]\d+)?|[.,]\d+)'
+# Operador opcional al inicio y primer número: '<0,5', '≥ 2', '1,53 +/- 0,04'
+PATRON_VALOR = rf'^\s*(<=|>=|≤|≥|<|>)?\s*({PATRON_NUMERO})'
+
+OPERADORES_BAJO = ['<', '<=', '≤']
+OPERADORES_SOBRE = ['>', '>=', '≥']
+
+TEXTOS_AUSENTE = {'ausente', 'ausencia', 'negativo', 'no detectado', 'nd', 'n.d.'}
+TEXTOS_PRESENTE = {'presente', 'presencia', 'positivo', 'detectado'}
+TEXTOS_SIN_DATO = {'', 'n/a', 'na', 'n.a.', 'nan', 'none', '-', '--', 's/d'}
+
+def texto_normalizado(valores):
+    """Series de texto en minúsculas y sin espacios sobrantes ('' para nulos)"""
+    return valores.astype(object).where(valores.notna(), '').astype(str).str.strip().str.lower()
+
+def a_numero(texto):
+    """Series de texto numérico ('9,90', '0.5') → float (NaN si no es un número)"""
+    return pd.to_numeric(texto.str.replace(',', '.', regex=False), errors='coerce').astype(float)
+
+def interpretar_valores(valores):
+    """
+    Interpreta una columna completa. Retorna un DataFrame con el mismo índice:
+      valor        float
+      calificador  int8 (CALIFICADOR_*)
+      porcentaje   bool (el texto traía '%')
+    """
+    if pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        valor = valores.astype(float).to_numpy(copy=True)
+        calificador = np.where(np.isnan(valor), CALIFICADOR_SIN_DATO, CALIFICADOR_VALOR).astype(np.int8)
+        return pd.DataFrame({'valor': valor, 'calificador': calificador,
+                             'porcentaje': np.zeros(len(valor), dtype=bool)}, index=valores.index)
+
+    texto = texto_normalizado(valores)
+    porcentaje = texto.str.contains('%', regex=False).to_numpy()
+    extraido = texto.str.replace('%', '', regex=False).str.extract(PATRON_VALOR)
+    valor = a_numero(extraido[1]).to_numpy(copy=True)
+    operador = extraido[0].fillna('').to_numpy()
+
+    calificador = np.full(len(texto), CALIFICADOR_INVALIDO, dtype=np.int8)
+    numerico = ~np.isnan(valor)
+    calificador[numerico] = CALIFICADOR_VALOR
+    calificador[numerico & np.isin(operador, OPERADORES_BAJO)] = CALIFICADOR_BAJO_LIMITE
+    calificador[numerico & np.isin(operador, OPERADORES_SOBRE)] = CALIFICADOR_SOBRE_LIMITE
+
+    for textos, codigo, fijo in ((TEXTOS_AUSENTE, CALIFICADOR_AUSENTE, 0.0),
+                                 (TEXTOS_PRESENTE, CALIFICADOR_PRESENTE, np.nan),
+                                 (TEXTOS_SIN_DATO, CALIFICADOR_SIN_DATO, np.nan)):
+        mascara = texto.isin(textos).to_numpy()
+        calificador[mascara] = codigo
+        valor[mascara] = fijo
+
+    return pd.DataFrame({'valor': valor, 'calificador': calificador, 'porcentaje': porcentaje},
+                        index=valores.index)
+
+def escala_porcentaje(valores, con_signo=False):
+    """
+    Factor para llevar una columna numérica a 0-100: 1 si traía '%' (con_signo) o si algún
+    valor supera 1; 100 si todos los valores están entre 0 y 1 (fracciones).
+    """
+    valores = np.asarray(valores, dtype=float)
+    numericos = valores[~np.isnan(valores)]
+    if con_signo or len(numericos) == 0:
+        return 1.0
+    return 100.0 if ((numericos >= 0) & (numericos <= 1)).all() else 1.0
+
+def evidencia_escala(valores, previa=(False, False)):
+    """
+    Acumula, bloque a bloque, la evidencia de escala de una columna de porcentajes:
+    (algún valor traía '%', algún valor numérico fuera de 0-1). Con cualquiera de las
+    dos la escala ya es 1 y los bloques siguientes no se vuelven a interpretar.
+    """
+    if any(previa):
+        return previa
+    interpretados = interpretar_valores(valores)
+    valor = interpretados['valor'].where(interpretados['calificador'] == CALIFICADOR_VALOR)
+    return bool(interpretados['porcentaje'].any()), bool(((valor < 0) | (valor > 1)).any())
+
+def escala_de_evidencia(evidencia):
+    """Factor de escala (1 o 100) según la evidencia acumulada con evidencia_escala()"""
+    return 1.0 if any(evidencia) else 100.0
+
+def interpretar_porcentajes(valores, escala=None):
+    """
+    Columna de porcentajes ('15,00%', 0.15, '15') → DataFrame con el mismo índice:
+      valor        float en escala 0-100 (NaN si el calificador no es CALIFICADOR_VALOR)
+      calificador  int8 (CALIFICADOR_*)
+    escala: factor ya decidido para la columna completa (lectura por bloques); por
+    defecto se decide con escala_porcentaje sobre estos valores.
+    """
+    interpretados = interpretar_valores(valores)
+    valor = interpretados['valor'].where(interpretados['calificador'] == CALIFICADOR_VALOR)
+    if escala is None:
+        escala = escala_porcentaje(valor, interpretados['porcentaje'].any())
+    return pd.DataFrame({'valor': valor * escala, 'calificador': interpretados['calificador']},
+                        index=valores.index)
+
+def a_porcentaje(valores, escala=None):
+    """Columna de porcentajes ('15,00%', 0.15, '15') → float en escala 0-100 (NaN si no es numérico)"""
+    return interpretar_porcentajes(valores, escala)['valor'].rename(valores.name)
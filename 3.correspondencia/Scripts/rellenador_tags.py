@@ -12,23 +12,46 @@ Versión: 2.0 Simplificada
 """
 
 import pandas as pd
+import io
 import os
 import re
+import sys
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import calendar
+import shutil
+
+from escritor_excel import escribir_libro, reemplazar_hoja
+from datos_irca import leer_csv_irca, con_porcentajes, MES_A_NUMERO
+from huellas import huella_archivo, huella_datos, cargar_registro, guardar_registro
+
+# === HUELLAS DEL PASO 2 ===
+# Cambiar la versión invalida las huellas y obliga a reprocesar todas las ciudades
+VERSION_RELLENADOR = "2.2"
+NOMBRE_HUELLAS = ".paso2_huellas.json"
+
+# Salidas del modo por lotes: <Ciudad>/periodos/<Año>-<MM>/base_<Ciudad>.xlsx
+CARPETA_PERIODOS = "periodos"
 
 class IRCAAutomationSystem:
     """
     Sistema simplificado de automatización para actualización de datos IRCA
     """
     
-    def __init__(self, base_path: str, irca_file: str):
+    def __init__(self, base_path: str, irca_file: str, motor_excel: Optional[str] = None):
         self.base_path = Path(base_path)
         self.irca_file = Path(irca_file)
+        self.motor_excel = motor_excel  # 'xlsxwriter' | 'openpyxl' | None (por defecto)
         self.irca_data = None
         self.irca_dict = {}
+        self.total_aeropuertos = 0
+        self.aeropuertos_exitosos = 0
+        self.aeropuertos_omitidos = 0
+        self.codigos_tags = {}  # carpeta de ciudad → códigos cod_1..cod_4 escritos en su TAGS
+        self.indice_ciudades = None  # clave de ciudad normalizada → datos de la ciudad (ver construir_indice_ciudades)
         
         # Etiquetas válidas según especificaciones (nro como primera, clasificaciones agregadas)
         self.etiquetas_validas = {
@@ -112,23 +135,46 @@ class IRCAAutomationSystem:
         base = 10 if "barranquilla" in ciudad_normalizada.lower() else 25
         return base + diferencia
 
-    def cargar_datos_irca(self) -> bool:
-        """Carga los datos del archivo IRCA(%).xlsx"""
+    def cargar_datos_irca(self, datos=None, mes: Optional[str] = None, año: Optional[int] = None) -> bool:
+        """
+        Carga los datos IRCA desde:
+        - un DataFrame ya filtrado y tipado (entrega directa desde la app, sin archivos intermedios)
+        - un archivo Feather/Arrow (.feather / .arrow) si hay un límite de proceso
+        - el CSV IRCA(%).csv; con mes/año solo se conservan las filas de ese periodo (lectura por bloques)
+        - el archivo IRCA(%).xlsx (comportamiento original)
+        La columna IRCA (%) queda en float 0-100 al cargar: las fuentes tipadas ya vienen
+        así; el Excel y los DataFrames con texto se interpretan aquí con el mismo parser
+        (datos_irca.con_porcentajes), que agrega también la columna IRCA calificador.
+        """
         try:
-            self.irca_data = pd.read_excel(self.irca_file)
+            if isinstance(datos, pd.DataFrame):
+                self.irca_data = datos.reset_index(drop=True)
+            else:
+                ruta = Path(datos) if datos is not None else self.irca_file
+                if ruta.suffix.lower() in ('.feather', '.arrow'):
+                    self.irca_data = pd.read_feather(ruta)
+                elif ruta.suffix.lower() == '.csv':
+                    self.irca_data = leer_csv_irca(ruta, mes=mes, año=año)
+                else:
+                    # En Excel las celdas con formato porcentaje llegan como fracción 0-1
+                    self.irca_data = con_porcentajes(pd.read_excel(ruta))
+            if not pd.api.types.is_float_dtype(self.irca_data['IRCA (%)']):
+                self.irca_data = con_porcentajes(self.irca_data)
             # Crear diccionario para búsqueda rápida
             self.irca_dict = dict(zip(
                 self.irca_data['Codigo'].astype(str),
                 self.irca_data['IRCA (%)']
             ))
+            # Datos de todas las ciudades en una sola pasada sobre el IRCA
+            self.construir_indice_ciudades()
             return True
         except Exception as e:
             print(f"Error cargando datos IRCA: {str(e)}")
             return False
 
     def obtener_carpetas_ciudades(self) -> List[Path]:
-        """Obtiene lista de carpetas que corresponden a ciudades"""
-        return [item for item in self.base_path.iterdir() if item.is_dir()]
+        """Obtiene lista de carpetas que corresponden a ciudades (las ocultas, como .cache_fotos, no)"""
+        return [item for item in self.base_path.iterdir() if item.is_dir() and not item.name.startswith('.')]
 
     def encontrar_archivo_base(self, carpeta_ciudad: Path) -> Optional[Path]:
         """Encuentra el archivo Base_ciudad.xlsx en la carpeta especificada"""
@@ -141,14 +187,14 @@ class IRCAAutomationSystem:
 
     def buscar_irca_por_codigo(self, codigo: str) -> Optional[float]:
         """Busca el valor IRCA para un código específico"""
-        valor_bruto = self.irca_dict.get(str(codigo))
-        if valor_bruto is not None:
-            return self.convertir_a_porcentaje(valor_bruto)
+        valor = self.irca_dict.get(str(codigo))
+        if valor is not None:
+            return 0.0 if pd.isna(valor) else float(valor)
         return None
 
-    def obtener_datos_ciudad_desde_irca(self, nombre_ciudad: str) -> Dict:
-        """Obtiene los datos específicos de una ciudad desde el archivo IRCA, mapeando por número de punto."""
-        datos_ciudad = {
+    @staticmethod
+    def _datos_ciudad_vacios() -> Dict:
+        return {
             'codigos_encontrados': [],
             'puntos_muestreo': [],
             'valores_irca': [],
@@ -156,57 +202,97 @@ class IRCAAutomationSystem:
             'año': '',
             'fecha_mu': '',
             'dia_mu': '',
-            'puntos_dict': {}  # Nuevo: mapeo por número de punto
+            'puntos_dict': {}  # Mapeo por número de punto
         }
-        
-        # Normalizar nombre de ciudad para búsqueda
-        nombre_normalizado = self.normalizar_nombre_ciudad(nombre_ciudad)
-        
-        # Filtrar datos por ciudad
-        mask_ciudad = self.irca_data['Ciudad'].str.upper().str.contains(
-            nombre_normalizado.upper(), na=False, regex=False
-        )
-        datos_ciudad_irca = self.irca_data[mask_ciudad]
-        
-        if not datos_ciudad_irca.empty:
-            # Tomar el registro más reciente
-            datos_recientes = datos_ciudad_irca.sort_values('Fecha', ascending=False).iloc[0]
-            
-            # Extraer información temporal
-            if pd.notna(datos_recientes['Fecha']):
-                fecha = pd.to_datetime(datos_recientes['Fecha'])
-                datos_ciudad['fecha_mu'] = fecha.strftime('%Y-%m-%d')
-                # Convertir mes a nombre textual
-                meses = {
-                    1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril',
-                    5: 'mayo', 6: 'junio', 7: 'julio', 8: 'agosto',
-                    9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
-                }
-                datos_ciudad['mes'] = meses[fecha.month]
-                datos_ciudad['año'] = fecha.strftime('%Y')
-                datos_ciudad['dia_mu'] = self.formatear_fecha_textual(fecha)
-            
-            # Obtener todos los puntos de muestreo para esta ciudad
-            for _, row in datos_ciudad_irca.iterrows():
-                if pd.notna(row['Codigo']) and pd.notna(row['Punto de Muestreo']):
-                    codigo = str(row['Codigo'])
-                    punto = str(row['Punto de Muestreo'])
-                    valor_irca = self.convertir_a_porcentaje(row['IRCA (%)'])
-                    datos_ciudad['codigos_encontrados'].append(codigo)
-                    datos_ciudad['puntos_muestreo'].append(punto)
-                    datos_ciudad['valores_irca'].append(valor_irca)
-                    # Detectar número de punto (p1, p2, p3, p4, 01, 02, etc.)
-                    match = re.search(r'(?:^|[^a-zA-Z])p(?:to)?[_\- ]?([1-4]|0[1-4])', punto, re.IGNORECASE)
-                    if match:
-                        num = match.group(1)
-                        # Normalizar a 1-4
-                        num_norm = str(int(num))
-                        datos_ciudad['puntos_dict'][num_norm] = {
-                            'codigo': codigo,
-                            'punto': punto,
-                            'irca': valor_irca
-                        }
-        return datos_ciudad
+
+    def _resumir_ciudades(self, df: pd.DataFrame, claves: pd.Series) -> Dict[str, Dict]:
+        """
+        Calcula los datos de cada ciudad (clave) de df en una sola pasada vectorizada:
+        registro más reciente, listas de códigos/puntos/IRCA y mapeo por número de punto.
+        """
+        resumen = {clave: self._datos_ciudad_vacios() for clave in claves.dropna().unique()}
+        if not resumen:
+            return resumen
+
+        # Registro más reciente por ciudad (fecha mayor; sin fecha va al final)
+        fechas = pd.to_datetime(df['Fecha'], errors='coerce')
+        orden = fechas.sort_values(ascending=False, kind='stable', na_position='last').index
+        recientes = claves.loc[orden].dropna().drop_duplicates()
+        meses = {
+            1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril',
+            5: 'mayo', 6: 'junio', 7: 'julio', 8: 'agosto',
+            9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
+        }
+        for indice, clave in recientes.items():
+            fecha = fechas.loc[indice]
+            if pd.notna(fecha):
+                datos = resumen[clave]
+                datos['fecha_mu'] = fecha.strftime('%Y-%m-%d')
+                datos['mes'] = meses[fecha.month]
+                datos['año'] = fecha.strftime('%Y')
+                datos['dia_mu'] = self.formatear_fecha_textual(fecha)
+
+        # Puntos de muestreo: todas las filas con código y punto, en el orden del archivo
+        validos = df['Codigo'].notna() & df['Punto de Muestreo'].notna() & claves.notna()
+        puntos = pd.DataFrame({
+            'clave': claves[validos],
+            'codigo': df.loc[validos, 'Codigo'].astype(str),
+            'punto': df.loc[validos, 'Punto de Muestreo'].astype(str),
+            'irca': df.loc[validos, 'IRCA (%)'].astype(float).fillna(0.0),
+        })
+        for clave, grupo in puntos.groupby('clave', sort=False, observed=True):
+            datos = resumen[clave]
+            datos['codigos_encontrados'] = grupo['codigo'].tolist()
+            datos['puntos_muestreo'] = grupo['punto'].tolist()
+            datos['valores_irca'] = grupo['irca'].tolist()
+
+        # Número de punto (p1, p2, pto_3, 04...) con un solo str.extract; gana la última fila
+        num = puntos['punto'].str.extract(self.PATRON_NUMERO_PUNTO, flags=re.IGNORECASE, expand=False)
+        puntos = puntos.assign(num=num).dropna(subset=['num'])
+        puntos['num'] = puntos['num'].astype(int).astype(str)
+        tabla = (puntos.drop_duplicates(subset=['clave', 'num'], keep='last')
+                       .pivot(index='clave', columns='num', values=['codigo', 'punto', 'irca']))
+        for clave, fila in tabla.iterrows():
+            resumen[clave]['puntos_dict'] = {
+                num: {'codigo': fila[('codigo', num)], 'punto': fila[('punto', num)], 'irca': fila[('irca', num)]}
+                for num in sorted(tabla.columns.get_level_values('num').unique())
+                if pd.notna(fila[('codigo', num)])
+            }
+        return resumen
+
+    # Número de punto en 'Punto de Muestreo' (p1, P2., pto_3, p-04...)
+    PATRON_NUMERO_PUNTO = r'(?:^|[^a-zA-Z])p(?:to)?[_\- ]?([1-4]|0[1-4])'
+
+    def clave_ciudad(self, nombre) -> str:
+        """Clave canónica de ciudad (minúsculas, sin tildes, sin espacios sobrantes)"""
+        return self.normalizar_nombre_ciudad(str(nombre)).strip()
+
+    def construir_indice_ciudades(self) -> None:
+        """Precalcula los datos de todas las ciudades del IRCA (costo O(filas) total)"""
+        ciudades = self.irca_data['Ciudad']
+        mapa_claves = {c: self.clave_ciudad(c) for c in ciudades.dropna().unique()}
+        self.claves_ciudad = ciudades.map(mapa_claves)
+        self.indice_ciudades = self._resumir_ciudades(self.irca_data, self.claves_ciudad)
+
+    def obtener_datos_ciudad_desde_irca(self, nombre_ciudad: str) -> Dict:
+        """Obtiene los datos específicos de una ciudad desde el índice IRCA, mapeando por número de punto."""
+        if self.indice_ciudades is None:
+            self.construir_indice_ciudades()
+
+        clave = self.clave_ciudad(nombre_ciudad)
+        if clave in self.indice_ciudades:
+            return self.indice_ciudades[clave]
+
+        # Coincidencia parcial (nombre de carpeta contenido en el nombre del IRCA)
+        coincidencias = [k for k in self.indice_ciudades if clave in k]
+        if len(coincidencias) == 1:
+            return self.indice_ciudades[coincidencias[0]]
+        if coincidencias:
+            # Varias ciudades del IRCA contienen el nombre: se resumen juntas
+            mascara = self.claves_ciudad.isin(coincidencias)
+            claves = self.claves_ciudad[mascara].map(lambda _: clave)
+            return self._resumir_ciudades(self.irca_data[mascara], claves)[clave]
+        return self._datos_ciudad_vacios()
 
     def formatear_fecha_textual(self, fecha: pd.Timestamp) -> str:
         """Convierte una fecha a formato textual en español"""
@@ -222,19 +308,6 @@ class IRCAAutomationSystem:
         
         return f"{dia} de {mes} de {año}"
 
-    def convertir_a_porcentaje(self, valor_irca) -> float:
-        """Convierte el valor IRCA al formato de porcentaje correcto"""
-        if pd.isna(valor_irca):
-            return 0.0
-        
-        valor = float(valor_irca)
-        
-        # Si el valor está entre 0 y 1, probablemente es decimal (0.48)
-        if 0 <= valor <= 1:
-            return valor * 100
-        
-        return valor
-
     def normalizar_nombre_ciudad(self, nombre: str) -> str:
         """Normaliza el nombre de la ciudad para búsquedas más flexibles"""
         reemplazos = {
@@ -373,6 +446,23 @@ class IRCAAutomationSystem:
         
         return df_resultado
 
+    def guardar_tags(self, archivo_base: Path, df_actualizado: pd.DataFrame, ciudad: str) -> None:
+        """Guarda TAGS: se reemplaza solo esa hoja dentro del .xlsx (resto del libro intacto)"""
+        if not reemplazar_hoja(archivo_base, 'TAGS', df_actualizado):
+            # Libro sin hoja TAGS reemplazable: reescritura completa
+            hojas_existentes = {}
+            try:
+                xl_file = pd.ExcelFile(archivo_base)
+                for sheet_name in xl_file.sheet_names:
+                    if sheet_name != 'TAGS':  # No leer TAGS, la vamos a reemplazar
+                        hojas_existentes[sheet_name] = pd.read_excel(archivo_base, sheet_name=sheet_name)
+            except Exception as e:
+                print(f"⚠️ {ciudad}: Advertencia leyendo hojas existentes: {str(e)}")
+            
+            # Escribir todas las hojas (TAGS actualizada primero) conservando Verdana 6pt
+            hojas = {'TAGS': df_actualizado, **hojas_existentes}
+            escribir_libro(archivo_base, hojas, motor=self.motor_excel)
+
     def procesar_aeropuerto(self, carpeta_ciudad: Path) -> bool:
         """Procesa un aeropuerto específico"""
         ciudad = carpeta_ciudad.name
@@ -393,27 +483,9 @@ class IRCAAutomationSystem:
         # Validar y actualizar TAGS
         df_actualizado = self.validar_y_actualizar_tags(df_tags, ciudad)
         
-        # Guardar archivo actualizado usando método más robusto
         try:
-            # Leer todas las hojas existentes primero
-            hojas_existentes = {}
-            try:
-                xl_file = pd.ExcelFile(archivo_base)
-                for sheet_name in xl_file.sheet_names:
-                    if sheet_name != 'TAGS':  # No leer TAGS, la vamos a reemplazar
-                        hojas_existentes[sheet_name] = pd.read_excel(archivo_base, sheet_name=sheet_name)
-            except Exception as e:
-                print(f"⚠️ {ciudad}: Advertencia leyendo hojas existentes: {str(e)}")
-            
-            # Escribir todas las hojas (incluyendo TAGS actualizada)
-            with pd.ExcelWriter(archivo_base, engine='openpyxl') as writer:
-                # Escribir hoja TAGS actualizada
-                df_actualizado.to_excel(writer, sheet_name='TAGS', index=False)
-                
-                # Escribir hojas existentes
-                for sheet_name, df_sheet in hojas_existentes.items():
-                    df_sheet.to_excel(writer, sheet_name=sheet_name, index=False)
-            
+            self.guardar_tags(archivo_base, df_actualizado, ciudad)
+            self.codigos_tags[ciudad] = self.codigos_en_tags(df_actualizado)
             print(f"✅ {ciudad}: Procesado exitosamente")
             return True
             
@@ -423,12 +495,85 @@ class IRCAAutomationSystem:
             print(f"   Detalle del error: {traceback.format_exc()}")
             return False
 
-    def ejecutar_procesamiento(self) -> bool:
-        """Ejecuta el procesamiento completo de todos los aeropuertos"""
+    def procesar_aeropuerto_con_log(self, carpeta_ciudad: Path, posicion: str = "") -> Tuple[bool, str, List[str]]:
+        """
+        Procesa un aeropuerto capturando su salida, para emitir el log de la ciudad completo.
+        Retorna también los códigos escritos en su TAGS (para la huella de la ciudad).
+        """
+        buffer_log = io.StringIO()
+        with contextlib.redirect_stdout(buffer_log):
+            print(f"\n{posicion} {carpeta_ciudad.name}")
+            try:
+                exito = self.procesar_aeropuerto(carpeta_ciudad)
+            except Exception as e:
+                print(f"❌ {carpeta_ciudad.name}: Error inesperado: {str(e)}")
+                exito = False
+        return exito, buffer_log.getvalue(), self.codigos_tags.get(carpeta_ciudad.name, [])
+
+    @staticmethod
+    def codigos_en_tags(df_tags: pd.DataFrame) -> List[str]:
+        """Códigos cod_1..cod_4 no vacíos de una hoja TAGS"""
+        tags = dict(zip(df_tags['ETIQUETA'], df_tags['VALOR']))
+        return [str(tags[f'cod_{i}']) for i in range(1, 5)
+                if f'cod_{i}' in tags and pd.notna(tags[f'cod_{i}']) and tags[f'cod_{i}'] != '']
+
+    def huella_ciudad(self, ciudad: str, codigos: List[str]) -> str:
+        """
+        Huella de las entradas IRCA de una ciudad: sus filas ya resumidas (periodo, puntos,
+        códigos, valores) más el IRCA de los códigos presentes en su TAGS
+        """
+        return huella_datos({
+            'version': VERSION_RELLENADOR,
+            'datos': self.obtener_datos_ciudad_desde_irca(ciudad),
+            'irca_codigos': {codigo: self.buscar_irca_por_codigo(codigo) for codigo in sorted(codigos)},
+        })
+
+    def ciudad_sin_cambios(self, carpeta_ciudad: Path, entrada: Optional[Dict]) -> bool:
+        """Indica si las filas IRCA de la ciudad y su libro siguen iguales al último proceso exitoso"""
+        if not entrada or entrada.get('version') != VERSION_RELLENADOR:
+            return False
+        archivo_base = self.encontrar_archivo_base(carpeta_ciudad)
+        if not archivo_base or str(archivo_base) != entrada.get('excel'):
+            return False
+        if self.huella_ciudad(carpeta_ciudad.name, entrada.get('codigos', [])) != entrada.get('datos'):
+            return False
+        # Libro (valores actuales de TAGS): mtime/tamaño iguales evitan releer el archivo
+        libro = entrada.get('libro') or {}
+        return huella_archivo(archivo_base, libro)['sha256'] == libro.get('sha256')
+
+    def entrada_huella(self, carpeta_ciudad: Path, codigos: List[str]) -> Dict:
+        """Entrada del registro de huellas para una ciudad recién procesada"""
+        datos = self.obtener_datos_ciudad_desde_irca(carpeta_ciudad.name)
+        archivo_base = self.encontrar_archivo_base(carpeta_ciudad)
+        return {
+            'version': VERSION_RELLENADOR,
+            'periodo': f"{datos['mes']} {datos['año']}".strip(),
+            'codigos': codigos,
+            'datos': self.huella_ciudad(carpeta_ciudad.name, codigos),
+            'excel': str(archivo_base),
+            'libro': huella_archivo(archivo_base),
+        }
+
+    def ejecutar_procesamiento(self, datos_irca=None, mes: Optional[str] = None, año: Optional[int] = None,
+                               workers: int = 1, forzar: bool = False, ruta_huellas: Optional[str] = None) -> bool:
+        """
+        Ejecuta el procesamiento completo de todos los aeropuertos.
+        datos_irca: DataFrame o ruta .feather/.arrow/.csv (ver cargar_datos_irca); por defecto self.irca_file
+        mes/año: periodo a conservar cuando los datos se leen del CSV
+        workers: procesos para trabajar ciudades en paralelo (1 = secuencial). Los datos IRCA
+                 se cargan e indexan una sola vez aquí; cada tarea recibe solo los datos ya
+                 resumidos de su ciudad (y cada proceso, al iniciar, el mapa código → IRCA).
+                 El log de cada ciudad se emite completo y en el orden de las carpetas.
+        forzar: reprocesar todas las ciudades aunque sus huellas no hayan cambiado
+        ruta_huellas: registro de huellas (por defecto <base_path>/.paso2_huellas.json)
+        """
         print("=== INICIANDO PROCESAMIENTO IRCA ===")
+        self.total_aeropuertos = 0
+        self.aeropuertos_exitosos = 0
+        self.aeropuertos_omitidos = 0
         
         # Cargar datos IRCA
-        if not self.cargar_datos_irca():
+        if not self.cargar_datos_irca(datos_irca, mes=mes, año=año):
             print("❌ No se pudieron cargar los datos IRCA")
             return False
         
@@ -438,25 +583,218 @@ class IRCAAutomationSystem:
             print("❌ No se encontraron carpetas de ciudades")
             return False
         
+        # Huellas: ciudades cuyas filas IRCA y libro no cambiaron desde el último proceso exitoso
+        ruta_huellas = ruta_huellas or str(self.base_path / NOMBRE_HUELLAS)
+        registro = cargar_registro(ruta_huellas, 'ciudades')
+        entradas = registro['ciudades']
+        pendientes, omitidas = [], []
+        for carpeta in carpetas_ciudades:
+            try:
+                sin_cambios = not forzar and self.ciudad_sin_cambios(carpeta, entradas.get(carpeta.name))
+            except OSError:
+                sin_cambios = False
+            (omitidas if sin_cambios else pendientes).append(carpeta)
+        
         # Procesar cada aeropuerto
         total_aeropuertos = len(carpetas_ciudades)
         aeropuertos_exitosos = 0
         
-        print(f"📁 Procesando {total_aeropuertos} aeropuertos...")
+        if omitidas:
+            print(f"⏭️ Ciudades sin cambios desde la última ejecución: {len(omitidas)}")
+            for carpeta in omitidas:
+                print(f"   • {carpeta.name} ({entradas[carpeta.name].get('periodo', '')})")
+        
+        print(f"📁 Procesando {len(pendientes)} aeropuertos...")
+        
+        resultados = []
+        if workers > 1 and len(pendientes) > 1:
+            print(f"⚙️ Procesando con {min(workers, len(pendientes))} procesos en paralelo")
+            posiciones = [f"[{i}/{len(pendientes)}]" for i in range(1, len(pendientes) + 1)]
+            datos_ciudades = [self.obtener_datos_ciudad_desde_irca(c.name) for c in pendientes]
+            config = (self.base_path, self.irca_file, self.motor_excel, self.irca_dict)
+            with ProcessPoolExecutor(max_workers=min(workers, len(pendientes)),
+                                     initializer=_inicializar_proceso, initargs=config) as pool:
+                for carpeta, (exito, log, codigos) in zip(
+                        pendientes, pool.map(_procesar_en_proceso, pendientes, posiciones, datos_ciudades)):
+                    print(log, end="")
+                    resultados.append((carpeta, exito, codigos))
+        else:
+            for i, carpeta in enumerate(pendientes, 1):
+                print(f"\n[{i}/{len(pendientes)}] {carpeta.name}")
+                
+                exito = self.procesar_aeropuerto(carpeta)
+                resultados.append((carpeta, exito, self.codigos_tags.get(carpeta.name, [])))
         
-        for i, carpeta in enumerate(carpetas_ciudades, 1):
-            print(f"\n[{i}/{total_aeropuertos}] {carpeta.name}")
-            
-            if self.procesar_aeropuerto(carpeta):
+        # Actualizar huellas
+        for carpeta, exito, codigos in resultados:
+            if exito:
                 aeropuertos_exitosos += 1
+                try:
+                    entradas[carpeta.name] = self.entrada_huella(carpeta, codigos)
+                except OSError:
+                    entradas.pop(carpeta.name, None)
+            else:
+                entradas.pop(carpeta.name, None)
+        registro['version'] = VERSION_RELLENADOR
+        try:
+            guardar_registro(ruta_huellas, registro)
+        except OSError as e:
+            print(f"⚠️ ADVERTENCIA: No se pudo guardar el registro de huellas '{ruta_huellas}': {e}")
+        
+        self.total_aeropuertos = total_aeropuertos
+        self.aeropuertos_exitosos = aeropuertos_exitosos
+        self.aeropuertos_omitidos = len(omitidas)
         
         # Resumen final
         print(f"\n=== RESUMEN FINAL ===")
         print(f"Total aeropuertos: {total_aeropuertos}")
         print(f"Procesados exitosamente: {aeropuertos_exitosos}")
-        print(f"Con errores: {total_aeropuertos - aeropuertos_exitosos}")
+        if omitidas:
+            print(f"Sin cambios (omitidos): {len(omitidas)}")
+        print(f"Con errores: {total_aeropuertos - aeropuertos_exitosos - len(omitidas)}")
         
-        return aeropuertos_exitosos > 0
+        return aeropuertos_exitosos > 0 or bool(omitidas)
+
+    @staticmethod
+    def etiqueta_periodo(mes: str, año: int) -> str:
+        """('Julio', 2025) → '2025-07' (nombre de la carpeta del periodo)"""
+        return f"{int(año)}-{MES_A_NUMERO.get(mes, 0):02d}"
+
+    def construir_indices_periodos(self, periodos: List[Tuple[str, int]]) -> Dict[str, Dict[str, Dict]]:
+        """
+        Datos de todas las ciudades para todos los periodos en una sola pasada vectorizada:
+        cada fila se etiqueta con su periodo y se resume con la clave compuesta periodo|ciudad.
+        Retorna {etiqueta de periodo: {clave de ciudad: datos}}.
+        """
+        df = self.irca_data
+        años = df['Año'] if 'Año' in df.columns else pd.to_datetime(df['Fecha'], errors='coerce').dt.year
+        solicitados = {f"{mes}|{int(año)}": self.etiqueta_periodo(mes, año) for mes, año in periodos}
+        etiquetas = (df['Mes'].astype(str) + '|' + años.astype('Int64').astype(str)).map(solicitados)
+
+        claves = self.claves_ciudad.astype(object)
+        validas = etiquetas.notna() & claves.notna()
+        compuestas = etiquetas[validas] + '|' + claves[validas]
+        resumen = self._resumir_ciudades(df[validas], compuestas)
+
+        indices = {etiqueta: {} for etiqueta in solicitados.values()}
+        for compuesta, datos in resumen.items():
+            etiqueta, clave = compuesta.split('|', 1)
+            indices[etiqueta][clave] = datos
+        self.etiquetas_filas = etiquetas
+        return indices
+
+    def usar_periodo(self, etiqueta: str, indice: Dict[str, Dict], datos_completos: pd.DataFrame,
+                     claves_completas: pd.Series) -> None:
+        """Deja el sistema como si solo se hubieran cargado las filas del periodo indicado"""
+        mascara = (self.etiquetas_filas == etiqueta).fillna(False).astype(bool)
+        self.irca_data = datos_completos[mascara]
+        self.claves_ciudad = claves_completas[mascara]
+        self.indice_ciudades = indice
+
+    def ejecutar_lote(self, periodos: List[Tuple[str, int]], datos_irca=None) -> Dict:
+        """
+        Modo por lotes: rellena TAGS para varios periodos (mes, año) en una sola ejecución.
+        Los datos IRCA se cargan e indexan una vez para todos los periodos; la hoja TAGS de cada
+        ciudad se lee una vez y se escribe una copia del libro base por periodo en
+        <Ciudad>/periodos/<Año>-<MM>/base_<Ciudad>.xlsx (el libro base no se modifica).
+        Las ciudades sin filas IRCA en un periodo no generan salida para ese periodo.
+
+        Retorna:
+            dict: {'exito': bool, 'archivos': int,
+                   'periodos': {etiqueta: {'exitosos': [...], 'sin_datos': [...], 'errores': [...]}}}
+        """
+        print("=== INICIANDO PROCESAMIENTO IRCA POR LOTES ===")
+        periodos = list(dict.fromkeys((mes, int(año)) for mes, año in periodos))
+        resultado = {'exito': False, 'archivos': 0, 'periodos': {}}
+
+        if not periodos or not self.cargar_datos_irca(datos_irca):
+            print("❌ No se pudieron cargar los datos IRCA")
+            return resultado
+
+        carpetas_ciudades = self.obtener_carpetas_ciudades()
+        if not carpetas_ciudades:
+            print("❌ No se encontraron carpetas de ciudades")
+            return resultado
+
+        indices = self.construir_indices_periodos(periodos)
+        datos_completos, claves_completas = self.irca_data, self.claves_ciudad
+        print(f"📅 Periodos: {', '.join(f'{mes} {año}' for mes, año in periodos)}")
+        print(f"📁 Ciudades: {len(carpetas_ciudades)}")
+
+        # TAGS de cada ciudad: una sola lectura para todos los periodos
+        tags_base = {}
+        for carpeta in carpetas_ciudades:
+            archivo_base = self.encontrar_archivo_base(carpeta)
+            if not archivo_base:
+                print(f"❌ {carpeta.name}: Archivo Base_ciudad.xlsx no encontrado")
+                continue
+            try:
+                tags_base[carpeta.name] = (archivo_base, pd.read_excel(archivo_base, sheet_name='TAGS'))
+            except Exception as e:
+                print(f"❌ {carpeta.name}: Error leyendo hoja TAGS: {str(e)}")
+
+        try:
+            for mes, año in periodos:
+                etiqueta = self.etiqueta_periodo(mes, año)
+                estado = {'exitosos': [], 'sin_datos': [], 'errores': []}
+                resultado['periodos'][etiqueta] = estado
+                self.usar_periodo(etiqueta, indices[etiqueta], datos_completos, claves_completas)
+                print(f"\n[{etiqueta}] {mes} {año}: {len(self.irca_data)} registros IRCA")
+
+                for carpeta in carpetas_ciudades:
+                    ciudad = carpeta.name
+                    if ciudad not in tags_base:
+                        estado['errores'].append(ciudad)
+                        continue
+                    if not self.obtener_datos_ciudad_desde_irca(ciudad)['codigos_encontrados']:
+                        estado['sin_datos'].append(ciudad)
+                        continue
+
+                    archivo_base, df_tags = tags_base[ciudad]
+                    destino = carpeta / CARPETA_PERIODOS / etiqueta / archivo_base.name
+                    try:
+                        df_actualizado = self.validar_y_actualizar_tags(df_tags, ciudad)
+                        destino.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copyfile(archivo_base, destino)
+                        self.guardar_tags(destino, df_actualizado, ciudad)
+                        estado['exitosos'].append(ciudad)
+                        print(f"✅ {ciudad}: {destino.relative_to(self.base_path)}")
+                    except Exception as e:
+                        estado['errores'].append(ciudad)
+                        print(f"❌ {ciudad}: Error guardando archivo: {str(e)}")
+
+                if estado['sin_datos']:
+                    print(f"⚠️ Sin datos IRCA en {mes} {año}: {', '.join(estado['sin_datos'])}")
+        finally:
+            # El sistema vuelve a quedar con todos los datos cargados
+            self.irca_data, self.claves_ciudad = datos_completos, claves_completas
+            self.indice_ciudades = None
+
+        resultado['archivos'] = sum(len(e['exitosos']) for e in resultado['periodos'].values())
+        resultado['exito'] = resultado['archivos'] > 0
+
+        print(f"\n=== RESUMEN LOTE ===")
+        for etiqueta, estado in resultado['periodos'].items():
+            print(f"{etiqueta}: {len(estado['exitosos'])} generados, {len(estado['sin_datos'])} sin datos, "
+                  f"{len(estado['errores'])} con errores")
+        print(f"Archivos generados: {resultado['archivos']}")
+        return resultado
+
+# Sistema liviano, uno por proceso del pool (ver ejecutar_procesamiento): no recibe el
+# DataFrame IRCA, solo el mapa código → IRCA para los códigos manuales de TAGS
+_sistema_proceso = None
+
+def _inicializar_proceso(base_path: Path, irca_file: Path, motor_excel: Optional[str],
+                         irca_dict: Dict[str, float]):
+    global _sistema_proceso
+    _sistema_proceso = IRCAAutomationSystem(base_path, irca_file, motor_excel)
+    _sistema_proceso.irca_dict = irca_dict
+
+def _procesar_en_proceso(carpeta_ciudad: Path, posicion: str, datos_ciudad: Dict) -> Tuple[bool, str, List[str]]:
+    # Los datos de la ciudad ya vienen resumidos (y resueltas las coincidencias parciales)
+    sistema = _sistema_proceso
+    sistema.indice_ciudades = {sistema.clave_ciudad(carpeta_ciudad.name): datos_ciudad}
+    return sistema.procesar_aeropuerto_con_log(carpeta_ciudad, posicion)
 
 def main():
     """Función principal del script"""
@@ -477,9 +815,12 @@ def main():
         print(f"❌ Archivo IRCA no existe: {IRCA_FILE}")
         return False
     
+    # Número de procesos opcional: python rellenador_tags.py 4
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    
     # Inicializar y ejecutar sistema
     sistema = IRCAAutomationSystem(BASE_PATH, IRCA_FILE)
-    exito = sistema.ejecutar_procesamiento()
+    exito = sistema.ejecutar_procesamiento(workers=workers)
     
     if exito:
         print("\n✅ Procesamiento completado exitosamente")
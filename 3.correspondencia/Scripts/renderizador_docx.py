@@ -0,0 +1,66 @@
+# ============================================================
+# Renderizador de plantillas a nivel lxml (Paso 3)
+# ============================================================
+#
+# Alternativa al recorrido con objetos de python-docx (Paragraph, Run, Table,
+# _Cell...): los párrafos con marcadores se ubican con UNA consulta XPath
+# compilada sobre el árbol lxml de cada parte que se rellena:
+#   /word/document.xml, /word/header*.xml y /word/footer*.xml
+# Así quedan cubiertas las tablas anidadas, los pies de página y los cuadros
+# de texto, sin construir fila.cells (cuadrático con celdas combinadas).
+#
+# Sobre cada <w:p> se trabaja con sus <w:r> directos (CT_P.r_lst), que son los
+# mismos runs de paragraph.runs: el texto y el colapso de runs que aplica
+# Correspondencia.reemplazar_tags quedan idénticos a los del motor python-docx.
+
+import re
+
+from docx.oxml.ns import nsmap
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+MOTOR_DOCX = "python-docx"
+MOTOR_LXML = "lxml"
+MOTORES = (MOTOR_DOCX, MOTOR_LXML)
+MOTOR_POR_DEFECTO = MOTOR_DOCX
+
+# Partes del paquete que se rellenan: documento, encabezados y pies de página
+PATRON_PARTE = re.compile(r"^/word/(document|header\d*|footer\d*)\.xml$")
+
+# Párrafos cuyos runs directos traen '{' o '<' en algún <w:t> (filtro previo de marcadores;
+# '<<' puede venir partido en dos runs, por eso basta un '<')
+_PARRAFOS_CANDIDATOS = etree.XPath(
+    './/w:p[w:r/w:t[contains(., "{") or contains(., "<")]]', namespaces={"w": nsmap["w"]})
+# Párrafos de las tablas del cuerpo (incluidas las anidadas) con '{' o '<' en su texto.
+# Se filtra por ancestor::w:tbl en vez de //w:tbl//w:p, que recorre varias veces las tablas anidadas
+_PARRAFOS_FOTOS = etree.XPath(
+    './w:body//w:p[.//w:t[contains(., "{") or contains(., "<")]][ancestor::w:tbl]', namespaces={"w": nsmap["w"]})
+
+def resolver_motor(motor=None):
+    """Valida el renderizador pedido ('lxml' o 'python-docx'; None = MOTOR_POR_DEFECTO)"""
+    motor = motor or MOTOR_POR_DEFECTO
+    if motor not in MOTORES:
+        raise ValueError(f"Renderizador no soportado: {motor} (opciones: {', '.join(MOTORES)})")
+    return motor
+
+def partes_rellenables(documento):
+    """Parte principal del documento seguida de los encabezados y pies de página del paquete"""
+    principal = documento.part
+    otras = sorted((parte for parte in principal.package.iter_parts()
+                    if parte is not principal and PATRON_PARTE.match(str(parte.partname))),
+                   key=lambda parte: str(parte.partname))
+    return [principal] + otras
+
+def parrafos_de_parte(parte):
+    """Elementos <w:p> (CT_P) candidatos a tener marcadores dentro de una parte"""
+    return _PARRAFOS_CANDIDATOS(parte.element)
+
+def parrafos_con_marcadores(documento):
+    """Elementos <w:p> (CT_P) candidatos a tener marcadores, en todas las partes rellenables"""
+    for parte in partes_rellenables(documento):
+        yield from parrafos_de_parte(parte)
+
+def parrafos_de_fotos(documento):
+    """Párrafos (Paragraph) de las tablas del cuerpo que pueden traer tags de foto, en orden del documento"""
+    cuerpo = documento._body
+    return [Paragraph(elemento, cuerpo) for elemento in _PARRAFOS_FOTOS(documento.element)]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de escritura del libro base del Paso 1
+================================================
+
+Compara la secuencia anterior (5 ciclos de lectura/escritura sobre el mismo
+base_<ciudad>.xlsx) con la etapa única escribir_libro_base() del generador,
+con cada motor de escritura (openpyxl y xlsxwriter constant_memory).
+
+Uso:
+    python benchmarks/bench_escritura_paso1.py [parametros] [puntos] [repeticiones]
+"""
+
+import sys
+import time
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import openpyxl
+from openpyxl.styles import Font
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+import generador_base_script as generador  # noqa: E402
+import escritor_excel  # noqa: E402
+
+
+class ContadorCiclos:
+    """Cuenta aperturas (load_workbook) y guardados (Workbook.save) de openpyxl"""
+
+    def __init__(self):
+        self.lecturas = 0
+        self.escrituras = 0
+        self._load_original = openpyxl.load_workbook
+        self._save_original = openpyxl.Workbook.save
+
+    def __enter__(self):
+        contador = self
+
+        def load_contado(*args, **kwargs):
+            contador.lecturas += 1
+            return contador._load_original(*args, **kwargs)
+
+        def save_contado(wb, *args, **kwargs):
+            contador.escrituras += 1
+            return contador._save_original(wb, *args, **kwargs)
+
+        openpyxl.load_workbook = load_contado
+        openpyxl.reader.excel.load_workbook = load_contado
+        openpyxl.Workbook.save = save_contado
+        return self
+
+    def __exit__(self, *exc):
+        openpyxl.load_workbook = self._load_original
+        openpyxl.reader.excel.load_workbook = self._load_original
+        openpyxl.Workbook.save = self._save_original
+
+
+def datos_sinteticos(n_parametros, n_puntos):
+    """Genera TAGS y TABLA_4 sintéticas del tamaño indicado"""
+    tabla = pd.DataFrame({
+        'PARÁMETRO': [f"Parámetro {i}" for i in range(n_parametros)],
+        'TÉCNICA': ["Volumetría"] * n_parametros,
+        'UNIDAD': ["mg/L"] * n_parametros,
+        'LÍMITE': ["0,100"] * n_parametros,
+    })
+    for p in range(1, n_puntos + 1):
+        tabla[f"P{p}. Punto"] = [f"{(i * p) % 97},{p:02d}" for i in range(n_parametros)]
+    return generador.construir_tags(), tabla
+
+
+def escritura_anterior(ruta_excel, df_tags, tabla):
+    """Reproduce la secuencia previa: TAGS(w) → TABLA_4(a) → estilo → lectura TAGS → TAGS(a)"""
+    with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='w') as writer:
+        df_tags.to_excel(writer, sheet_name='TAGS', index=False)
+
+    with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+        tabla.to_excel(writer, sheet_name='TABLA_4', index=False)
+
+    wb = openpyxl.load_workbook(ruta_excel)
+    font = Font(name='Verdana', size=6)
+    for hoja in ['TABLA_4', 'TAGS']:
+        for row in wb[hoja].iter_rows():
+            for cell in row:
+                cell.font = font
+    wb.save(ruta_excel)
+
+    df_tags_existente = pd.read_excel(ruta_excel, sheet_name='TAGS')
+    df_tags = generador.construir_tags(df_tags_existente)
+
+    with pd.ExcelWriter(ruta_excel, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+        df_tags.to_excel(writer, sheet_name='TAGS', index=False)
+
+
+def medir(nombre, funcion, ruta, df_tags, tabla, repeticiones):
+    tiempos = []
+    with ContadorCiclos() as contador:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion(ruta, df_tags, tabla)
+            tiempos.append(time.perf_counter() - inicio)
+    ciclos = (contador.lecturas + contador.escrituras) / repeticiones
+    mejor = min(tiempos)
+    print(f"   {nombre:<24} ciclos/archivo: {ciclos:>4.0f} "
+          f"(lecturas {contador.lecturas // repeticiones}, escrituras {contador.escrituras // repeticiones}) "
+          f"| mejor tiempo: {mejor * 1000:8.1f} ms")
+    return mejor
+
+
+def main():
+    n_parametros = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_puntos = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    df_tags, tabla = datos_sinteticos(n_parametros, n_puntos)
+    print(f"📊 TABLA_4 sintética: {n_parametros} parámetros × {n_puntos} puntos "
+          f"({tabla.size} celdas), {repeticiones} repeticiones")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "base_Benchmark.xlsx"
+        t_antes = medir("Antes (5 ciclos)", escritura_anterior, ruta, df_tags, tabla, repeticiones)
+        tiempos = {}
+        for motor in escritor_excel.MOTORES:
+            escritura = partial(generador.escribir_libro_base, motor=motor)
+            tiempos[motor] = medir(f"Después ({motor})", escritura, ruta, df_tags, tabla, repeticiones)
+
+    for motor, t_despues in tiempos.items():
+        print(f"🏁 Aceleración con {motor}: x{t_antes / t_despues:.2f}")
+
+
+if __name__ == "__main__":
+    main()
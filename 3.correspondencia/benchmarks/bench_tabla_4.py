@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de construcción de TABLA_4 del Paso 1
+===============================================
+
+Compara la construcción anterior (drop_duplicates + pivot_table(aggfunc='first')
++ orden categórico + reindex) con construir_tabla_4() del generador, sobre una
+Sheet1 sintética del tamaño de una base consolidada de varios años, y verifica
+que ambas produzcan la misma tabla.
+
+Algunos parámetros tienen dos combinaciones TÉCNICA/UNIDAD/LÍMITE. Dentro de un
+parámetro, el orden de esas filas dependía antes del orden interno de pivot_table y
+de un sort_values no estable; construir_tabla_4() las deja en orden de primera
+aparición. Por eso se comparan: el orden de los parámetros fila a fila, el contenido
+con las combinaciones de cada parámetro ordenadas, y por separado el orden de
+primera aparición de la nueva tabla.
+
+Uso:
+    python benchmarks/bench_tabla_4.py [parametros] [puntos] [repeticiones]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+import generador_base_script as generador  # noqa: E402
+
+
+def sheet1_sintetica(n_parametros, n_puntos, semilla=0):
+    """
+    Genera una Sheet1 ya normalizada (columnas requeridas del Paso 1) con
+    resultados repetidos por celda, nulos, puntos sin resultados y parámetros
+    con dos combinaciones TÉCNICA/UNIDAD/LÍMITE
+    """
+    rng = np.random.default_rng(semilla)
+    parametros = [f"Determinación de parámetro {i}*" for i in range(n_parametros)]
+    puntos = [f"P{p}. Punto de red {p}" for p in range(1, n_puntos + 1)]
+
+    # Cada celda aparece 1-3 veces (varias campañas); el orden de filas se mezcla
+    filas = np.repeat(np.arange(n_parametros * n_puntos), rng.integers(1, 4, n_parametros * n_puntos))
+    filas = filas[rng.permutation(len(filas))]
+    i_param, i_punto = filas // n_puntos, filas % n_puntos
+
+    resultados = np.array([f"{v:.3g}".replace(".", ",") + " +/- 0,01" for v in rng.random(len(filas)) * 100],
+                          dtype=object)
+    resultados[rng.random(len(filas)) < 0.05] = np.nan
+    # El último punto no tiene resultados (debe quedar en "n/a")
+    resultados[i_punto == n_puntos - 1] = np.nan
+
+    return pd.DataFrame({
+        'PARÁMETRO': np.array(parametros, dtype=object)[i_param],
+        # Uno de cada diez parámetros cambia de técnica según el punto
+        'TÉCNICA': np.where((i_param % 2 == 0) | ((i_param % 10 == 1) & (i_punto % 3 == 0)),
+                            "Volumetría", "Espectrofotometría").astype(object),
+        'UNIDAD': np.full(len(filas), "mg/L", dtype=object),
+        'LÍMITE': np.array([f"0,{i % 900 + 100}" for i in range(n_parametros)], dtype=object)[i_param],
+        'PUNTO': np.array(puntos, dtype=object)[i_punto],
+        'RESULTADO_CRUDO': resultados,
+    })
+
+
+def tabla_4_anterior(df):
+    """Reproduce la construcción previa de TABLA_4"""
+    orden_param = df.drop_duplicates(subset=['PARÁMETRO'])['PARÁMETRO'].tolist()
+    puntos_unicos = df['PUNTO'].dropna().unique().tolist()
+    tabla = df.pivot_table(
+        index=['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE'],
+        columns='PUNTO',
+        values='RESULTADO_CRUDO',
+        aggfunc='first',
+        sort=False
+    ).reset_index()
+    tabla['__orden__'] = pd.Categorical(tabla['PARÁMETRO'], categories=orden_param, ordered=True)
+    tabla = (tabla.sort_values('__orden__')
+                  .drop(columns='__orden__')
+                  .reset_index(drop=True))
+    columnas_finales = ['PARÁMETRO', 'TÉCNICA', 'UNIDAD', 'LÍMITE'] + list(puntos_unicos)
+    return tabla.reindex(columns=columnas_finales, fill_value="n/a")
+
+
+def combinaciones_ordenadas(tabla):
+    """Ordena las combinaciones de cada parámetro, conservando el orden de los parámetros"""
+    claves = generador.COLUMNAS_FILA_TABLA_4
+    orden = pd.factorize(tabla['PARÁMETRO'], sort=False)[0]
+    return (tabla.assign(__orden__=orden)
+                 .sort_values(['__orden__'] + claves[1:], kind='stable')
+                 .drop(columns='__orden__')
+                 .reset_index(drop=True))
+
+
+def orden_primera_aparicion(df, tabla):
+    """Combinaciones de la tabla en el orden esperado: por parámetro y, dentro, por primera aparición"""
+    claves = generador.COLUMNAS_FILA_TABLA_4
+    esperado = df.dropna(subset=claves + ['PUNTO']).drop_duplicates(subset=claves)[claves]
+    esperado = esperado.assign(__orden__=pd.factorize(esperado['PARÁMETRO'], sort=False)[0])
+    esperado = esperado.sort_values('__orden__', kind='stable').drop(columns='__orden__')
+    esperado = esperado.merge(tabla[claves], on=claves, how='inner')
+    return esperado.reset_index(drop=True)
+
+
+def medir(nombre, funcion, df, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        tabla = funcion(df)
+        tiempos.append(time.perf_counter() - inicio)
+    mejor = min(tiempos)
+    print(f"   {nombre:<26} mejor tiempo: {mejor * 1000:9.1f} ms")
+    return mejor, tabla
+
+
+def main():
+    n_parametros = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_puntos = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    df = sheet1_sintetica(n_parametros, n_puntos)
+    print(f"📊 Sheet1 sintética: {len(df)} filas, {n_parametros} parámetros × {n_puntos} puntos, "
+          f"{repeticiones} repeticiones")
+
+    t_antes, tabla_antes = medir("Antes (pivot_table)", tabla_4_anterior, df, repeticiones)
+    t_despues, tabla_despues = medir("Después (construir_tabla_4)", generador.construir_tabla_4, df, repeticiones)
+
+    pd.testing.assert_series_equal(tabla_antes['PARÁMETRO'], tabla_despues['PARÁMETRO'])
+    pd.testing.assert_frame_equal(combinaciones_ordenadas(tabla_antes), combinaciones_ordenadas(tabla_despues),
+                                  check_dtype=False, check_names=False)
+    print("✅ Ambas construcciones producen la misma TABLA_4 (mismo orden de parámetros y de puntos)")
+
+    claves = generador.COLUMNAS_FILA_TABLA_4
+    pd.testing.assert_frame_equal(orden_primera_aparicion(df, tabla_despues), tabla_despues[claves],
+                                  check_names=False)
+    combinaciones = tabla_despues.groupby('PARÁMETRO', sort=False).size()
+    print(f"✅ Combinaciones de cada parámetro en orden de primera aparición "
+          f"({(combinaciones > 1).sum()} parámetros con varias TÉCNICA/UNIDAD/LÍMITE)")
+    print(f"🏁 Aceleración: x{t_antes / t_despues:.2f}")
+
+
+if __name__ == "__main__":
+    main()
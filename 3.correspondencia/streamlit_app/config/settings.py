@@ -5,6 +5,8 @@ Configuración de rutas y parámetros del sistema IRCA
 """
 
 import os
+import sys
+import importlib
 from pathlib import Path
 
 class Settings:
@@ -26,12 +28,31 @@ class Settings:
         self.ORIGEN_DIR = self.BASE_DIR / "Datos" / "Resultados_por_Aeropuerto"
         
         # Estados de los pasos del flujo
+        # El Paso 1 usa su manifiesto de huellas (entradas por aeropuerto + marca 'completado')
+        self.MANIFIESTO_PASO1 = self.DATOS_DIR / '.paso1_manifest.json'
+        # Huellas del Paso 2 por ciudad (filas IRCA + libro) para omitir ciudades sin cambios
+        self.HUELLAS_PASO2 = self.DATOS_DIR / '.paso2_huellas.json'
         self.ESTADOS_ARCHIVOS = {
-            'paso1': self.DATOS_DIR / '.paso1_completed',
+            'paso1': self.MANIFIESTO_PASO1,
             'paso2': self.DATOS_DIR / '.paso2_completed', 
             'paso3': self.DATOS_DIR / '.paso3_completed'
         }
         
+        # Procesos en paralelo para el Paso 1 (1 = secuencial)
+        self.PASO1_WORKERS = min(4, os.cpu_count() or 1)
+        
+        # Procesos en paralelo para el Paso 2 (1 = secuencial)
+        self.PASO2_WORKERS = min(4, os.cpu_count() or 1)
+        
+        # Procesos en paralelo para el Paso 3 (1 = secuencial)
+        self.PASO3_WORKERS = min(4, os.cpu_count() or 1)
+        
+        # Motor de escritura de los libros generados: 'xlsxwriter' (constant_memory) u 'openpyxl'
+        self.EXCEL_MOTOR = "xlsxwriter"
+        
+        # Renderizador de las plantillas Word del Paso 3: 'python-docx' (por defecto) o 'lxml' (XPath sobre el XML)
+        self.PASO3_RENDERIZADOR = "python-docx"
+        
         # Configuración para mejoras nuevas
         self.SELECTED_MONTH = None
         self.SELECTED_YEAR = None
@@ -69,13 +90,38 @@ class Settings:
         
         return errores
     
+    def cargar_modulo_script(self, nombre: str):
+        """Importa un script de la carpeta Scripts como módulo (una sola vez por proceso)"""
+        scripts_dir = str(self.SCRIPTS_DIR)
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        return importlib.import_module(nombre)
+    
+    def _leer_manifiesto_paso1(self) -> dict:
+        """Lee el manifiesto del Paso 1 con el registro compartido de Scripts/huellas.py"""
+        huellas = self.cargar_modulo_script("huellas")
+        return huellas.cargar_registro(str(self.MANIFIESTO_PASO1), 'aeropuertos')
+    
+    def _marcar_manifiesto_paso1(self, completado: bool):
+        """Actualiza la marca 'completado' conservando las huellas por aeropuerto"""
+        if not completado and not self.MANIFIESTO_PASO1.exists():
+            return
+        manifiesto = self._leer_manifiesto_paso1()
+        manifiesto['completado'] = completado
+        self.cargar_modulo_script("huellas").guardar_registro(str(self.MANIFIESTO_PASO1), manifiesto)
+    
     def get_paso_status(self, paso: str) -> bool:
         """Verifica si un paso del flujo está completado"""
+        if paso == 'paso1':
+            return bool(self._leer_manifiesto_paso1().get('completado'))
         archivo_estado = self.ESTADOS_ARCHIVOS.get(paso)
         return archivo_estado.exists() if archivo_estado else False
     
     def marcar_paso_completado(self, paso: str, exito: bool = True):
         """Marca un paso como completado o fallido"""
+        if paso == 'paso1':
+            self._marcar_manifiesto_paso1(exito)
+            return
         archivo_estado = self.ESTADOS_ARCHIVOS.get(paso)
         if archivo_estado:
             if exito:
@@ -85,9 +131,11 @@ class Settings:
                     archivo_estado.unlink()
     
     def reset_estados(self):
-        """Resetea todos los estados de pasos"""
-        for archivo in self.ESTADOS_ARCHIVOS.values():
-            if archivo.exists():
+        """Resetea todos los estados de pasos (las huellas del Paso 1 se conservan)"""
+        for paso, archivo in self.ESTADOS_ARCHIVOS.items():
+            if paso == 'paso1':
+                self._marcar_manifiesto_paso1(False)
+            elif archivo.exists():
                 archivo.unlink()
     
     def get_carpetas_datos(self):
@@ -98,44 +146,24 @@ class Settings:
         return [item.name for item in self.DATOS_DIR.iterdir() 
                 if item.is_dir() and not item.name.startswith('.')]
     
+    def get_datos_irca(self, mes=None, año=None):
+        """
+        DataFrame tipado del CSV IRCA (caché compartida, ver Scripts/datos_irca.py).
+        Con mes y/o año retorna solo ese periodo, leído por bloques si el CSV no está en caché.
+        """
+        datos_irca = self.cargar_modulo_script("datos_irca")
+        if mes or año:
+            return datos_irca.cargar_periodo(self.IRCA_FILE, mes, año)
+        return datos_irca.cargar_datos_irca(self.IRCA_FILE)
+    
     def get_available_months(self):
         """Obtiene lista de meses disponibles en el archivo CSV"""
-        import pandas as pd
-        
         try:
             if not self.IRCA_FILE.exists():
                 return []
             
-            # Leer CSV con separador punto y coma
-            df = pd.read_csv(self.IRCA_FILE, sep=';')
-            
-            # Extraer años de la columna Fecha
-            df['Fecha_parsed'] = pd.to_datetime(df['Fecha'], format='%d/%m/%Y', errors='coerce')
-            df['Año'] = df['Fecha_parsed'].dt.year
-            
-            # Combinar Mes y Año únicos
-            meses_años = df[['Mes', 'Año']].drop_duplicates().dropna()
-            
-            # Convertir a lista de diccionarios ordenada
-            months_list = []
-            for _, row in meses_años.iterrows():
-                months_list.append({
-                    'mes': row['Mes'],
-                    'año': int(row['Año']),
-                    'display': f"{row['Mes']} {int(row['Año'])}"
-                })
-            
-            # Ordenar por año y mes
-            months_order = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                          'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-            
-            def sort_key(item):
-                mes_idx = months_order.index(item['mes']) if item['mes'] in months_order else 99
-                return (item['año'], mes_idx)
-            
-            months_list.sort(key=sort_key, reverse=True)
-            
-            return months_list
+            datos_irca = self.cargar_modulo_script("datos_irca")
+            return datos_irca.meses_disponibles(self.get_datos_irca())
             
         except Exception as e:
             print(f"Error obteniendo meses disponibles: {e}")
@@ -188,8 +188,7 @@ class OptionalController:
         # Verificar acceso a datos
         try:
             if settings.IRCA_FILE.exists():
-                import pandas as pd
-                df = pd.read_csv(settings.IRCA_FILE, sep=';')
+                df = settings.get_datos_irca()
                 if len(df) == 0:
                     health_checks['datos_accesibles'] = False
                     issues.append("Archivo IRCA está vacío")
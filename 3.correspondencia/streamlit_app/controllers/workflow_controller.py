@@ -100,8 +100,11 @@ class WorkflowController:
         else:
             return False, "❌ Paso no reconocido"
     
-    def execute_step(self, paso: str) -> Tuple[bool, str]:
-        """Ejecuta un paso específico del flujo"""
+    def execute_step(self, paso: str, forzar: bool = False) -> Tuple[bool, str]:
+        """
+        Ejecuta un paso específico del flujo
+        forzar: en los pasos 1 y 2, reprocesar todo aunque las huellas no hayan cambiado
+        """
         can_execute, message = self.can_execute_step(paso)
         if not can_execute:
             return False, message
@@ -112,9 +115,9 @@ class WorkflowController:
         
         try:
             if paso == "paso1":
-                success, msg = self.base_generator.execute()
+                success, msg = self.base_generator.execute(forzar=forzar)
             elif paso == "paso2":
-                success, msg = self.irca_processor.execute()
+                success, msg = self.irca_processor.execute(forzar=forzar)
             elif paso == "paso3":
                 success, msg = self.report_generator.execute()
             else:
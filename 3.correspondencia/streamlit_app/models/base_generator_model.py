@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Modelo wrapper para generador_base_script.py
+Modelo wrapper para generador_base_script.py (ejecución en proceso)
 """
 
-import sys
-import os
-import subprocess
+import io
+import contextlib
+from datetime import datetime
 from pathlib import Path
 from typing import Tuple, Dict, Any
 import streamlit as st
@@ -29,6 +29,8 @@ class BaseGeneratorModel:
         self.last_execution = None
         self.error_message = ""
         self.output_log = ""
+        self.resultados = []
+        self.omitidos = []
     
     def is_ready_to_execute(self) -> bool:
         """Verifica si el script está listo para ejecutarse"""
@@ -43,9 +45,13 @@ class BaseGeneratorModel:
         
         return True
     
-    def execute(self) -> Tuple[bool, str]:
+    def execute(self, forzar: bool = False) -> Tuple[bool, str]:
         """
-        Ejecuta el script generador_base_script.py
+        Ejecuta el generador base dentro del proceso actual
+        (sin lanzar un intérprete nuevo para generador_base_script.py)
+        
+        Args:
+            forzar: regenerar todos los aeropuertos aunque no hayan cambiado
         
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
@@ -58,74 +64,53 @@ class BaseGeneratorModel:
             self.status = "executing"
             self.output_log = ""
             self.error_message = ""
+            self.resultados = []
+            self.omitidos = []
             
             # Contar carpetas antes de la ejecución
             carpetas_antes = len(settings.get_carpetas_datos())
             
-            # Configurar entorno con UTF-8 para manejar emojis
-            env = os.environ.copy()
-            env['PYTHONIOENCODING'] = 'utf-8'
-            env['PYTHONUTF8'] = '1'
+            # Importar el motor del Paso 1 (queda en caché tras la primera ejecución)
+            generador = settings.cargar_modulo_script("generador_base_script")
             
-            # Ejecutar el script como subprocess para capturar salida
-            result = subprocess.run(
-                [sys.executable, str(self.script_path)],
-                cwd=str(self.script_path.parent),
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minutos timeout
-                env=env,
-                encoding='utf-8',
-                errors='replace'  # Reemplazar caracteres problemáticos
-            )
+            # Ejecutar capturando la salida para el log de la UI
+            buffer_log = io.StringIO()
+            with contextlib.redirect_stdout(buffer_log):
+                resumen = generador.generar_base(
+                    str(settings.ORIGEN_DIR),
+                    str(settings.DATOS_DIR),
+                    str(settings.PLANTILLAS_DIR),
+                    workers=settings.PASO1_WORKERS,
+                    forzar=forzar,
+                    ruta_manifiesto=str(settings.MANIFIESTO_PASO1),
+                    motor_excel=settings.EXCEL_MOTOR
+                )
             
-            self.output_log = result.stdout
+            self.output_log = buffer_log.getvalue()
+            self.resultados = resumen['resultados']
+            self.omitidos = resumen['omitidos']
+            self.last_execution = datetime.now()
             
-            # Verificar si el proceso fue exitoso
             carpetas_despues = len(settings.get_carpetas_datos())
-            proceso_exitoso = (result.returncode == 0 and carpetas_despues > carpetas_antes)
-            
-            # Parsear el output para obtener número de ciudades procesadas
-            ciudades_procesadas = 0
-            if "Ciudades procesadas:" in self.output_log:
-                try:
-                    linea = [l for l in self.output_log.split('\n') if "Ciudades procesadas:" in l][0]
-                    ciudades_procesadas = int(linea.split(':')[1].strip())
-                except:
-                    pass
-            
-            # También verificar por el mensaje final
-            if "Proceso terminado" in self.output_log and "Ciudades procesadas:" not in self.output_log:
-                # Buscar patrón "Proceso terminado. Ciudades procesadas: X"
-                try:
-                    lineas = self.output_log.split('\n')
-                    for linea in lineas:
-                        if "Proceso terminado" in linea and "procesadas:" in linea:
-                            ciudades_procesadas = int(linea.split(':')[1].strip())
-                            break
-                except:
-                    pass
+            ciudades_procesadas = resumen['ciudades_procesadas']
             
-            if proceso_exitoso or ciudades_procesadas > 0:
+            if resumen['exito']:
                 self.status = "completed"
                 settings.marcar_paso_completado('paso1', True)
                 mensaje = f"✅ Generador base ejecutado exitosamente"
                 if ciudades_procesadas > 0:
                     mensaje += f" - {ciudades_procesadas} ciudades procesadas"
+                if self.omitidos:
+                    mensaje += f" - {len(self.omitidos)} sin cambios (omitidas)"
                 if carpetas_despues > carpetas_antes:
                     mensaje += f" - {carpetas_despues - carpetas_antes} carpetas creadas"
                 return True, mensaje
             else:
                 self.status = "error"
-                self.error_message = result.stderr or "No se crearon carpetas de ciudades"
+                errores = [r['error'] for r in self.resultados if r['error']]
+                self.error_message = resumen['error'] or "; ".join(errores) or "No se crearon carpetas de ciudades"
                 settings.marcar_paso_completado('paso1', False)
                 return False, f"❌ Error en ejecución: {self.error_message}"
-                
-        except subprocess.TimeoutExpired:
-            self.status = "error"
-            self.error_message = "Timeout: El script tardó más de 5 minutos"
-            settings.marcar_paso_completado('paso1', False)
-            return False, self.error_message
             
         except Exception as e:
             self.status = "error"
@@ -163,6 +148,8 @@ class BaseGeneratorModel:
             'ready_for_next': self.is_ready_for_next_step(),
             'error_message': self.error_message,
             'output_log': self.output_log,
+            'resultados': self.resultados,
+            'omitidos': self.omitidos,
             'script_exists': self.script_path.exists()
         }
     
@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Modelo wrapper para rellenador_tags.py
+Modelo wrapper para rellenador_tags.py (ejecución en proceso)
 """
 
-import sys
-import os
-import subprocess
-from pathlib import Path
-from typing import Tuple, Dict, Any, List
+import io
+import contextlib
+from datetime import datetime
+from typing import Tuple, Dict, Any, List, Optional
 import pandas as pd
 
 from ..config.settings import settings
@@ -31,6 +30,8 @@ class IRCAModel:
         self.output_log = ""
         self.aeropuertos_procesados = 0
         self.aeropuertos_exitosos = 0
+        self.aeropuertos_omitidos = 0
+        self.resultados_lote = {}
     
     def can_execute(self) -> Tuple[bool, str]:
         """Verifica si puede ejecutarse (requiere paso 1 completado)"""
@@ -49,10 +50,13 @@ class IRCAModel:
         
         return True, "✅ Listo para ejecutar"
     
-    def execute(self) -> Tuple[bool, str]:
+    def execute(self, forzar: bool = False) -> Tuple[bool, str]:
         """
-        Ejecuta el script rellenador_tags.py
-        Crea archivo Excel temporal con datos CSV filtrados por mes
+        Ejecuta rellenador_tags.py dentro del proceso actual
+        Entrega directamente el DataFrame IRCA filtrado por mes (sin Excel temporal)
+        
+        Args:
+            forzar: reprocesar todas las ciudades aunque sus filas IRCA no hayan cambiado
         
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
@@ -68,64 +72,38 @@ class IRCAModel:
             self.error_message = ""
             self.aeropuertos_procesados = 0
             self.aeropuertos_exitosos = 0
+            self.aeropuertos_omitidos = 0
             
-            # PASO CRÍTICO: Preparar archivo Excel temporal para el script original
-            excel_temp_path = self._prepare_excel_for_script()
-            if not excel_temp_path:
+            # Datos IRCA filtrados y tipados (fechas y porcentajes ya convertidos)
+            df_irca = self._prepare_irca_dataframe()
+            if df_irca is None:
                 self.status = "error"
-                self.error_message = "Error creando archivo Excel temporal"
+                self.error_message = "Error preparando datos IRCA"
                 return False, "❌ Error preparando datos IRCA para procesamiento"
             
-            # Configurar entorno con UTF-8 para manejar emojis
-            env = os.environ.copy()
-            env['PYTHONIOENCODING'] = 'utf-8'
-            env['PYTHONUTF8'] = '1'
-            
-            # Ejecutar el script original que ahora puede leer el Excel temporal
-            result = subprocess.run(
-                [sys.executable, str(self.script_path)],
-                cwd=str(self.script_path.parent),
-                capture_output=True,
-                text=True,
-                timeout=600,  # 10 minutos timeout
-                env=env,
-                encoding='utf-8',
-                errors='replace'  # Reemplazar caracteres problemáticos
+            # Importar el motor del Paso 2 (queda en caché tras la primera ejecución)
+            rellenador = settings.cargar_modulo_script("rellenador_tags")
+            sistema = rellenador.IRCAAutomationSystem(
+                str(settings.DATOS_DIR),
+                str(settings.IRCA_FILE),
+                motor_excel=settings.EXCEL_MOTOR
             )
             
-            self.output_log = result.stdout
-            
-            # Limpiar archivo temporal
-            self._cleanup_temp_excel(excel_temp_path)
-            
-            # Analizar output para extraer métricas
-            self._parse_execution_metrics()
-            
-            # Debug: Mostrar información del resultado
-            print(f"🔍 Return code del script: {result.returncode}")
-            print(f"📊 STDOUT length: {len(result.stdout) if result.stdout else 0}")
-            print(f"📊 STDERR length: {len(result.stderr) if result.stderr else 0}")
-            
-            # Verificar si el procesamiento fue exitoso basándose en el output
-            # El script puede devolver código != 0 pero aún así procesar correctamente
-            procesamiento_exitoso = False
-            
-            if result.returncode == 0:
-                procesamiento_exitoso = True
-            else:
-                # Verificar si hay indicios de éxito en el output
-                if result.stdout and "✅" in result.stdout:
-                    # Contar cuántos aeropuertos se procesaron exitosamente
-                    exitosos = result.stdout.count("✅")
-                    total_procesados = result.stdout.count("[")  # Cada aeropuerto tiene [X/Y]
-                    
-                    print(f"🔍 Aeropuertos exitosos detectados: {exitosos}")
-                    print(f"🔍 Total aeropuertos procesados: {total_procesados}")
-                    
-                    # Si se procesó al menos 1 aeropuerto exitosamente, considerar éxito
-                    if exitosos > 0:
-                        procesamiento_exitoso = True
-                        print("✅ Detectado procesamiento parcial exitoso")
+            # Ejecutar capturando la salida para el log de la UI
+            buffer_log = io.StringIO()
+            with contextlib.redirect_stdout(buffer_log):
+                procesamiento_exitoso = sistema.ejecutar_procesamiento(
+                    df_irca,
+                    workers=settings.PASO2_WORKERS,
+                    forzar=forzar,
+                    ruta_huellas=str(settings.HUELLAS_PASO2)
+                )
+            
+            self.output_log = buffer_log.getvalue()
+            self.aeropuertos_procesados = sistema.total_aeropuertos
+            self.aeropuertos_exitosos = sistema.aeropuertos_exitosos
+            self.aeropuertos_omitidos = sistema.aeropuertos_omitidos
+            self.last_execution = datetime.now()
             
             if procesamiento_exitoso:
                 self.status = "completed"
@@ -141,18 +119,15 @@ class IRCAModel:
                     except Exception as e:
                         print(f"❌ Error creando archivo de estado: {e}")
                 
-                return True, f"✅ Procesamiento IRCA completado: {self.aeropuertos_exitosos}/{self.aeropuertos_procesados} aeropuertos"
+                mensaje = f"✅ Procesamiento IRCA completado: {self.aeropuertos_exitosos}/{self.aeropuertos_procesados} aeropuertos"
+                if self.aeropuertos_omitidos:
+                    mensaje += f" - {self.aeropuertos_omitidos} sin cambios (omitidos)"
+                return True, mensaje
             else:
                 self.status = "error"
-                self.error_message = result.stderr or "Error desconocido"
+                self.error_message = "Ningún aeropuerto se procesó correctamente"
                 settings.marcar_paso_completado('paso2', False)
-                print(f"❌ STDERR completo: {result.stderr}")
                 return False, f"❌ Error en procesamiento IRCA: {self.error_message}"
-                
-        except subprocess.TimeoutExpired:
-            self.status = "error"
-            self.error_message = "Timeout: El procesamiento tardó más de 10 minutos"
-            return False, self.error_message
             
         except Exception as e:
             self.status = "error"
@@ -160,17 +135,56 @@ class IRCAModel:
             settings.marcar_paso_completado('paso2', False)
             return False, f"❌ Error inesperado: {self.error_message}"
     
-    def _parse_execution_metrics(self):
-        """Extrae métricas del output del script"""
+    def execute_batch(self, periodos: List[Tuple[str, int]]) -> Tuple[bool, str]:
+        """
+        Ejecuta rellenador_tags.py en modo por lotes para varios periodos (mes, año)
+        El CSV se lee e indexa una sola vez; las salidas quedan en
+        Datos/<Ciudad>/periodos/<Año>-<MM>/base_<Ciudad>.xlsx
+        
+        Args:
+            periodos: lista de (mes, año), p.ej. [('Enero', 2025), ('Febrero', 2025)]
+        
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        can_run, message = self.can_execute()
+        if not can_run:
+            return False, message
+        if not periodos:
+            return False, "❌ No se indicaron periodos para procesar"
+        
         try:
-            lines = self.output_log.split('\n')
-            for line in lines:
-                if 'Total aeropuertos:' in line:
-                    self.aeropuertos_procesados = int(line.split(':')[1].strip())
-                elif 'Procesados exitosamente:' in line:
-                    self.aeropuertos_exitosos = int(line.split(':')[1].strip())
-        except:
-            pass  # Si no puede parsear, mantener valores por defecto
+            self.status = "executing"
+            self.output_log = ""
+            self.error_message = ""
+            
+            rellenador = settings.cargar_modulo_script("rellenador_tags")
+            sistema = rellenador.IRCAAutomationSystem(
+                str(settings.DATOS_DIR),
+                str(settings.IRCA_FILE),
+                motor_excel=settings.EXCEL_MOTOR
+            )
+            
+            buffer_log = io.StringIO()
+            with contextlib.redirect_stdout(buffer_log):
+                resultado = sistema.ejecutar_lote(periodos, settings.get_datos_irca())
+            
+            self.output_log = buffer_log.getvalue()
+            self.last_execution = datetime.now()
+            self.resultados_lote = resultado['periodos']
+            # El lote no modifica los libros base: el estado del Paso 2 no cambia
+            self.status = "completed" if settings.get_paso_status('paso2') else "not_executed"
+            
+            if resultado['exito']:
+                return True, (f"✅ Lote IRCA completado: {resultado['archivos']} archivos "
+                              f"en {len(resultado['periodos'])} periodos")
+            self.error_message = "No se generó ningún archivo para los periodos indicados"
+            return False, f"❌ Error en lote IRCA: {self.error_message}"
+            
+        except Exception as e:
+            self.status = "error"
+            self.error_message = str(e)
+            return False, f"❌ Error inesperado: {self.error_message}"
     
     def is_ready_for_next_step(self) -> bool:
         """Verifica si este paso está completado y listo para el siguiente"""
@@ -187,6 +201,7 @@ class IRCAModel:
             'output_log': self.output_log,
             'aeropuertos_procesados': self.aeropuertos_procesados,
             'aeropuertos_exitosos': self.aeropuertos_exitosos,
+            'aeropuertos_omitidos': self.aeropuertos_omitidos,
             'script_exists': self.script_path.exists()
         }
     
@@ -196,19 +211,14 @@ class IRCAModel:
             if not settings.IRCA_FILE.exists():
                 return {'error': 'Archivo IRCA no encontrado'}
             
-            # Leer CSV con separador punto y coma
-            df = pd.read_csv(settings.IRCA_FILE, sep=';')
-            
-            # Filtrar por mes/año seleccionado si está configurado
+            # Datos tipados (IRCA (%) ya es float), solo del mes/año seleccionado si está configurado
             if settings.SELECTED_MONTH and settings.SELECTED_YEAR:
-                df = df[(df['Mes'] == settings.SELECTED_MONTH) & 
-                       (pd.to_datetime(df['Fecha'], format='%d/%m/%Y', errors='coerce').dt.year == settings.SELECTED_YEAR)]
+                df = settings.get_datos_irca(settings.SELECTED_MONTH, settings.SELECTED_YEAR)
+            else:
+                df = settings.get_datos_irca()
             
             ciudades_irca = df['Ciudad'].value_counts().to_dict()
-            
-            # Convertir porcentajes string a float
-            df['IRCA_Numeric'] = df['IRCA (%)'].str.replace('%', '').str.replace(',', '.').astype(float)
-            irca_promedio = df['IRCA_Numeric'].mean() if len(df) > 0 else 0
+            irca_promedio = df['IRCA (%)'].mean() if len(df) > 0 else 0
             
             return {
                 'total_registros': len(df),
@@ -252,44 +262,27 @@ class IRCAModel:
         
         return archivos_validados
     
-    def _prepare_excel_for_script(self) -> str:
+    def _prepare_irca_dataframe(self) -> Optional[pd.DataFrame]:
         """
-        Crea archivo Excel temporal con datos CSV filtrados por mes seleccionado
-        para que el script original rellenador_tags.py pueda procesarlo
+        Prepara los datos CSV filtrados por mes seleccionado para entregarlos
+        directamente a IRCAAutomationSystem.cargar_datos_irca()
         
         Returns:
-            str: Ruta del archivo Excel temporal creado, o None si hay error
+            pd.DataFrame: Datos IRCA con Fecha como datetime e IRCA (%) numérico, o None si hay error
         """
         try:
-            # Leer datos CSV con encoding UTF-8
-            print(f"🔍 Leyendo CSV: {settings.IRCA_FILE}")
-            df_csv = pd.read_csv(settings.IRCA_FILE, sep=';', encoding='utf-8')
-            
-            # DEBUG: Verificar columnas leídas
-            print(f"📊 Columnas CSV leídas: {list(df_csv.columns)}")
-            print(f"📊 Shape del DataFrame: {df_csv.shape}")
-            print(f"📊 Primeras filas:\n{df_csv.head(2)}")
-            
-            # Validar que tiene las columnas necesarias
-            required_cols = ['Ciudad', 'Codigo', 'IRCA (%)']
-            missing_cols = [col for col in required_cols if col not in df_csv.columns]
-            if missing_cols:
-                print(f"❌ Columnas faltantes: {missing_cols}")
-                print(f"📊 Columnas disponibles: {list(df_csv.columns)}")
-                return None
+            datos_irca = settings.cargar_modulo_script("datos_irca")
             
             # Filtrar por mes/año seleccionado si está configurado
             if settings.SELECTED_MONTH and settings.SELECTED_YEAR:
-                # Parsear fecha para extraer año
-                df_csv['Fecha_parsed'] = pd.to_datetime(df_csv['Fecha'], format='%d/%m/%Y', errors='coerce')
-                df_csv['Año_parsed'] = df_csv['Fecha_parsed'].dt.year
+                # Solo las filas del mes seleccionado (todos los años): lectura por bloques
+                # si el histórico completo no está ya en caché
+                print(f"🔍 Leyendo CSV: {settings.IRCA_FILE} (mes {settings.SELECTED_MONTH})")
+                df_mes = settings.get_datos_irca(settings.SELECTED_MONTH)
                 
                 # CORRECCIÓN: Filtrado más flexible para evitar mapeo vacío
                 # Primero intentar filtrado exacto por mes y año
-                df_filtered_exact = df_csv[
-                    (df_csv['Mes'] == settings.SELECTED_MONTH) & 
-                    (df_csv['Año_parsed'] == settings.SELECTED_YEAR)
-                ].copy()
+                df_filtered_exact = datos_irca.filtrar_periodo(df_mes, año=settings.SELECTED_YEAR).copy()
                 
                 print(f"🔍 Filtrando datos IRCA: {settings.SELECTED_MONTH} {settings.SELECTED_YEAR}")
                 print(f"📊 Registros filtrado exacto: {len(df_filtered_exact)}")
@@ -297,24 +290,21 @@ class IRCAModel:
                 # Si el filtrado exacto resulta en pocos datos, usar filtrado por mes solamente
                 if len(df_filtered_exact) < 10:  # Umbral mínimo de registros
                     print(f"⚠️ Pocos registros con filtrado exacto, usando solo filtro por mes")
-                    df_filtered = df_csv[df_csv['Mes'] == settings.SELECTED_MONTH].copy()
+                    df_filtered = df_mes.copy()
                     print(f"📊 Registros con filtrado por mes: {len(df_filtered)}")
                     
                     # Si aún son pocos, usar los datos más recientes disponibles
                     if len(df_filtered) < 5:
                         print(f"⚠️ Muy pocos registros para {settings.SELECTED_MONTH}, usando datos más recientes")
                         # Obtener el año más reciente disponible para este mes
-                        años_disponibles = df_csv[df_csv['Mes'] == settings.SELECTED_MONTH]['Año_parsed'].dropna()
+                        años_disponibles = df_mes['Año'].dropna()
                         if len(años_disponibles) > 0:
                             año_reciente = años_disponibles.max()
-                            df_filtered = df_csv[
-                                (df_csv['Mes'] == settings.SELECTED_MONTH) & 
-                                (df_csv['Año_parsed'] == año_reciente)
-                            ].copy()
+                            df_filtered = datos_irca.filtrar_periodo(df_mes, año=año_reciente).copy()
                             print(f"📊 Usando datos de {settings.SELECTED_MONTH} {int(año_reciente)}: {len(df_filtered)} registros")
                         else:
                             # Último recurso: usar todos los datos
-                            df_filtered = df_csv.copy()
+                            df_filtered = settings.get_datos_irca().copy()
                             print(f"⚠️ Usando todos los datos disponibles: {len(df_filtered)} registros")
                 else:
                     df_filtered = df_filtered_exact
@@ -325,157 +315,49 @@ class IRCAModel:
                 print(f"🏙️ Lista: {sorted(ciudades_disponibles)}")
                 
             else:
-                df_filtered = df_csv.copy()
+                print(f"🔍 Leyendo CSV: {settings.IRCA_FILE}")
+                df_filtered = settings.get_datos_irca().copy()
                 print("⚠️ Sin filtro de mes - usando todos los datos CSV")
             
             if len(df_filtered) == 0:
                 print("❌ No hay datos después del filtrado")
                 return None
             
-            # Convertir formato CSV a formato Excel compatible con script original
-            # El script necesita todas las columnas del CSV original
-            df_excel = df_filtered.copy()
+            # El rellenador necesita todas las columnas del CSV original
+            df_irca = df_filtered.copy()
             
-            # Validar que df_excel mantiene las columnas críticas
-            print(f"🔍 DataFrame Excel pre-proceso - Columnas: {list(df_excel.columns)}")
-            if 'Ciudad' not in df_excel.columns:
+            # Validar que df_irca mantiene las columnas críticas
+            if 'Ciudad' not in df_irca.columns:
                 print(f"❌ ERROR CRÍTICO: Columna 'Ciudad' perdida durante filtrado")
                 return None
             
-            # CORRECCIÓN CRÍTICA: Formato de fecha inequívoco para rellenador_tags.py
-            # El script original usa pd.to_datetime() sin formato, causando interpretación errónea
-            if 'Fecha' in df_excel.columns:
-                # Parsear correctamente como día/mes/año
-                df_excel['Fecha_parsed_temp'] = pd.to_datetime(df_excel['Fecha'], format='%d/%m/%Y', errors='coerce')
-                
-                # SOLUCIÓN: Usar formato ISO YYYY-MM-DD que es inequívoco
-                # El script rellenador_tags.py no puede malinterpretar este formato
-                df_excel['Fecha'] = df_excel['Fecha_parsed_temp'].dt.strftime('%Y-%m-%d')
-                
-                # Eliminar columna temporal
-                df_excel = df_excel.drop('Fecha_parsed_temp', axis=1)
-                print(f"✅ Fechas convertidas a formato ISO (YYYY-MM-DD) - inequívoco")
-                
-                # Verificar algunas fechas como muestra
-                fechas_muestra = df_excel['Fecha'].head(3).tolist()
-                print(f"📅 Fechas ISO muestra: {fechas_muestra}")
-                
-                # Verificar específicamente datos de Pasto si existen
-                pasto_datos = df_excel[df_excel['Ciudad'] == 'Pasto']
-                if len(pasto_datos) > 0:
-                    print(f"🎯 Fechas de Pasto corregidas:")
-                    for _, row in pasto_datos.head(2).iterrows():
-                        print(f"   • Código {row['Codigo']}: {row['Fecha']}")
-                        # Verificar que es julio
-                        fecha_check = pd.to_datetime(row['Fecha'])
-                        mes_nombre = fecha_check.strftime('%B')
-                        print(f"     → {fecha_check.day} de {mes_nombre} de {fecha_check.year}")
-                        if fecha_check.month == 7:
-                            print(f"     ✅ Correctamente identificado como julio")
-                        else:
-                            print(f"     ❌ ERROR: Mes {fecha_check.month} no es julio")
-            
-            # Limpiar datos de IRCA - remover % y convertir comas a puntos
-            df_excel['IRCA (%)'] = df_excel['IRCA (%)'].astype(str).str.replace('%', '').str.replace(',', '.')
-            df_excel['IRCA (%)'] = pd.to_numeric(df_excel['IRCA (%)'], errors='coerce')
-            
-            # Crear archivo Excel temporal
-            excel_temp_path = settings.DATOS_DIR / "IRCA(%).xlsx"
-            
-            # CORRECCIÓN: Guardar Excel con fechas en formato ISO inequívoco
-            # El formato YYYY-MM-DD no puede ser malinterpretado por pd.to_datetime()
-            try:
-                with pd.ExcelWriter(excel_temp_path, engine='openpyxl') as writer:
-                    # Las fechas ya están en formato ISO YYYY-MM-DD, mantener como string
-                    df_save = df_excel.copy()
-                    if 'Fecha' in df_save.columns:
-                        df_save['Fecha'] = df_save['Fecha'].astype(str)
-                        print(f"✅ Fechas guardadas como string formato ISO")
-                    
-                    # Guardar el DataFrame
-                    df_save.to_excel(writer, sheet_name='Sheet1', index=False)
-                    
-                    # Acceder a la hoja y configurar formato como texto para garantizar
-                    worksheet = writer.sheets['Sheet1']
-                    
-                    # Formatear columna Fecha como texto
-                    if 'Fecha' in df_save.columns:
-                        fecha_col_idx = list(df_save.columns).index('Fecha') + 1
-                        for row in range(2, len(df_save) + 2):
-                            cell = worksheet.cell(row=row, column=fecha_col_idx)
-                            cell.number_format = '@'  # Formato texto
-                        
-                        print(f"✅ Columna Fecha ISO formateada como texto en Excel")
-                    
-                print(f"✅ Excel temporal con fechas ISO inequívocas")
-                
-            except Exception as e:
-                print(f"⚠️ Error con ExcelWriter, usando método estándar: {e}")
-                # Fallback con fechas ISO
-                df_excel.to_excel(excel_temp_path, index=False)
-                print(f"✅ Fallback: Excel guardado con fechas ISO")
-            
-            # Validación post-guardado
-            print(f"📄 Excel temporal guardado con {len(df_excel)} registros")
+            # Fecha ya es datetime (día/mes/año) e IRCA (%) ya es float: el rellenador
+            # no vuelve a interpretar texto, así que no hay ambigüedad día/mes
+            fechas_muestra = df_irca['Fecha'].dt.strftime('%Y-%m-%d').head(3).tolist()
+            print(f"📅 Fechas muestra: {fechas_muestra}")
             
-            # Verificar que el Excel se puede leer correctamente
-            try:
-                df_test = pd.read_excel(excel_temp_path)
-                if 'Ciudad' not in df_test.columns:
-                    print(f"❌ ERROR: Excel temporal no tiene columna 'Ciudad'")
-                    return None
-                print(f"✅ Excel temporal verificado - Columna 'Ciudad' presente")
-                
-                # NUEVA VALIDACIÓN: Verificar que hay datos suficientes para el mapeo
-                ciudades_excel = df_test['Ciudad'].unique()
-                codigos_excel = df_test['Codigo'].unique()
-                
-                print(f"✅ Ciudades en Excel temporal: {len(ciudades_excel)}")
-                print(f"✅ Códigos únicos en Excel: {len(codigos_excel)}")
-                
-                # Verificar que hay al menos 1 código por ciudad
-                min_ciudades_requeridas = 3  # Mínimo para que el mapeo sea útil
-                if len(ciudades_excel) < min_ciudades_requeridas:
-                    print(f"⚠️ ADVERTENCIA: Solo {len(ciudades_excel)} ciudades en Excel temporal")
-                    print(f"⚠️ El rellenador_tags.py puede fallar para ciudades faltantes")
-                
-                # Verificar distribución de códigos por ciudad
-                distribucion_codigos = df_test.groupby('Ciudad')['Codigo'].nunique()
-                print(f"📊 Códigos por ciudad:")
-                for ciudad, count in distribucion_codigos.items():
-                    print(f"   • {ciudad}: {count} códigos")
-                
-            except Exception as e:
-                print(f"❌ Error verificando Excel temporal: {e}")
-                return None
+            # Distribución de códigos por ciudad (antes se verificaba releyendo el Excel temporal)
+            distribucion_codigos = df_irca.groupby('Ciudad', observed=True)['Codigo'].nunique()
+            if len(distribucion_codigos) < 3:  # Mínimo para que el mapeo sea útil
+                print(f"⚠️ ADVERTENCIA: Solo {len(distribucion_codigos)} ciudades en los datos filtrados")
+                print(f"⚠️ El rellenador_tags.py puede fallar para ciudades faltantes")
+            print(f"📊 Códigos por ciudad:")
+            for ciudad, count in distribucion_codigos.items():
+                print(f"   • {ciudad}: {count} códigos")
             
-            print(f"✅ Archivo Excel temporal creado: {excel_temp_path}")
-            print(f"📄 Códigos únicos: {df_excel['Codigo'].nunique()}")
-            print(f"🏙️ Ciudades únicas: {df_excel['Ciudad'].nunique()}")
-            print(f"📊 Columnas disponibles: {list(df_excel.columns)}")
+            print(f"✅ Datos IRCA listos para el Paso 2: {len(df_irca)} registros")
+            print(f"📄 Códigos únicos: {df_irca['Codigo'].nunique()}")
+            print(f"🏙️ Ciudades únicas: {df_irca['Ciudad'].nunique()}")
+            print(f"📊 Columnas disponibles: {list(df_irca.columns)}")
             
-            return str(excel_temp_path)
+            return df_irca
             
         except Exception as e:
-            print(f"❌ Error creando archivo Excel temporal: {str(e)}")
+            print(f"❌ Error preparando datos IRCA: {str(e)}")
             import traceback
             traceback.print_exc()
             return None
     
-    def _cleanup_temp_excel(self, excel_path: str):
-        """
-        Limpia el archivo Excel temporal creado para el script
-        
-        Args:
-            excel_path (str): Ruta del archivo Excel temporal a eliminar
-        """
-        try:
-            if excel_path and Path(excel_path).exists():
-                Path(excel_path).unlink()
-                print(f"🗑️ Archivo Excel temporal eliminado: {excel_path}")
-        except Exception as e:
-            print(f"⚠️ No se pudo eliminar archivo temporal: {str(e)}")
-    
     def get_available_months(self):
         """Obtiene meses disponibles del archivo CSV"""
         return settings.get_available_months()
@@ -490,7 +372,7 @@ class IRCAModel:
             if not settings.IRCA_FILE.exists():
                 return []
             
-            df = pd.read_csv(settings.IRCA_FILE, sep=';', encoding='utf-8')
+            df = settings.get_datos_irca()
             if 'Ciudad' in df.columns:
                 return df['Ciudad'].unique().tolist()
             return []
@@ -505,7 +387,7 @@ class IRCAModel:
                 print(f"📁 Archivo IRCA no existe: {settings.IRCA_FILE}")
                 return []
             
-            df = pd.read_csv(settings.IRCA_FILE, sep=';', encoding='utf-8')
+            df = settings.get_datos_irca()
             print(f"📊 CSV leído - Shape: {df.shape}")
             print(f"📊 Columnas disponibles: {list(df.columns)}")
             
@@ -525,7 +407,7 @@ class IRCAModel:
                 if 'Año' in df.columns:
                     print(f"📅 Años únicos en CSV: {df['Año'].unique()}")
                     print(f"🔍 Filtrando por Mes='{mes}' y Año={año}")
-                    df_filtered = df[(df['Mes'] == mes) & (df['Año'] == año)]
+                    df_filtered = settings.cargar_modulo_script("datos_irca").filtrar_periodo(df, mes, año)
                 else:
                     print(f"⚠️ Columna 'Año' no encontrada, filtrando solo por Mes='{mes}'")
                     df_filtered = df[df['Mes'] == mes]
@@ -561,13 +443,8 @@ class IRCAModel:
             if not settings.IRCA_FILE.exists():
                 return {'error': 'Archivo IRCA no encontrado'}
             
-            # Leer CSV
-            df = pd.read_csv(settings.IRCA_FILE, sep=';')
-            
-            # Aplicar filtro si se proporciona
-            if mes and año:
-                df = df[(df['Mes'] == mes) & 
-                       (pd.to_datetime(df['Fecha'], format='%d/%m/%Y', errors='coerce').dt.year == año)]
+            # Datos tipados del CSV; con filtro solo se leen las filas del periodo
+            df = settings.get_datos_irca(mes, año) if mes and año else settings.get_datos_irca()
             
             return {
                 'data': df,
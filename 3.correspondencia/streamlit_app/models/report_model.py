@@ -84,7 +84,8 @@ class ReportModel:
             
             # Ejecutar el script
             result = subprocess.run(
-                [sys.executable, str(self.script_path)],
+                [sys.executable, str(self.script_path),
+                 str(settings.PASO3_WORKERS), settings.PASO3_RENDERIZADOR],
                 cwd=str(self.script_path.parent),
                 capture_output=True,
                 text=True,
@@ -577,6 +577,19 @@ class StreamlitUI:
             st.write(f"### {config['title']}")
             st.write(config['description'])
             st.write(f"Estado: {config['status_icon']} {config['status_text']}")
+            forzar = False
+            if paso == "paso1":
+                forzar = st.checkbox(
+                    "Forzar regeneración de todos los aeropuertos",
+                    key=f"forzar_{paso}",
+                    help="Ignora el manifiesto y regenera las bases y plantillas aunque el Excel de origen y la plantilla no hayan cambiado"
+                )
+            elif paso == "paso2":
+                forzar = st.checkbox(
+                    "Forzar reproceso de todas las ciudades",
+                    key=f"forzar_{paso}",
+                    help="Ignora las huellas y reescribe TAGS aunque los datos IRCA de la ciudad no hayan cambiado"
+                )
         
         with col2:
             button_disabled = not config['can_execute']
@@ -589,7 +602,7 @@ class StreamlitUI:
                 use_container_width=True
             ):
                 with st.spinner(f"Ejecutando {paso}..."):
-                    success, message = self.workflow_controller.execute_step(paso)
+                    success, message = self.workflow_controller.execute_step(paso, forzar=forzar)
                 
                 if success:
                     st.success(message)
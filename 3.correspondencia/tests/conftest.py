@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Los scripts se importan por nombre (igual que entre ellos dentro de Scripts/)
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "Scripts"))
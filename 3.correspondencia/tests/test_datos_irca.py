@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datos_irca import COLUMNA_CALIFICADOR_IRCA, filtrar_periodo, leer_csv_irca, tipar_irca
+from parseo_numerico import CALIFICADOR_SIN_DATO, CALIFICADOR_VALOR
+
+ENCABEZADO = "Fecha;Mes;Codigo;Ciudad;Punto de Muestreo;IRCA (%)"
+
+def escribir_csv(ruta, filas):
+    # Con BOM, como lo exporta Excel
+    ruta.write_text("\n".join([ENCABEZADO] + filas) + "\n", encoding="utf-8-sig")
+    return ruta
+
+@pytest.fixture
+def csv_irca(tmp_path):
+    filas = [f"{d}/07/2024;Julio;MP{d:04d};Armenia;P1. Entrada;0,{d % 10}" for d in range(1, 29)]
+    filas += [f"{d}/08/2025;Agosto;MQ{d:04d};Pasto;P2. Punto De Red;15,00%" for d in range(1, 29)]
+    filas += ["30/08/2025;Agosto;MQ9999;Pasto;P3. Tanque;n/a"]
+    return escribir_csv(tmp_path / "IRCA(%).csv", filas)
+
+def test_tipar_irca_interpreta_fechas_meses_y_porcentajes():
+    df = tipar_irca(pd.DataFrame({'Fecha': ["4/08/2025", "31/02/2025"], 'Mes': ["Agosto", "Agosto"],
+                                  'IRCA (%)': ["15,00%", "1,00%"]}))
+    assert df['Fecha'].iloc[0] == pd.Timestamp(2025, 8, 4)
+    assert pd.isna(df['Fecha'].iloc[1])
+    assert df['Año'].tolist()[0] == 2025
+    assert df['Mes_num'].tolist() == [8, 8]
+    np.testing.assert_array_equal(df['IRCA (%)'], [15.0, 1.0])
+
+def test_lectura_completa(csv_irca):
+    df = leer_csv_irca(csv_irca)
+    assert len(df) == 57
+    assert df['Ciudad'].cat.categories.tolist() == ["Armenia", "Pasto"]
+    # La columna trae '%': los valores sin signo ya están en 0-100
+    assert df['IRCA (%)'].iloc[0] == 0.1
+    assert df[COLUMNA_CALIFICADOR_IRCA].iloc[-1] == CALIFICADOR_SIN_DATO
+    assert (df[COLUMNA_CALIFICADOR_IRCA].iloc[:-1] == CALIFICADOR_VALOR).all()
+
+@pytest.mark.parametrize("mes, año", [("Julio", None), (None, 2025), ("Agosto", 2025), ("Agosto", 2024)])
+def test_lectura_por_bloques_igual_a_filtrar_la_lectura_completa(csv_irca, mes, año):
+    por_bloques = leer_csv_irca(csv_irca, mes=mes, año=año, tamaño_bloque=256)
+    esperado = filtrar_periodo(leer_csv_irca(csv_irca), mes, año).reset_index(drop=True)
+    pd.testing.assert_frame_equal(por_bloques, esperado, check_categorical=False)
@@ -0,0 +1,67 @@
+import zipfile
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from escritor_excel import MOTOR_OPENPYXL, MOTOR_XLSXWRITER, escribir_libro, reemplazar_hoja, resolver_motor
+
+MOTORES_DISPONIBLES = sorted({resolver_motor(MOTOR_OPENPYXL), resolver_motor(MOTOR_XLSXWRITER)})
+
+def hojas_base():
+    return {
+        'Sheet1': pd.DataFrame({'PARÁMETRO': ["Cloro residual", "Turbiedad"], 'RESULTADO': ["0,6", "1,53"]}),
+        'TAGS': pd.DataFrame({'TAG': ["mes", "año"], 'VALOR': ["Enero", 2025]}),
+        'TABLA_4': pd.DataFrame({'PARÁMETRO': ["Cloro residual"], 'P1. Lavamanos': ["n/a"]}),
+    }
+
+def partes(ruta):
+    with zipfile.ZipFile(ruta) as z:
+        return {nombre: z.read(nombre) for nombre in z.namelist()}
+
+def leer(ruta, hoja):
+    # Sin valores nulos por defecto: TABLA_4 escribe "n/a" como texto
+    return pd.read_excel(ruta, sheet_name=hoja, dtype=object, keep_default_na=False)
+
+@pytest.mark.parametrize("motor", MOTORES_DISPONIBLES)
+def test_escribe_las_hojas_en_orden_con_estilo(tmp_path, motor):
+    ruta = tmp_path / "Base.xlsx"
+    assert escribir_libro(ruta, hojas_base(), motor) == motor
+
+    libro = load_workbook(ruta)
+    assert libro.sheetnames == ['Sheet1', 'TAGS', 'TABLA_4']
+    for hoja in ('TAGS', 'TABLA_4'):
+        for celda in ('A1', 'A2'):
+            assert (libro[hoja][celda].font.name, libro[hoja][celda].font.size) == ('Verdana', 6)
+    assert libro['Sheet1']['A1'].font.name != 'Verdana'
+    for nombre, df in hojas_base().items():
+        pd.testing.assert_frame_equal(leer(ruta, nombre), df.astype(object))
+
+@pytest.mark.parametrize("motor", MOTORES_DISPONIBLES)
+def test_reemplazar_hoja_conserva_las_demas_partes(tmp_path, motor):
+    ruta = tmp_path / "Base.xlsx"
+    escribir_libro(ruta, hojas_base(), motor)
+    antes = partes(ruta)
+    estilo_tags = load_workbook(ruta)['TAGS']['A2'].font.name
+    # Ambos motores guardan las hojas como sheet1..sheetN en el orden del libro
+    ruta_hoja_tags = "xl/worksheets/sheet2.xml"
+    assert ruta_hoja_tags in antes
+
+    nuevos = pd.DataFrame({'TAG': ["mes", "año", "ciudad"], 'VALOR': ["Febrero", 2025, "Armenia & Quindío"]})
+    assert reemplazar_hoja(ruta, 'TAGS', nuevos)
+
+    despues = partes(ruta)
+    assert despues.keys() == antes.keys()
+    assert [n for n in antes if antes[n] != despues[n]] == [ruta_hoja_tags]
+    pd.testing.assert_frame_equal(leer(ruta, 'TAGS'), nuevos.astype(object))
+    for nombre in ('Sheet1', 'TABLA_4'):
+        pd.testing.assert_frame_equal(leer(ruta, nombre), hojas_base()[nombre].astype(object))
+    assert load_workbook(ruta)['TAGS']['A4'].font.name == estilo_tags
+
+def test_reemplazar_hoja_inexistente_no_toca_el_libro(tmp_path):
+    ruta = tmp_path / "Base.xlsx"
+    escribir_libro(ruta, hojas_base())
+    antes = ruta.read_bytes()
+
+    assert not reemplazar_hoja(ruta, 'NO_EXISTE', pd.DataFrame({'A': [1]}))
+    assert ruta.read_bytes() == antes
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generador_base_script import (COLUMNAS_FILA_TABLA_4, ResolutorAeropuertos, aeropuerto_ciudad,
+                                   construir_tabla_4, nombre_aeropuerto, resolver_ciudad)
+
+def tabla_4_pivot(df):
+    """Construcción anterior de TABLA_4 (pivot_table + orden categórico + reindex)"""
+    orden_param = df.drop_duplicates(subset=['PARÁMETRO'])['PARÁMETRO'].tolist()
+    puntos_unicos = df['PUNTO'].dropna().unique().tolist()
+    tabla = df.pivot_table(index=COLUMNAS_FILA_TABLA_4, columns='PUNTO', values='RESULTADO_CRUDO',
+                           aggfunc='first', sort=False).reset_index()
+    tabla['__orden__'] = pd.Categorical(tabla['PARÁMETRO'], categories=orden_param, ordered=True)
+    tabla = tabla.sort_values('__orden__', kind='stable').drop(columns='__orden__').reset_index(drop=True)
+    return tabla.reindex(columns=COLUMNAS_FILA_TABLA_4 + puntos_unicos, fill_value="n/a")
+
+def combinaciones_ordenadas(tabla):
+    return tabla.sort_values(COLUMNAS_FILA_TABLA_4, kind='stable').reset_index(drop=True)
+
+def fila(parametro, punto, resultado, tecnica="Volumetría", limite="0,5"):
+    return {'PARÁMETRO': parametro, 'TÉCNICA': tecnica, 'UNIDAD': "mg/L", 'LÍMITE': limite,
+            'PUNTO': punto, 'RESULTADO_CRUDO': resultado}
+
+@pytest.fixture
+def sheet1():
+    # Orden de filas mezclado, resultados repetidos y nulos, un punto sin resultados
+    return pd.DataFrame([
+        fila("Cloro residual", "P2. Cocina", "0,8"),
+        fila("Turbiedad", "P1. Lavamanos", "1,53 +/- 0,0465", limite="2"),
+        fila("Cloro residual", "P1. Lavamanos", np.nan),
+        fila("Cloro residual", "P1. Lavamanos", "0,6"),
+        fila("Coliformes totales", "P3. Tanque", np.nan, limite="0"),
+        fila("Turbiedad", "P2. Cocina", "0,9", limite="2"),
+        fila("Cloro residual", "P2. Cocina", "0,7"),
+        fila("Coliformes totales", "P1. Lavamanos", "Ausente", limite="0"),
+        fila("Turbiedad", "P1. Lavamanos", "1,10", limite="2"),
+    ])
+
+def test_tabla_4_igual_a_la_construccion_con_pivot(sheet1):
+    esperado = tabla_4_pivot(sheet1)
+    tabla = construir_tabla_4(sheet1)
+
+    pd.testing.assert_frame_equal(tabla, esperado, check_dtype=False, check_names=False)
+    assert tabla['PARÁMETRO'].tolist() == ["Cloro residual", "Turbiedad", "Coliformes totales"]
+    assert tabla.columns[len(COLUMNAS_FILA_TABLA_4):].tolist() == ["P2. Cocina", "P1. Lavamanos", "P3. Tanque"]
+    # Primer resultado no nulo de cada celda; el punto sin resultados queda en "n/a"
+    assert tabla.loc[0, "P1. Lavamanos"] == "0,6"
+    assert tabla.loc[1, "P1. Lavamanos"] == "1,53 +/- 0,0465"
+    assert (tabla["P3. Tanque"] == "n/a").all()
+
+def test_tabla_4_combinaciones_en_orden_de_primera_aparicion(sheet1):
+    otra_tecnica = pd.DataFrame([fila("Cloro residual", "P3. Tanque", "0,4", tecnica="Colorimetría")])
+    df = pd.concat([otra_tecnica, sheet1], ignore_index=True)
+    tabla = construir_tabla_4(df)
+
+    assert tabla[['PARÁMETRO', 'TÉCNICA']].values.tolist()[:2] == [["Cloro residual", "Colorimetría"],
+                                                                    ["Cloro residual", "Volumetría"]]
+    # Mismo contenido que el pivot, salvo el orden interno de las combinaciones de un parámetro
+    pd.testing.assert_frame_equal(combinaciones_ordenadas(tabla), combinaciones_ordenadas(tabla_4_pivot(df)),
+                                  check_dtype=False, check_names=False)
+
+def test_tabla_4_descarta_filas_sin_punto_o_sin_resultados(sheet1):
+    df = pd.concat([sheet1, pd.DataFrame([fila("Hierro", None, "0,1"), fila("Nitritos", "P1. Lavamanos", np.nan)])],
+                   ignore_index=True)
+    assert construir_tabla_4(df)['PARÁMETRO'].tolist() == construir_tabla_4(sheet1)['PARÁMETRO'].tolist()
+
+@pytest.mark.parametrize("archivo, ciudad", [
+    ("Base_Aeropuerto El Edén.xlsx", "Armenia"),
+    ("Base_Aeropuerto Ernesto Cortissoz.xlsx", "Barranquilla"),
+    ("Base_Aeropuerto Antonio Nariño.xlsx", "Pasto"),
+    ("base_aeropuerto San Luis.xlsx", "Ipiales"),
+    # Nombres truncados en el nombre del archivo
+    ("Base_Aeropuerto Golfo De Morrosquill.xlsx", "Tolu"),
+    ("Base_Aeropuerto Guillermo León Valen.xlsx", "Popayan"),
+    # Sin tildes, en mayúsculas o con texto adicional
+    ("Base_Aeropuerto JUAN CASIANO SOLIS.xlsx", "Guapi"),
+    ("Base_Aeropuerto Aeropuerto La Florida Tumaco.xlsx", "Tumaco"),
+])
+def test_resuelve_aeropuerto_a_ciudad(archivo, ciudad):
+    assert resolver_ciudad(nombre_aeropuerto(archivo)) == ciudad
+
+def test_aeropuerto_desconocido_no_tiene_ciudad():
+    resultado = ResolutorAeropuertos(aeropuerto_ciudad).resolver("Matecaña")
+    assert resultado == {'ciudad': None, 'candidatos': [], 'ambiguo': False}
+
+def test_nombre_ambiguo_no_elige_ciudad():
+    resolutor = ResolutorAeropuertos({"SAN LUIS": "Ipiales", "SAN ANDRÉS": "San Andres"})
+    resultado = resolutor.resolver("San")
+    assert resultado['ciudad'] is None
+    assert resultado['ambiguo']
+    assert resultado['candidatos'] == ["Ipiales", "San Andres"]
@@ -0,0 +1,35 @@
+import os
+
+from huellas import cargar_registro, guardar_registro, huella_archivo, huella_datos
+
+def test_huella_archivo_cambia_con_el_contenido(tmp_path):
+    ruta = tmp_path / "Base.xlsx"
+    ruta.write_bytes(b"uno")
+    primera = huella_archivo(ruta)
+    ruta.write_bytes(b"dos")
+    assert huella_archivo(ruta, primera)['sha256'] != primera['sha256']
+
+def test_huella_archivo_reutiliza_la_previa_si_no_cambio(tmp_path):
+    ruta = tmp_path / "Base.xlsx"
+    ruta.write_bytes(b"uno")
+    previa = dict(huella_archivo(ruta), sha256="conocido")
+    assert huella_archivo(ruta, previa)['sha256'] == "conocido"
+
+def test_huella_datos_no_depende_del_orden_de_las_claves():
+    assert huella_datos({'mes': "Julio", 'año': 2025}) == huella_datos({'año': 2025, 'mes': "Julio"})
+    assert huella_datos({'mes': "Julio"}) != huella_datos({'mes': "Agosto"})
+
+def test_registro_ida_y_vuelta(tmp_path):
+    ruta = str(tmp_path / ".paso2_huellas.json")
+    registro = {'ciudades': {'Armenia': {'datos': "abc"}}}
+    guardar_registro(ruta, registro)
+    assert cargar_registro(ruta, 'ciudades') == registro
+    assert not os.path.exists(ruta + ".tmp")
+
+def test_registro_inexistente_o_danado_queda_vacio(tmp_path):
+    ruta = tmp_path / ".paso2_huellas.json"
+    assert cargar_registro(str(ruta), 'ciudades') == {'ciudades': {}}
+    ruta.write_text("{no es json", encoding="utf-8")
+    assert cargar_registro(str(ruta), 'ciudades') == {'ciudades': {}}
+    ruta.write_text('{"ciudades": []}', encoding="utf-8")
+    assert cargar_registro(str(ruta), 'ciudades') == {'ciudades': {}}
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from indice_plantillas import cargar_indice_plantillas, normaliza
+
+@pytest.fixture
+def plantillas(tmp_path):
+    carpeta = tmp_path / "Plantillas"
+    carpeta.mkdir()
+    for nombre in ["Plantilla_AP_ARM_2024.docx", "Plantilla_AP_ARM_2025.docx", "Plantilla_AP_POP_2025.docx",
+                   "Plantilla_AP_SAI_2025.docx", "~$antilla_AP_POP_2025.docx", "Notas.txt"]:
+        (carpeta / nombre).write_bytes(b"")
+    return carpeta
+
+def test_normaliza_quita_tildes_y_pasa_a_mayusculas():
+    assert normaliza(" Popayán ") == "POPAYAN"
+    assert normaliza("Nariño") == "NARINO"
+
+def test_busca_por_abreviatura_con_el_año_mas_reciente(plantillas):
+    indice = cargar_indice_plantillas(str(plantillas))
+    assert indice.buscar("Armenia", "ARM") == os.path.join(indice.directorio, "Plantilla_AP_ARM_2025.docx")
+    assert indice.buscar("San Andres", "sai").endswith("Plantilla_AP_SAI_2025.docx")
+    assert indice.buscar("Leticia", "LET") is None
+    assert "~$antilla_AP_POP_2025.docx" not in indice.archivos
+
+def test_indice_en_disco_se_invalida_al_cambiar_la_carpeta(plantillas, tmp_path):
+    ruta_cache = str(tmp_path / ".indice_plantillas.json")
+    cargar_indice_plantillas(str(plantillas), ruta_cache)
+    with open(ruta_cache, encoding="utf-8") as f:
+        assert "Plantilla_AP_TUM_2025.docx" not in json.load(f)['archivos']
+
+    (plantillas / "Plantilla_AP_TUM_2025.docx").write_bytes(b"")
+    # mtime distinto aunque el sistema de archivos tenga poca resolución
+    estado = os.stat(plantillas)
+    os.utime(plantillas, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+
+    indice = cargar_indice_plantillas(str(plantillas), ruta_cache)
+    assert indice.buscar("Tumaco", "TUM").endswith("Plantilla_AP_TUM_2025.docx")
+    with open(ruta_cache, encoding="utf-8") as f:
+        assert "Plantilla_AP_TUM_2025.docx" in json.load(f)['archivos']
+
+def test_carpeta_inexistente(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cargar_indice_plantillas(str(tmp_path / "no_existe"))
@@ -0,0 +1,50 @@
+import pandas as pd
+from openpyxl import Workbook
+
+from lector_excel import HOJA_ORIGEN, HOJA_TAGS, leer_hoja_origen, normaliza_columna
+
+def libro_laboratorio(ruta, con_tags=True):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.title = HOJA_ORIGEN
+    # Filas de título antes del encabezado, como en los libros del laboratorio
+    hoja.append(["Resultados de laboratorio"])
+    hoja.append([])
+    hoja.append([" parámetro ", "Punto de muestreo", "Método", "RESULTADO_CRUDO"])
+    hoja.append(["Turbiedad", "P1. Entrada", "Nefelometría", 1.0])
+    hoja.append([None, None, None, None])
+    hoja.append(["Cloro residual", "P2. Cocina", "Colorimetría", "0,6"])
+    if con_tags:
+        tags = libro.create_sheet(HOJA_TAGS)
+        tags.append(["ETIQUETA", "VALOR"])
+        tags.append(["mes", "Agosto"])
+    libro.save(ruta)
+    return ruta
+
+def test_normaliza_columna():
+    assert normaliza_columna(" Punto de muestreo ") == "PUNTO"
+    assert normaliza_columna("método") == "METODO"
+    assert normaliza_columna("Técnica") == "TÉCNICA"
+
+def test_lee_solo_las_columnas_pedidas_desde_el_encabezado(tmp_path):
+    ruta = libro_laboratorio(tmp_path / "Base.xlsx")
+    df, encontradas, tags = leer_hoja_origen(ruta, columnas=['PARÁMETRO', 'PUNTO', 'RESULTADO_CRUDO'])
+
+    assert encontradas == ['PARÁMETRO', 'PUNTO', 'METODO', 'RESULTADO_CRUDO']
+    # Filas vacías descartadas; los flotantes enteros se leen como int (igual que pd.read_excel)
+    pd.testing.assert_frame_equal(df, pd.DataFrame({'PARÁMETRO': ["Turbiedad", "Cloro residual"],
+                                                    'PUNTO': ["P1. Entrada", "P2. Cocina"],
+                                                    'RESULTADO_CRUDO': [1, "0,6"]}))
+    pd.testing.assert_frame_equal(tags, pd.DataFrame({'ETIQUETA': ["mes"], 'VALOR': ["Agosto"]}))
+
+def test_sin_hoja_tags(tmp_path):
+    ruta = libro_laboratorio(tmp_path / "Base.xlsx", con_tags=False)
+    df, _, tags = leer_hoja_origen(ruta, columnas=['PARÁMETRO', 'RESULTADO_CRUDO'])
+    assert tags is None
+    assert df['PARÁMETRO'].tolist() == ["Turbiedad", "Cloro residual"]
+
+def test_sin_columnas_pedidas_el_encabezado_es_la_primera_fila(tmp_path):
+    ruta = libro_laboratorio(tmp_path / "Base.xlsx")
+    df, encontradas, _ = leer_hoja_origen(ruta)
+    assert encontradas == ['RESULTADOS DE LABORATORIO']
+    assert df.columns.tolist() == ['RESULTADOS DE LABORATORIO']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor_irca import (COLUMNA_NORMA, COLUMNA_PUNTAJE, COLUMNA_PUNTAJE_ANALIZADO, calcular_irca,
+                        interpretar_limites, verificar_puntaje_completo)
+
+def resultado(codigo, parametro, crudo, norma, puntaje, punto="P1. Entrada"):
+    return {'FECHA': "2025-08-04", 'MES': "Agosto", 'CIUDAD': "Armenia", 'PUNTO': punto, 'CODIGO': codigo,
+            'PARÁMETRO': parametro, 'RESULTADO_CRUDO': crudo, COLUMNA_NORMA: norma, COLUMNA_PUNTAJE: puntaje}
+
+def test_interpreta_limites_de_la_norma():
+    limites = interpretar_limites(pd.Series(["250", "6,5 - 9,0", "< 2", "Ausente", "n/a"]))
+    np.testing.assert_array_equal(limites['minimo'], [np.nan, 6.5, np.nan, np.nan, np.nan])
+    np.testing.assert_array_equal(limites['maximo'], [250.0, 9.0, 2.0, 0.0, np.nan])
+    assert limites['maximo_estricto'].tolist() == [False, False, True, False, False]
+
+def test_irca_por_muestra():
+    df = pd.DataFrame([
+        resultado("MP1", "Turbiedad", "1,53 +/- 0,0465", "2", "15"),
+        resultado("MP1", "Coliformes totales", "Presente", "Ausente", "15"),
+        resultado("MP1", "Color aparente", "<5", "15", "6"),
+        resultado("MP2", "Turbiedad", "3,2", "2", "15", punto="P2. Cocina"),
+        resultado("MP2", "pH", "7,1", "6,5 - 9,0", "1,5", punto="P2. Cocina"),
+        # Sin límite interpretable: no entra al cálculo
+        resultado("MP2", "Olor", "Aceptable", "n/a", "6", punto="P2. Cocina"),
+    ])
+    irca = calcular_irca(df)
+
+    assert irca['Codigo'].tolist() == ["MP1", "MP2"]
+    assert irca['Fecha'].tolist() == [pd.Timestamp(2025, 8, 4)] * 2
+    np.testing.assert_allclose(irca[COLUMNA_PUNTAJE_ANALIZADO], [36.0, 16.5])
+    np.testing.assert_allclose(irca['IRCA (%)'], [round(15 / 36 * 100, 2), round(15 / 16.5 * 100, 2)])
+
+def test_faltan_columnas():
+    with pytest.raises(ValueError, match="Faltan columnas"):
+        calcular_irca(pd.DataFrame({'CIUDAD': ["Armenia"]}))
+
+def test_puntaje_incompleto_se_rechaza():
+    irca = calcular_irca(pd.DataFrame([resultado("MP1", "Turbiedad", "1", "2", "15")]))
+    with pytest.raises(ValueError, match="incompleto"):
+        verificar_puntaje_completo(irca)
+    verificar_puntaje_completo(irca, puntaje_total=15)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parseo_numerico import (CALIFICADOR_AUSENTE, CALIFICADOR_BAJO_LIMITE, CALIFICADOR_INVALIDO,
+                             CALIFICADOR_PRESENTE, CALIFICADOR_SIN_DATO, CALIFICADOR_SOBRE_LIMITE,
+                             CALIFICADOR_VALOR, a_porcentaje, escala_de_evidencia, evidencia_escala,
+                             interpretar_valores)
+
+@pytest.mark.parametrize("texto, valor, calificador", [
+    ("9,90", 9.9, CALIFICADOR_VALOR),
+    ("0.5", 0.5, CALIFICADOR_VALOR),
+    (",25", 0.25, CALIFICADOR_VALOR),
+    ("-1,5", -1.5, CALIFICADOR_VALOR),
+    ("1,53 +/- 0,0465", 1.53, CALIFICADOR_VALOR),
+    (" 15,00% ", 15.0, CALIFICADOR_VALOR),
+    ("<0,5", 0.5, CALIFICADOR_BAJO_LIMITE),
+    ("≤ 0,5", 0.5, CALIFICADOR_BAJO_LIMITE),
+    (">150", 150.0, CALIFICADOR_SOBRE_LIMITE),
+    ("≥2", 2.0, CALIFICADOR_SOBRE_LIMITE),
+    ("Ausente", 0.0, CALIFICADOR_AUSENTE),
+    ("Presente", np.nan, CALIFICADOR_PRESENTE),
+    ("n/a", np.nan, CALIFICADOR_SIN_DATO),
+    ("-", np.nan, CALIFICADOR_SIN_DATO),
+    (None, np.nan, CALIFICADOR_SIN_DATO),
+    ("Muestra dañada", np.nan, CALIFICADOR_INVALIDO),
+])
+def test_interpreta_valores_con_coma_decimal(texto, valor, calificador):
+    resultado = interpretar_valores(pd.Series([texto], dtype=object))
+    np.testing.assert_equal(resultado['valor'].iloc[0], valor)
+    assert resultado['calificador'].iloc[0] == calificador
+
+def test_columna_numerica_no_se_reinterpreta():
+    resultado = interpretar_valores(pd.Series([0.25, np.nan, 3.0]))
+    np.testing.assert_array_equal(resultado['valor'], [0.25, np.nan, 3.0])
+    assert resultado['calificador'].tolist() == [CALIFICADOR_VALOR, CALIFICADOR_SIN_DATO, CALIFICADOR_VALOR]
+    assert not resultado['porcentaje'].any()
+
+def test_porcentajes_con_signo_quedan_en_escala_0_100():
+    # Con '%' en la columna, '1,00%' es 1 % aunque esté entre 0 y 1
+    porcentajes = a_porcentaje(pd.Series(["15,00%", "1,00%", "0,50%", "n/a"], name="IRCA (%)"))
+    np.testing.assert_array_equal(porcentajes, [15.0, 1.0, 0.5, np.nan])
+    assert porcentajes.name == "IRCA (%)"
+
+def test_fracciones_sin_signo_se_llevan_a_0_100():
+    # Celdas de Excel con formato porcentaje: toda la columna está entre 0 y 1
+    np.testing.assert_allclose(a_porcentaje(pd.Series(["0,15", "0", "1"])), [15.0, 0.0, 100.0])
+    np.testing.assert_allclose(a_porcentaje(pd.Series([0.15, 0.0])), [15.0, 0.0])
+
+def test_escala_se_decide_por_columna_y_no_por_valor():
+    # Un solo valor fuera de 0-1 indica que la columna ya está en 0-100
+    np.testing.assert_allclose(a_porcentaje(pd.Series(["0,5", "15", "0"])), [0.5, 15.0, 0.0])
+
+def test_evidencia_por_bloques_decide_como_la_columna_completa():
+    columna = pd.Series(["0,5", "0,25", "15,00%", "0,75"])
+    evidencia = (False, False)
+    for bloque in (columna.iloc[:2], columna.iloc[2:]):
+        evidencia = evidencia_escala(bloque, evidencia)
+    escala = escala_de_evidencia(evidencia)
+
+    assert escala == 1.0
+    por_bloques = pd.concat([a_porcentaje(columna.iloc[:2], escala), a_porcentaje(columna.iloc[2:], escala)])
+    pd.testing.assert_series_equal(por_bloques, a_porcentaje(columna))
+
+def test_evidencia_sin_signo_ni_valores_mayores_a_uno_es_fraccion():
+    evidencia = evidencia_escala(pd.Series(["0,5", "n/a", "<0,1"]))
+    assert evidencia == (False, False)
+    assert escala_de_evidencia(evidencia) == 100.0
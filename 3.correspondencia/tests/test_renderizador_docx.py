@@ -0,0 +1,60 @@
+import io
+import shutil
+import contextlib
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+import Correspondencia
+from analizador_plantillas import PATRON_MARCADOR, cargar_indice_marcadores
+from generador_base_script import ETIQUETAS_TAGS
+from renderizador_docx import MOTOR_DOCX, MOTOR_LXML, MOTOR_POR_DEFECTO, partes_rellenables
+
+PLANTILLA = Path(__file__).resolve().parent.parent / "Plantillas" / "Plantilla_AP_ARM_2025.docx"
+CIUDAD = "Armenia"
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def textos_por_parte(documento):
+    """Texto de cada párrafo, por parte rellenable (documento, encabezados y pies)"""
+    return {str(parte.partname): ["".join(t.text or "" for t in p.iter(f"{W}t"))
+                                  for p in parte.element.iter(f"{W}p")]
+            for parte in partes_rellenables(documento)}
+
+def renderizar(plantilla, motor, indice, fotos):
+    tags = {etiqueta: f"valor {etiqueta}" for etiqueta in ETIQUETAS_TAGS}
+    documento = Document(plantilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Correspondencia.reemplazar_tags(documento, tags, indice, motor)
+        Correspondencia.insertar_fotos_en_docx(documento, CIUDAD, fotos, indice, motor)
+    return textos_por_parte(documento)
+
+@pytest.fixture
+def plantilla(tmp_path):
+    # Copia: el índice de marcadores se guarda junto a la plantilla
+    destino = tmp_path / PLANTILLA.name
+    shutil.copyfile(PLANTILLA, destino)
+    return destino
+
+def test_python_docx_es_el_motor_por_defecto():
+    assert MOTOR_POR_DEFECTO == MOTOR_DOCX
+
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_ambos_motores_producen_el_mismo_texto(plantilla, tmp_path, con_indice):
+    indice = cargar_indice_marcadores(plantilla) if con_indice else None
+    fotos = {CIUDAD: {"FOTO1": str(tmp_path / "no_existe.jpg")}}
+
+    docx = renderizar(plantilla, MOTOR_DOCX, indice, fotos)
+    lxml = renderizar(plantilla, MOTOR_LXML, indice, fotos)
+
+    partes = set(docx)
+    assert "/word/document.xml" in partes
+    assert any(p.startswith("/word/header") for p in partes)
+    assert any(p.startswith("/word/footer") for p in partes)
+    assert docx == lxml
+
+    texto = "\n".join(t for parrafos in docx.values() for t in parrafos)
+    assert "valor mes" in texto
+    assert "Imagen no encontrada" in texto
+    assert not [m.group(0) for m in PATRON_MARCADOR.finditer(texto)
+                if (m.group(1) or m.group(2) or m.group(3)).strip().lower() in ETIQUETAS_TAGS]